@@ -1,77 +1,164 @@
-import pandas as pd
-from textblob import TextBlob
-import numpy as np
+from array import array
+from collections import OrderedDict, deque
 from datetime import datetime
+from keyword_matcher import (DEFAULT_TECHNICAL_KEYWORDS, KeywordMatcher, TaxonomyMatcher,
+                             question_keywords, tokenize)
+from metrics import span
+from running_stats import RunningStats
+
+METRIC_NAMES = ['response_times', 'answer_lengths', 'sentiment_scores', 'keyword_matches', 'technical_accuracy']
 
 class InterviewAnalytics:
-    def __init__(self):
-        self.metrics = {
-            'response_times': [],
-            'answer_lengths': [],
-            'sentiment_scores': [],
-            'keyword_matches': [],
-            'technical_accuracy': []
-        }
+    def __init__(self, percentiles=(0.5, 0.9), technical_keywords=None, use_stemming=True,
+                 question_cache_size=128, sentiment_scorer=None, async_sentiment=False, relevance_scorer=None):
+        # Semantic relevance is an optional extra metric next to the keyword overlap
+        self.relevance_scorer = relevance_scorer
+        self.resume_chunks = []
+        metric_names = METRIC_NAMES + (['relevance'] if relevance_scorer is not None else [])
+        # Raw samples are kept in compact typed arrays, aggregates are kept running
+        self.metrics = {name: array('d') for name in metric_names}
+        self.stats = {name: RunningStats(percentiles) for name in metric_names}
+        self.use_stemming = use_stemming
+        self.technical_matcher = TaxonomyMatcher(technical_keywords or DEFAULT_TECHNICAL_KEYWORDS,
+                                                 use_stemming)
+        self.question_matchers = OrderedDict()
+        self.question_cache_size = question_cache_size
+        # Keyword and accuracy scores of recent (question, answer) pairs; repeated answers are common in practice
+        self.text_scores = OrderedDict()
+        # Without a scorer, sentiment comes from TextBlob inline (the reference implementation)
+        self.sentiment_scorer = sentiment_scorer
+        self.async_sentiment = async_sentiment and sentiment_scorer is not None
+        self.pending_sentiment = deque()
+    
+    def _add_sample(self, name, value):
+        value = float(value)
+        self.metrics[name].append(value)
+        self.stats[name].add(value)
         
     def analyze_response(self, response, question, response_time):
         """Analyze a single response from the candidate"""
+        with span('analytics.analyze_response'):
+            return self._analyze_response(response, question, response_time)
+    
+    def _analyze_response(self, response, question, response_time):
         # Response time analysis
-        self.metrics['response_times'].append(response_time)
+        turn = {'response_times': response_time}
         
         # Answer length analysis
-        self.metrics['answer_lengths'].append(len(response.split()))
+        turn['answer_lengths'] = len(response.split())
         
-        # Sentiment analysis
-        blob = TextBlob(response)
-        self.metrics['sentiment_scores'].append(blob.sentiment.polarity)
+        # Sentiment analysis; scored in the background when async, recorded once ready
+        self._collect_sentiment()
+        if self.async_sentiment:
+            self.pending_sentiment.append(self.sentiment_scorer.submit(response))
+        else:
+            with span('analytics.sentiment'):
+                turn['sentiment_scores'] = self._score_sentiment(response)
         
-        # Keyword matching (based on question context)
-        keywords = self._extract_keywords(question)
-        matches = sum(1 for keyword in keywords if keyword.lower() in response.lower())
-        self.metrics['keyword_matches'].append(matches / len(keywords) if keywords else 0)
+        turn.update(self.score_text(question, response))
         
-        # Technical accuracy score (placeholder - can be enhanced with domain-specific logic)
-        self.metrics['technical_accuracy'].append(self._assess_technical_accuracy(response, question))
+        # Embedding similarity to the question, expanded with the resume sections it refers to
+        if self.relevance_scorer is not None:
+            turn['relevance'] = self.relevance_scorer.score(question, response, self.resume_chunks)
+        
+        for name, value in turn.items():
+            self._add_sample(name, value)
+        if self.async_sentiment:
+            turn['sentiment_scores'] = None
+        return turn
+    
+    def restore_turn(self, turn, response):
+        """Add a turn analyzed in an earlier process, rescoring sentiment if it was still pending then"""
+        self._collect_sentiment()
+        for name, value in turn.items():
+            if value is not None and name in self.metrics:
+                self._add_sample(name, value)
+        if turn.get('sentiment_scores') is None:
+            if self.async_sentiment:
+                self.pending_sentiment.append(self.sentiment_scorer.submit(response))
+            else:
+                self._add_sample('sentiment_scores', self._score_sentiment(response))
+    
+    def score_text(self, question, response):
+        """Keyword and technical accuracy scores of an answer, cached per (question, answer); records nothing"""
+        key = (question, response)
+        scores = self.text_scores.get(key)
+        if scores is not None:
+            self.text_scores.move_to_end(key)
+            return scores
+
+        # Normalize the answer once and share the tokens between matchers
+        tokens = tokenize(response, self.use_stemming)
+        scores = {
+            # Keyword matching (based on question context)
+            'keyword_matches': self._question_matcher(question).match_fraction(tokens=tokens),
+            # Technical accuracy score (placeholder - can be enhanced with domain-specific logic)
+            'technical_accuracy': self._assess_technical_accuracy(tokens)
+        }
+        self.text_scores[key] = scores
+        if len(self.text_scores) > self.question_cache_size:
+            self.text_scores.popitem(last=False)
+        return scores
+    
+    def _score_sentiment(self, response):
+        if self.sentiment_scorer is not None:
+            return self.sentiment_scorer.score(response)
+        # TextBlob is imported on first use to keep worker startup light
+        from textblob import TextBlob
+        return TextBlob(response).sentiment.polarity
+    
+    def _collect_sentiment(self, wait=False):
+        """Record background sentiment scores that are ready, in answer order"""
+        while self.pending_sentiment and (wait or self.pending_sentiment[0].done()):
+            self._add_sample('sentiment_scores', self.pending_sentiment.popleft().result())
     
     def _extract_keywords(self, question):
         """Extract important keywords from the question"""
         # This is a simple implementation - could be enhanced with NLP
-        stop_words = set(['the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
-        return [word for word in question.lower().split() if word not in stop_words]
+        return question_keywords(question)
     
-    def _assess_technical_accuracy(self, response, question):
-        """Assess technical accuracy of response"""
+    def _question_matcher(self, question):
+        """Compiled keyword matcher for a question, built once and cached"""
+        matcher = self.question_matchers.get(question)
+        if matcher is None:
+            matcher = KeywordMatcher(self._extract_keywords(question), self.use_stemming)
+            self.question_matchers[question] = matcher
+            if len(self.question_matchers) > self.question_cache_size:
+                self.question_matchers.popitem(last=False)
+        else:
+            self.question_matchers.move_to_end(question)
+        return matcher
+    
+    def _assess_technical_accuracy(self, tokens):
+        """Assess technical accuracy of a tokenized response"""
         # This is a placeholder implementation
         # Could be enhanced with domain-specific rules or ML models
-        technical_keywords = {
-            'programming': ['code', 'algorithm', 'function', 'class', 'method'],
-            'database': ['sql', 'query', 'database', 'schema', 'table'],
-            'web': ['html', 'css', 'javascript', 'api', 'http']
-        }
-        
-        score = 0
-        for category, keywords in technical_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword.lower() in response.lower())
-            score += matches
+        score = sum(self.technical_matcher.category_matches(tokens=tokens).values())
         
         return min(score / 5, 1.0)  # Normalize to 0-1
     
-    def generate_report(self):
-        """Generate a comprehensive analysis report"""
+    def generate_report(self, include_samples=False):
+        """Generate a comprehensive analysis report from the running aggregates"""
+        self._collect_sentiment(wait=True)
         avg_metrics = {
-            'average_response_time': np.mean(self.metrics['response_times']),
-            'average_answer_length': np.mean(self.metrics['answer_lengths']),
-            'average_sentiment': np.mean(self.metrics['sentiment_scores']),
-            'keyword_match_rate': np.mean(self.metrics['keyword_matches']),
-            'technical_accuracy': np.mean(self.metrics['technical_accuracy'])
+            'average_response_time': self.stats['response_times'].mean,
+            'average_answer_length': self.stats['answer_lengths'].mean,
+            'average_sentiment': self.stats['sentiment_scores'].mean,
+            'keyword_match_rate': self.stats['keyword_matches'].mean,
+            'technical_accuracy': self.stats['technical_accuracy'].mean
         }
+        if 'relevance' in self.stats:
+            avg_metrics['answer_relevance'] = self.stats['relevance'].mean
         
         report = {
             'summary': avg_metrics,
-            'detailed_metrics': self.metrics,
-            'recommendations': self._generate_recommendations(avg_metrics),
+            'response_count': self.stats['response_times'].count,
+            'detailed_metrics': {name: stats.to_dict() for name, stats in self.stats.items()},
+            'recommendations': self._generate_recommendations(avg_metrics) if self.stats['response_times'].count else [],
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
+        if include_samples:
+            report['samples'] = {name: samples.tolist() for name, samples in self.metrics.items()}
         
         return report
     
@@ -85,7 +172,12 @@ class InterviewAnalytics:
         if metrics['average_sentiment'] < 0:
             recommendations.append("Try to maintain a more positive tone in responses")
             
-        if metrics['keyword_match_rate'] < 0.5:
+        # Semantic relevance, when scored, replaces the keyword overlap as the signal here
+        if 'answer_relevance' in metrics:
+            off_topic = metrics['answer_relevance'] < self.relevance_scorer.low_relevance
+        else:
+            off_topic = metrics['keyword_match_rate'] < 0.5
+        if off_topic:
             recommendations.append("Focus on addressing key points in the questions more directly")
             
         if metrics['technical_accuracy'] < 0.7:
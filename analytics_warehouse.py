@@ -0,0 +1,269 @@
+"""Cross-candidate analytics warehouse.
+
+Per-session summaries and per-turn metrics of every finished interview,
+in one SQLite database next to the session catalog. The recorder adds
+each session as it is saved, so cohort queries never read recordings:
+
+    warehouse = AnalyticsWarehouse("interview_sessions/warehouse.db")
+    warehouse.percentiles('response_times', by='model_used', q=(0.9,), since=week_ago)
+    warehouse.distribution('technical_accuracy', roles="Backend Engineer")
+
+Rows are selected in SQL (indexed by start time, model and role) and
+aggregated with pandas/NumPy; pandas is only imported by the queries.
+Sessions recorded before the warehouse existed are loaded with
+
+    python analytics_warehouse.py backfill
+"""
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from analytics_utils import METRIC_NAMES
+
+TURN_METRICS = METRIC_NAMES + ['relevance']
+SESSION_METRICS = ['average_response_time', 'average_answer_length', 'average_sentiment',
+                   'keyword_match_rate', 'technical_accuracy', 'answer_relevance']
+DIMENSIONS = ['username', 'model_used', 'target_role']
+
+
+class AnalyticsWarehouse:
+    """SQLite store of per-session and per-turn interview metrics"""
+
+    # Databases whose schema this process has already ensured
+    initialized_paths = set()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if os.path.abspath(db_path) in AnalyticsWarehouse.initialized_paths:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    model_used TEXT,
+                    target_role TEXT,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    duration_seconds REAL,
+                    response_count INTEGER,
+                    {", ".join(f"{name} REAL" for name in SESSION_METRICS)}
+                )
+            """)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS turns (
+                    session_id TEXT NOT NULL,
+                    turn_index INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    model_used TEXT,
+                    target_role TEXT,
+                    start_time TEXT NOT NULL,
+                    {", ".join(f"{name} REAL" for name in TURN_METRICS)},
+                    PRIMARY KEY (session_id, turn_index)
+                )
+            """)
+            for table in ('sessions', 'turns'):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_start ON {table} (start_time)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_model ON {table} (model_used, start_time)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_role ON {table} (target_role, start_time)")
+        AnalyticsWarehouse.initialized_paths.add(os.path.abspath(db_path))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _rows(session_id, session_data):
+        """The session row and turn rows for a recording's session dict"""
+        analytics = session_data.get('analytics') or {}
+        summary = analytics.get('summary') or {}
+        start_time = session_data['start_time']
+        end_time = session_data.get('end_time')
+        duration = None
+        if end_time:
+            duration = (datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)).total_seconds()
+        dimensions = (session_data['username'], session_data.get('model_used'), session_data.get('target_role'))
+
+        session_row = (session_id, *dimensions, start_time, end_time, duration, analytics.get('response_count'),
+                       *(summary.get(name) for name in SESSION_METRICS))
+
+        # Per-turn values come from the report's samples; older recordings only have the summary
+        samples = analytics.get('samples') or {}
+        turn_count = max((len(values) for values in samples.values()), default=0)
+        turn_rows = []
+        for index in range(turn_count):
+            values = [samples[name][index] if index < len(samples.get(name, ())) else None
+                      for name in TURN_METRICS]
+            turn_rows.append((session_id, index, *dimensions, start_time, *values))
+        return session_row, turn_rows
+
+    def _insert(self, conn, session_id, session_data):
+        session_row, turn_rows = self._rows(session_id, session_data)
+        conn.execute(f"INSERT OR REPLACE INTO sessions VALUES ({','.join('?' * len(session_row))})", session_row)
+        conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        if turn_rows:
+            conn.executemany(f"INSERT INTO turns VALUES ({','.join('?' * len(turn_rows[0]))})", turn_rows)
+
+    def add_session(self, session_id, session_data):
+        """Insert or replace a finished session and its turns"""
+        with closing(self._connect()) as conn, conn:
+            self._insert(conn, session_id, session_data)
+
+    def remove_session(self, session_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+
+    def backfill(self, recordings_dir, replace=False):
+        """Load recorded sessions not in the warehouse yet (all of them with replace)"""
+        from recording_store import RecordingStore
+
+        store = RecordingStore(recordings_dir)
+        with closing(self._connect()) as conn:
+            known = set() if replace else {row[0] for row in conn.execute("SELECT session_id FROM sessions")}
+            count = 0
+            with conn:
+                for session_id, path in store.iter_sessions():
+                    if session_id in known:
+                        continue
+                    try:
+                        session_data = store.load(path=path, include_interactions=False, include_resume=False)
+                    except (OSError, ValueError) as e:
+                        print(f"Skipping {session_id}: {e}")
+                        continue
+                    self._insert(conn, session_id, session_data)
+                    count += 1
+        return count
+
+    def version(self):
+        """Changes whenever sessions are added or removed; use it to key cached query results"""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*), MAX(rowid), MAX(end_time) FROM sessions").fetchone()
+
+    # Queries
+
+    @staticmethod
+    def _where(since=None, until=None, models=None, roles=None, username=None):
+        clauses = []
+        params = []
+        if since is not None:
+            clauses.append("start_time >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            clauses.append("start_time < ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+        for column, values in (('model_used', models), ('target_role', roles)):
+            if values:
+                values = [values] if isinstance(values, str) else list(values)
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if username is not None:
+            clauses.append("username = ?")
+            params.append(username)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _frame(self, table, columns, **filters):
+        import pandas as pd
+
+        where, params = self._where(**filters)
+        with closing(self._connect()) as conn:
+            frame = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM {table}{where}", conn, params=params)
+        if 'start_time' in frame:
+            frame['start_time'] = pd.to_datetime(frame['start_time'])
+        return frame
+
+    def turns(self, metrics=None, **filters):
+        """Per-turn metrics with their session's dimensions as a DataFrame"""
+        return self._frame('turns', ['session_id', 'turn_index', *DIMENSIONS, 'start_time', *(metrics or TURN_METRICS)],
+                           **filters)
+
+    def sessions(self, **filters):
+        """Per-session summaries as a DataFrame"""
+        return self._frame('sessions', ['session_id', *DIMENSIONS, 'start_time', 'end_time', 'duration_seconds',
+                                        'response_count', *SESSION_METRICS], **filters)
+
+    def _metric_frame(self, metric, **filters):
+        if metric in TURN_METRICS:
+            return self.turns([metric], **filters)
+        if metric in SESSION_METRICS or metric in ('duration_seconds', 'response_count'):
+            return self.sessions(**filters)
+        raise ValueError(f"Unknown metric: {metric}")
+
+    def percentiles(self, metric, by='model_used', q=(0.5, 0.9), **filters):
+        """Quantiles of a turn or session metric per group, e.g. p90 response time by model"""
+        import pandas as pd
+
+        frame = self._metric_frame(metric, **filters).dropna(subset=[metric])
+        if frame.empty:
+            return pd.DataFrame(columns=['count', *(f"p{round(level * 100)}" for level in q)])
+        grouped = frame.groupby(frame[by].fillna('(none)') if by else np.zeros(len(frame)))[metric]
+        result = grouped.quantile(list(q)).unstack()
+        result.columns = [f"p{round(level * 100)}" for level in result.columns]
+        result.insert(0, 'count', grouped.size())
+        return result
+
+    def distribution(self, metric, bins=10, value_range=None, **filters):
+        """Histogram of a metric as a DataFrame of bin edges and counts"""
+        import pandas as pd
+
+        values = self._metric_frame(metric, **filters)[metric].dropna().to_numpy(dtype=float)
+        if value_range is None and metric in ('technical_accuracy', 'keyword_matches', 'relevance',
+                                              'keyword_match_rate', 'answer_relevance'):
+            value_range = (0.0, 1.0)
+        counts, edges = np.histogram(values, bins=bins, range=value_range)
+        return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+    def trend(self, metric, freq='D', by=None, statistic='mean', **filters):
+        """A metric aggregated per day (or other pandas frequency), optionally per group"""
+        import pandas as pd
+
+        frame = self._metric_frame(metric, **filters).dropna(subset=[metric])
+        if frame.empty:
+            return pd.DataFrame()
+        keys = [pd.Grouper(key='start_time', freq=freq)] + ([frame[by].fillna('(none)')] if by else [])
+        result = frame.groupby(keys)[metric].agg(statistic)
+        return result.unstack() if by else result.to_frame()
+
+    def dimension_values(self, column):
+        """Distinct models, roles or usernames, for filter widgets"""
+        if column not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {column}")
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {column} FROM sessions WHERE {column} IS NOT NULL AND {column} != '' "
+                f"ORDER BY {column}")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-candidate interview analytics")
+    parser.add_argument('command', choices=['backfill', 'percentiles', 'distribution'])
+    parser.add_argument('--base-dir', default="interview_sessions")
+    parser.add_argument('--replace', action='store_true', help="Backfill: reload sessions already present")
+    parser.add_argument('--metric', default='response_times')
+    parser.add_argument('--by', default='model_used', choices=DIMENSIONS)
+    parser.add_argument('--q', type=float, nargs='+', default=[0.5, 0.9])
+    parser.add_argument('--days', type=float, default=None, help="Only sessions started in the last N days")
+    parser.add_argument('--model', action='append')
+    parser.add_argument('--role', action='append')
+    args = parser.parse_args()
+
+    warehouse = AnalyticsWarehouse(os.path.join(args.base_dir, "warehouse.db"))
+    if args.command == 'backfill':
+        count = warehouse.backfill(os.path.join(args.base_dir, "recordings"), args.replace)
+        print(f"Loaded {count} sessions")
+        return
+
+    since = datetime.now() - timedelta(days=args.days) if args.days is not None else None
+    filters = {'since': since, 'models': args.model, 'roles': args.role}
+    if args.command == 'percentiles':
+        print(warehouse.percentiles(args.metric, args.by, tuple(args.q), **filters).to_string())
+    else:
+        print(warehouse.distribution(args.metric, **filters).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,120 +1,58 @@
 import streamlit as st
-import ollama
-import PyPDF2
-import io
-import json
 import os
-import re
-from datetime import datetime
-import time
+from datetime import datetime, timedelta
 
 # Import our new modules
-from analytics_utils import InterviewAnalytics
-from session_recorder import InterviewRecorder
-from model_config import ModelManager
+from shared_resources import (STARTUP_PROFILE, get_model_manager, get_scheduler, get_user_store,
+                              recover_orphaned_sessions, start_metrics_export, timed)
+
+with timed('app_imports'):
+    from interview_engine import InterviewSession
+    from inference_scheduler import SchedulerBusyError
+    from metrics import PROFILER, REGISTRY
+    from analytics_warehouse import AnalyticsWarehouse, DIMENSIONS, TURN_METRICS
+
+recover_orphaned_sessions()
+start_metrics_export()
+
+# Users who can see the cohort analytics and ops metrics tabs
+ADMIN_USERS = {name.strip() for name in os.environ.get('INTERVIEW_ADMIN_USERS', '').split(',') if name.strip()}
 
 # Initialize session state variables
 if 'authenticated' not in st.session_state:
     st.session_state['authenticated'] = False
-if 'chat_history' not in st.session_state:
-    st.session_state['chat_history'] = []
 if 'user_data' not in st.session_state:
     st.session_state['user_data'] = {}
-if 'resume_text' not in st.session_state:
-    st.session_state['resume_text'] = ""
-if 'analytics' not in st.session_state:
-    st.session_state['analytics'] = InterviewAnalytics()
-if 'recorder' not in st.session_state:
-    st.session_state['recorder'] = InterviewRecorder()
-if 'model_manager' not in st.session_state:
-    st.session_state['model_manager'] = ModelManager()
-if 'selected_model' not in st.session_state:
-    st.session_state['selected_model'] = 'deepseek-r1:7b'
-if 'response_start_time' not in st.session_state:
-    st.session_state['response_start_time'] = None
-
-# File-based user storage
-USERS_FILE = "users.json"
-
-def load_users():
-    """Load users from JSON file."""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    """Save users to JSON file."""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f)
+# The interview itself lives in a headless InterviewSession; this script only renders it
+if 'interview' not in st.session_state:
+    st.session_state['interview'] = None
+# Shared per process; picks up model_config.json edits made by other workers
+st.session_state['model_manager'] = get_model_manager()
+if 'stream_responses' not in st.session_state:
+    st.session_state['stream_responses'] = True
+if 'speculative_prefetch' not in st.session_state:
+    st.session_state['speculative_prefetch'] = False
 
 def register_user(username, password):
     """Register a new user."""
-    users = load_users()
-    if username in users:
-        return False
-    users[username] = {
-        'password': password,
-        'created_at': str(datetime.now())
-    }
-    save_users(users)
-    return True
+    return get_user_store().register(username, password)
 
 def authenticate_user(username, password):
     """Authenticate user credentials."""
-    users = load_users()
-    return username in users and users[username]['password'] == password
+    return get_user_store().authenticate(username, password)
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text content from uploaded PDF file."""
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    return text
-
-def clean_llm_response(response):
-    """Remove thinking/planning section from LLM response."""
-    think_pattern = r'<think>.*?</think>'
-    cleaned_response = re.sub(think_pattern, '', response, flags=re.DOTALL)
-    return cleaned_response.strip()
-
-def generate_interview_questions(resume_text, model_name):
-    """Generate interview questions based on resume content using selected model."""
-    model_config = st.session_state['model_manager'].get_model_config(model_name)
-    
-    system_prompt = model_config['system_prompt'] + f"""
-    Based on the following resume, generate relevant interview questions that assess both technical knowledge and behavioral aspects.
-
-    Resume content:
-    {resume_text}
-
-    Generate 3 technical questions and 2 behavioral questions. Format your response as a numbered list."""
-
-    response = ollama.chat(model=model_name, messages=[
-        {'role': 'system', 'content': system_prompt}
-    ])
-    
-    return clean_llm_response(response['message']['content'])
-
-def chat_with_ai(prompt, resume_context=""):
-    """Handle chat interaction with AI using selected model."""
-    model_name = st.session_state['selected_model']
-    model_config = st.session_state['model_manager'].get_model_config(model_name)
-    
-    messages = [
-        {'role': 'system', 'content': model_config['system_prompt'] + f"\nResume context: {resume_context}"},
-        {'role': 'user', 'content': prompt}
-    ]
-    
-    response = ollama.chat(model=model_name, messages=messages)
-    return clean_llm_response(response['message']['content'])
+def placeholder_callbacks(placeholder):
+    """Engine callbacks that render queue position and streamed tokens into a placeholder."""
+    on_wait = lambda ahead: placeholder.info(f"The interviewer is busy: {ahead} request(s) ahead of you...")
+    on_text = lambda text: placeholder.markdown(f"**AI:** {text}▌")
+    return {'on_text': on_text, 'on_wait': on_wait}
 
 def show_analytics():
     """Display interview analytics."""
     st.subheader("Interview Performance Analytics")
     
-    report = st.session_state['analytics'].generate_report()
+    interview = st.session_state['interview']
+    report = interview.report()
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -123,7 +61,33 @@ def show_analytics():
     with col2:
         st.metric("Technical Accuracy", f"{report['summary']['technical_accuracy']*100:.1f}%")
     with col3:
-        st.metric("Keyword Match Rate", f"{report['summary']['keyword_match_rate']*100:.1f}%")
+        if 'answer_relevance' in report['summary']:
+            st.metric("Answer Relevance", f"{report['summary']['answer_relevance']*100:.1f}%")
+        else:
+            st.metric("Keyword Match Rate", f"{report['summary']['keyword_match_rate']*100:.1f}%")
+    
+    # Display LLM latency for streamed turns
+    llm_stats = [s for s in interview.llm_stats if s['time_to_first_token'] is not None]
+    if llm_stats:
+        col1, col2 = st.columns(2)
+        with col1:
+            avg_ttft = sum(s['time_to_first_token'] for s in llm_stats) / len(llm_stats)
+            st.metric("Avg Time to First Token", f"{avg_ttft:.2f}s")
+        with col2:
+            avg_tps = sum(s['tokens_per_sec'] for s in llm_stats) / len(llm_stats)
+            st.metric("Avg Tokens/sec", f"{avg_tps:.1f}")
+    
+    # Display which models served the interview's calls
+    if interview.routing_log:
+        served = {}
+        for routing in interview.routing_log:
+            served[routing['served_by']] = served.get(routing['served_by'], 0) + 1
+        fallbacks = sum(1 for routing in interview.routing_log if routing['fallback_reason'])
+        st.write("Models served: " + ", ".join(f"{model} ({count})" for model, count in served.items())
+                 + (f" — {fallbacks} fallback(s)" if fallbacks else ""))
+    cached = sum(1 for stats in interview.llm_stats if stats.get('cache'))
+    if cached:
+        st.write(f"Replies served from cache: {cached}")
     
     # Display recommendations
     st.subheader("Recommendations")
@@ -134,17 +98,105 @@ def show_session_history():
     """Display previous interview sessions."""
     st.subheader("Previous Sessions")
     
-    sessions = st.session_state['recorder'].list_sessions(st.session_state['user_data']['username'])
+    username = st.session_state['user_data']['username']
+    recorder = st.session_state['interview'].recorder
+    page_size = 10
+    total_pages = max(1, -(-recorder.count_sessions(username) // page_size))
+    page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key="history_page")
+    
+    sessions = recorder.list_sessions(username, limit=page_size, offset=(page - 1) * page_size)
     
     for session in sessions:
         with st.expander(f"Session: {session['start_time']}"):
             st.write(f"Model used: {session['model_used']}")
+            st.write(f"Interactions: {session['interaction_count']}")
             st.write(f"Duration: {datetime.fromisoformat(session['end_time']).timestamp() - datetime.fromisoformat(session['start_time']).timestamp():.0f} seconds")
             
             if st.button("Load Session", key=session['session_id']):
-                session_data = st.session_state['recorder'].load_session(session['session_id'])
-                st.session_state['chat_history'] = session_data['interactions']
-                st.experimental_rerun()
+                session_data = recorder.load_session(session['session_id'], include_resume=False,
+                                                     include_analytics=False)
+                for chat in session_data['interactions']:
+                    st.write(f"**{'You' if chat['role'] == 'user' else 'AI'}:** {chat['content']}")
+
+def show_ops_metrics():
+    """Display per-stage latency histograms, scheduler state and the sampling profiler."""
+    st.subheader("Hot-path latency (this worker process)")
+    snapshot = REGISTRY.snapshot()
+    rows = [
+        {'stage': name, 'count': stats['count'], 'mean ms': stats['mean'] * 1000,
+         'p50 ms': stats['p50'] * 1000, 'p95 ms': stats['p95'] * 1000, 'p99 ms': stats['p99'] * 1000,
+         'max ms': stats['max'] * 1000}
+        for name, stats in snapshot['histograms'].items()
+    ]
+    if rows:
+        st.table(rows)
+    else:
+        st.write("No spans recorded yet.")
+    if snapshot['counters']:
+        st.write(snapshot['counters'])
+    
+    st.subheader("Scheduler")
+    st.write(get_scheduler().stats())
+    
+    st.subheader("Sampling profiler")
+    profiling = st.checkbox("Sample stacks every 10 ms", value=PROFILER.running, key="profiler_enabled")
+    if profiling and not PROFILER.running:
+        PROFILER.start()
+    elif not profiling and PROFILER.running:
+        PROFILER.stop()
+    if st.button("Reset profile"):
+        PROFILER.reset()
+    for stack, share in PROFILER.top(15):
+        st.text(f"{share * 100:5.1f}%  {stack[-200:]}")
+    if PROFILER.samples:
+        st.download_button("Download folded stacks", PROFILER.folded(), file_name="profile.folded")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cohort_query(kind, db_path, version, metric, since, models, roles, by):
+    """Warehouse query results; cached per filter set until the warehouse changes (version)."""
+    warehouse = AnalyticsWarehouse(db_path)
+    filters = {'since': since, 'models': list(models), 'roles': list(roles)}
+    if kind == 'percentiles':
+        return warehouse.percentiles(metric, by, (0.5, 0.9, 0.99), **filters)
+    if kind == 'distribution':
+        return warehouse.distribution(metric, **filters)
+    return warehouse.trend(metric, by=by, **filters)
+
+def show_cohort_dashboard():
+    """Display metrics across all candidates, by model, role or candidate."""
+    st.subheader("Cohort analytics")
+    warehouse = st.session_state['interview'].recorder.warehouse
+    version = warehouse.version()
+    if not version[0]:
+        st.write("No finished sessions yet. Run `python analytics_warehouse.py backfill` to load older recordings.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        days = st.selectbox("Period", [7, 30, 90, None], key="cohort_days",
+                            format_func=lambda d: f"Last {d} days" if d else "All time")
+    with col2:
+        models = st.multiselect("Models", warehouse.dimension_values('model_used'), key="cohort_models")
+    with col3:
+        roles = st.multiselect("Target roles", warehouse.dimension_values('target_role'), key="cohort_roles")
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.selectbox("Metric", TURN_METRICS, key="cohort_metric")
+    with col2:
+        by = st.selectbox("Group by", DIMENSIONS[1:] + DIMENSIONS[:1], key="cohort_by")
+    
+    since = (datetime.now() - timedelta(days=days)).isoformat() if days else None
+    query = (warehouse.db_path, version, metric, since, tuple(models), tuple(roles), by)
+    
+    st.write(f"**{metric} percentiles by {by}**")
+    st.dataframe(cohort_query('percentiles', *query))
+    st.write(f"**{metric} distribution**")
+    distribution = cohort_query('distribution', *query)
+    st.bar_chart(distribution.assign(bin=distribution['bin_start'].round(2)).set_index('bin')['count'])
+    st.write(f"**Daily mean {metric} by {by}**")
+    trend = cohort_query('trend', *query)
+    if not trend.empty:
+        st.line_chart(trend)
 
 # Streamlit UI
 st.title("AI Interview Assessment System")
@@ -160,8 +212,20 @@ if not st.session_state['authenticated']:
             if authenticate_user(login_username, login_password):
                 st.session_state['authenticated'] = True
                 st.session_state['user_data']['username'] = login_username
-                # Start new session recording
-                st.session_state['recorder'].start_session(login_username)
+                # Continue the interview named in the URL (e.g. after a worker restart), else start one
+                session_options = {'stream': st.session_state['stream_responses'],
+                                   'speculative_prefetch': st.session_state['speculative_prefetch']}
+                interview = None
+                resume_id = st.experimental_get_query_params().get('interview', [None])[0]
+                if resume_id:
+                    try:
+                        interview = InterviewSession.resume(resume_id, username=login_username, **session_options)
+                    except ValueError:
+                        pass
+                if interview is None:
+                    interview = InterviewSession(login_username, **session_options)
+                st.session_state['interview'] = interview
+                st.experimental_set_query_params(interview=interview.recorder.current_session)
                 st.experimental_rerun()
             else:
                 st.error("Invalid credentials")
@@ -186,89 +250,87 @@ else:
         "Select AI Model",
         options=[m[0] for m in models],
         format_func=lambda x: next(m[1] for m in models if m[0] == x),
-        index=0
+        # A resumed interview keeps the model it was using
+        index=next((i for i, m in enumerate(models) if m[0] == st.session_state['interview'].model_name), 0)
     )
-    st.session_state['selected_model'] = selected_model
+    interview = st.session_state['interview']
+    if interview.is_stale():
+        # Another worker served this interview (e.g. a second tab); continue from the shared log
+        interview = st.session_state['interview'] = InterviewSession.resume(
+            interview.recorder.current_session, username=interview.username,
+            stream=interview.stream, speculative_prefetch=interview.speculative_prefetch
+        )
+    interview.set_model(selected_model)
+    interview.set_target_role(st.sidebar.text_input(
+        "Target role",
+        value=interview.target_role or "",
+        help="Role the candidate is interviewing for; used to compare candidates for the same role"
+    ))
+    get_scheduler().warmup(selected_model)
     
     # Show model description
     model_desc = next(m[2] for m in models if m[0] == selected_model)
     st.sidebar.write(f"*{model_desc}*")
     
-    if not st.session_state['resume_text']:
+    st.session_state['stream_responses'] = st.sidebar.checkbox(
+        "Stream responses",
+        value=st.session_state['stream_responses']
+    )
+    st.session_state['speculative_prefetch'] = st.sidebar.checkbox(
+        "Speculative prefetch",
+        value=st.session_state['speculative_prefetch'],
+        help="Warm the model and score the resume for the next turn while you type"
+    )
+    interview.stream = st.session_state['stream_responses']
+    interview.speculative_prefetch = st.session_state['speculative_prefetch']
+    
+    with st.sidebar.expander("Startup profile"):
+        for phase, seconds in STARTUP_PROFILE.items():
+            st.write(f"{phase}: {seconds * 1000:.0f} ms")
+    
+    if not interview.resume_text:
         st.header("Upload Resume")
         uploaded_file = st.file_uploader("Choose your resume (PDF format)", type="pdf")
         
         if uploaded_file is not None:
             try:
-                resume_text = extract_text_from_pdf(uploaded_file)
-                st.session_state['resume_text'] = resume_text
-                st.session_state['recorder'].set_resume_text(resume_text)
-                
-                questions = generate_interview_questions(resume_text, selected_model)
-                st.session_state['chat_history'].append({
-                    "role": "assistant",
-                    "content": f"Based on your resume, let's start with these questions:\n\n{questions}"
-                })
+                interview.ingest_resume(uploaded_file.getvalue(), **placeholder_callbacks(st.empty()))
                 st.experimental_rerun()
             except Exception as e:
                 st.error(f"Error processing PDF: {str(e)}")
     
+    if interview.resume_notice:
+        st.info(interview.resume_notice)
+    
     # Main chat interface
-    tab1, tab2, tab3 = st.tabs(["Interview Chat", "Analytics", "Session History"])
+    tab_names = ["Interview Chat", "Analytics", "Session History"]
+    if st.session_state['user_data']['username'] in ADMIN_USERS:
+        tab_names.extend(["Cohort Analytics", "Ops Metrics"])
+    tab1, tab2, tab3, *admin_tabs = st.tabs(tab_names)
     
     with tab1:
         st.header("Interview Chat")
         
         # Display chat history
-        for chat in st.session_state['chat_history']:
+        for chat in interview.transcript:
             if chat['role'] == 'user':
                 st.write(f"**You:** {chat['content']}")
             else:
                 st.write(f"**AI:** {chat['content']}")
+        # The candidate's response time starts once the question is on screen
+        interview.mark_question_shown()
         
         # User input
         user_input = st.text_input("Your response:", key="user_input")
         
         if st.button("Send"):
             if user_input.strip():
-                # Record response time
-                if st.session_state['response_start_time']:
-                    response_time = time.time() - st.session_state['response_start_time']
-                else:
-                    response_time = 0
-                
-                # Add user message to chat history
-                st.session_state['chat_history'].append({
-                    "role": "user",
-                    "content": user_input
-                })
-                
-                # Record in session recorder
-                st.session_state['recorder'].record_interaction("user", user_input)
-                
+                placeholder = st.empty()
                 try:
-                    # Get AI response
-                    ai_response = chat_with_ai(user_input, st.session_state['resume_text'])
-                    
-                    # Add AI response to chat history
-                    st.session_state['chat_history'].append({
-                        "role": "assistant",
-                        "content": ai_response
-                    })
-                    
-                    # Record in session recorder
-                    st.session_state['recorder'].record_interaction("assistant", ai_response)
-                    
-                    # Update analytics
-                    st.session_state['analytics'].analyze_response(
-                        user_input,
-                        st.session_state['chat_history'][-2]['content'],  # Previous AI message
-                        response_time
-                    )
-                    
-                    # Reset response start time
-                    st.session_state['response_start_time'] = time.time()
-                    
+                    ai_response = interview.submit_answer(user_input, **placeholder_callbacks(placeholder))
+                    placeholder.markdown(f"**AI:** {ai_response}")
+                except SchedulerBusyError:
+                    st.warning("The interviewer is handling many candidates right now. Please send your answer again in a moment.")
                 except Exception as e:
                     st.error(f"Error getting AI response: {str(e)}")
                 
@@ -280,23 +342,23 @@ else:
     with tab3:
         show_session_history()
     
+    if admin_tabs:
+        with admin_tabs[0]:
+            show_cohort_dashboard()
+        with admin_tabs[1]:
+            show_ops_metrics()
+    
     # End Interview button
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
         if st.button("End Interview", type="primary"):
-            # Save analytics to session recording
-            st.session_state['recorder'].add_analytics(
-                st.session_state['analytics'].generate_report()
-            )
-            # End and save session
-            st.session_state['recorder'].end_session()
+            # Save analytics and the session recording
+            interview.end()
             
             # Reset session state
             st.session_state['authenticated'] = False
-            st.session_state['chat_history'] = []
-            st.session_state['resume_text'] = ""
-            st.session_state['analytics'] = InterviewAnalytics()
-            st.session_state['response_start_time'] = None
+            st.session_state['interview'] = None
+            st.experimental_set_query_params()
             st.experimental_rerun()
 
 # Footer
@@ -0,0 +1,315 @@
+"""End-to-end benchmark and load test against the local Ollama stub.
+
+Replays synthetic interviews through the headless engine at a chosen
+concurrency: PDF ingestion, question generation, chat turns (with
+analyze_response timed on its own), end_session and list_sessions. All
+Ollama traffic goes to ollama_stub.py, so results depend only on this
+code and the latency profile given on the command line. Reports
+p50/p95/p99 per stage, throughput and memory:
+
+    python benchmark.py --interviews 20 --concurrency 4 --turns 5
+    python benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmark.py --check-baseline benchmarks/baseline.json --tolerance 0.25
+
+--check-baseline exits with status 1 when any stage's p95 regresses by
+more than the tolerance. benchmarks/baseline.json is a small, fast run
+that tests/test_benchmark.py replays with its recorded settings; after an
+intended performance change, record it again with the same settings:
+
+    python benchmark.py --interviews 4 --concurrency 2 --turns 2 --tokens-per-sec 2000 \
+        --load-seconds 0.05 --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from ollama_stub import StubProfile, start_stub_server
+
+STAGES = ['ingest_pdf', 'generate_questions', 'chat_turn', 'analyze_response', 'end_session', 'list_sessions']
+PERCENTILES = (50, 95, 99)
+
+SKILLS = ['Python', 'Django', 'PostgreSQL', 'Docker', 'Kubernetes', 'AWS', 'React', 'TypeScript',
+          'Kafka', 'Redis', 'Terraform', 'Spark', 'TensorFlow', 'Go', 'GraphQL', 'CI/CD']
+
+ANSWERS = [
+    "I designed a Django REST API backed by PostgreSQL and cut p95 latency in half by adding indexes.",
+    "We containerized the services with Docker and deployed them on Kubernetes with rolling updates.",
+    "When a teammate disagreed with my design I wrote up both options and we agreed on a prototype.",
+    "I optimized a slow SQL query by rewriting a correlated subquery as a join and adding a covering index.",
+    "Our tests run in CI on every pull request and we deploy behind feature flags with gradual rollout.",
+    "A migration project failed because we underestimated data quality issues, so now we profile data first.",
+]
+
+
+def make_resume_pdf(lines, lines_per_page=40):
+    """Minimal single-font PDF with one text line per row"""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+    for i, page_lines in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>")
+        escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in page_lines]
+        stream = "BT /F1 10 Tf 14 TL 50 750 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    out += b"".join(f"{offset:010d} 00000 n \n".encode('ascii') for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode('ascii')
+    return out
+
+
+def synthetic_resume(seed, jobs=3):
+    """Resume lines for a made-up candidate; different seeds never share text"""
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", "Software Engineer", "Summary",
+             f"Engineer with {rng.randint(2, 15)} years of experience building backend systems."]
+    lines.append("Experience")
+    for job in range(jobs):
+        skills = rng.sample(SKILLS, 4)
+        lines.append(f"Company {seed}-{job} - Senior Engineer - {2015 + job}-{2016 + job}")
+        lines.append(f"Built services in {skills[0]} and {skills[1]} handling {rng.randint(1, 90)}k requests per second.")
+        lines.append(f"Led migration to {skills[2]} and automated deployments with {skills[3]}.")
+    lines.append("Skills")
+    lines.append(", ".join(rng.sample(SKILLS, 8)))
+    lines.append("Education")
+    lines.append("BSc Computer Science")
+    return lines
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class StageTimer:
+    """Thread-safe collection of per-stage durations"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def time(self, stage, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def wrap(self, stage, func):
+        return lambda *args, **kwargs: self.time(stage, func, *args, **kwargs)
+
+    def summary(self):
+        return {
+            stage: {
+                'count': len(values),
+                **{f"p{q}": percentile(values, q) for q in PERCENTILES},
+                'max': max(values) if values else None
+            }
+            for stage, values in self.samples.items()
+        }
+
+
+def run_interview(index, args, timer, base_dir):
+    """One synthetic interview through the engine"""
+    from interview_engine import InterviewSession
+    from shared_resources import get_pdf_ingestor
+
+    session = InterviewSession(f"bench{index:05d}", args.model, stream=not args.no_stream,
+                               speculative_prefetch=args.speculative_prefetch, base_dir=base_dir)
+    session.analytics.analyze_response = timer.wrap('analyze_response', session.analytics.analyze_response)
+
+    seed = index if not args.reuse_resumes else 0
+    pdf_bytes = make_resume_pdf(synthetic_resume(seed))
+    resume_text = timer.time('ingest_pdf', get_pdf_ingestor().extract_text, pdf_bytes)
+    timer.time('generate_questions', session.ingest_resume, resume_text=resume_text)
+
+    rng = random.Random(index)
+    for _ in range(args.turns):
+        timer.time('chat_turn', session.submit_answer, rng.choice(ANSWERS))
+
+    timer.time('end_session', session.end)
+    timer.time('list_sessions', session.recorder.list_sessions, session.username, 10)
+
+
+def run_benchmark(args):
+    """Run the load test in a scratch directory and return the results dict"""
+    profile = StubProfile(tokens_per_sec=args.tokens_per_sec, prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+                          load_seconds=args.load_seconds, num_parallel=args.num_parallel,
+                          reply_tokens=args.reply_tokens, think_tokens=args.think_tokens)
+    server, url = start_stub_server(profile)
+    # Must be set before shared_resources creates the Ollama client
+    os.environ['OLLAMA_HOST'] = url
+    os.environ['INTERVIEW_RESPONSE_CACHE'] = 'on' if args.response_cache else 'off'
+
+    workdir = tempfile.mkdtemp(prefix='interview-bench-')
+    original_cwd = os.getcwd()
+    config_file = os.path.join(original_cwd, 'model_config.json')
+    if os.path.exists(config_file):
+        shutil.copy(config_file, workdir)
+    os.chdir(workdir)
+
+    timer = StageTimer()
+    errors = []
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        from shared_resources import get_pdf_ingestor
+
+        def run_one(index):
+            try:
+                run_interview(index, args, timer, os.path.join(workdir, 'interview_sessions'))
+            except Exception as e:
+                errors.append(f"interview {index}: {e!r}")
+
+        # Untimed interviews first, so lazy imports and model loading are not counted
+        for index in range(args.warmup):
+            run_interview(args.interviews + index, args, StageTimer(), os.path.join(workdir, 'interview_sessions'))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run_one, range(args.interviews)))
+        elapsed = time.perf_counter() - started
+
+        get_pdf_ingestor().shutdown()
+        peak_traced = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    finally:
+        if args.tracemalloc:
+            tracemalloc.stop()
+        os.chdir(original_cwd)
+        server.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    completed = args.interviews - len(errors)
+    return {
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('save_baseline', 'check_baseline', 'tolerance', 'min_delta', 'output',
+                                  'keep_workdir')},
+        'stages': timer.summary(),
+        'throughput': {
+            'elapsed_seconds': elapsed,
+            'interviews_per_sec': completed / elapsed if elapsed else None,
+            'turns_per_sec': completed * args.turns / elapsed if elapsed else None
+        },
+        'memory': {'max_rss_bytes': max_rss, 'tracemalloc_peak_bytes': peak_traced},
+        'stub': server.state.snapshot(),
+        'errors': errors
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta=0.005):
+    """Stages whose p95 got slower than the baseline by more than tolerance (and min_delta seconds)"""
+    regressions = []
+    for stage, stats in results['stages'].items():
+        before = baseline.get('stages', {}).get(stage, {}).get('p95')
+        after = stats.get('p95')
+        if before is None or after is None:
+            continue
+        if after > before * (1 + tolerance) and after - before > min_delta:
+            regressions.append(f"{stage}: p95 {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'stage':<20} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, stats in results['stages'].items():
+        if not stats['count']:
+            continue
+        print(f"{stage:<20} {stats['count']:>6} " +
+              " ".join(f"{stats[key] * 1000:>10.1f}" for key in ('p50', 'p95', 'p99', 'max')))
+
+    throughput = results['throughput']
+    print(f"\n{throughput['interviews_per_sec']:.2f} interviews/s, {throughput['turns_per_sec']:.2f} turns/s "
+          f"over {throughput['elapsed_seconds']:.1f}s")
+    memory = results['memory']
+    print(f"max RSS {memory['max_rss_bytes'] / 2 ** 20:.1f} MiB", end="")
+    if memory['tracemalloc_peak_bytes'] is not None:
+        print(f", traced peak {memory['tracemalloc_peak_bytes'] / 2 ** 20:.1f} MiB", end="")
+    print(f"\nstub: {results['stub']}")
+    for error in results['errors']:
+        print(f"ERROR {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the interview pipeline against the Ollama stub")
+    parser.add_argument('--interviews', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--turns', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed interviews to run first")
+    parser.add_argument('--model', default='mistral:7b')
+    parser.add_argument('--no-stream', action='store_true')
+    parser.add_argument('--speculative-prefetch', action='store_true')
+    parser.add_argument('--response-cache', action='store_true',
+                        help="Reuse replies to repeated answers (off by default so every turn calls the model)")
+    parser.add_argument('--reuse-resumes', action='store_true',
+                        help="Give every interview the same resume (exercises the PDF and question caches)")
+    parser.add_argument('--tokens-per-sec', type=float, default=200.0)
+    parser.add_argument('--prompt-tokens-per-sec', type=float, default=5000.0)
+    parser.add_argument('--load-seconds', type=float, default=0.2)
+    parser.add_argument('--num-parallel', type=int, default=2)
+    parser.add_argument('--reply-tokens', type=int, default=None)
+    parser.add_argument('--think-tokens', type=int, default=0)
+    parser.add_argument('--tracemalloc', action='store_true', help="Trace Python allocations (slower)")
+    parser.add_argument('--output', help="Write the full results as JSON")
+    parser.add_argument('--save-baseline', help="Save the results as a baseline JSON file")
+    parser.add_argument('--check-baseline', help="Fail if p95 regresses against this baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help="Ignore p95 increases smaller than this many seconds")
+    parser.add_argument('--keep-workdir', action='store_true')
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if results['errors']:
+        sys.exit(1)
+    if args.check_baseline:
+        with open(args.check_baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
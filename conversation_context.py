@@ -0,0 +1,135 @@
+import threading
+
+from llm_streaming import strip_think_tags
+from resume_index import estimate_tokens
+
+SUMMARY_INSTRUCTIONS = """You maintain running notes for an AI interviewer. Merge the previous notes
+and the new exchanges into concise notes covering the questions asked, the candidate's key
+answers and any strengths or gaps observed. Reply with the notes only."""
+
+
+class ConversationContext:
+    """Conversation memory laid out so Ollama can reuse its prompt cache.
+
+    Messages are ordered from most to least stable: the system prompt and
+    resume overview, then the running summary, then verbatim recent turns,
+    and finally the per-turn resume context and the new input. Old turns
+    are folded into the summary in blocks, so the cached prefix is only
+    invalidated every fold_every turns instead of on every message.
+    """
+
+    def __init__(self, prefix, recent_turns=6, token_ceiling=3000, summarizer=None, fold_every=None):
+        self.prefix = prefix
+        self.recent_turns = recent_turns
+        self.token_ceiling = token_ceiling
+        self.summarizer = summarizer
+        self.fold_every = fold_every or max(1, recent_turns // 2)
+        self.summary = ""
+        self.turns = []
+        self.pending = []
+        self.lock = threading.Lock()
+        self.summary_thread = None
+
+    def reconfigure(self, prefix, recent_turns, token_ceiling, summarizer):
+        """Apply another model's prefix and limits, e.g. after switching models"""
+        self.prefix = prefix
+        self.recent_turns = recent_turns
+        self.token_ceiling = token_ceiling
+        self.summarizer = summarizer
+
+    def add_turn(self, role, content):
+        """Append a message; fold the oldest turns out once the window overflows"""
+        with self.lock:
+            self.turns.append({'role': role, 'content': content})
+            # A turn is a user/assistant exchange, i.e. two messages
+            max_messages = 2 * (self.recent_turns + self.fold_every)
+            if len(self.turns) > max_messages:
+                fold_count = 2 * self.fold_every
+                self.pending.extend(self.turns[:fold_count])
+                del self.turns[:fold_count]
+        self._start_summarizer()
+
+    def _start_summarizer(self):
+        if self.summarizer is None or not self.pending:
+            return
+        if self.summary_thread is not None and self.summary_thread.is_alive():
+            return
+        self.summary_thread = threading.Thread(target=self._summarize_pending, daemon=True)
+        self.summary_thread.start()
+
+    def _summarize_pending(self):
+        """Background job: fold pending turns into the running summary"""
+        while True:
+            with self.lock:
+                if not self.pending:
+                    return
+                previous_summary = self.summary
+                folded = list(self.pending)
+            try:
+                summary = self.summarizer(previous_summary, folded)
+            except Exception:
+                # Pending turns stay verbatim (within the ceiling) and are retried next fold
+                return
+            with self.lock:
+                self.summary = summary
+                del self.pending[:len(folded)]
+
+    def wait_for_summary(self, timeout=None):
+        """Block until any running background summarization finishes"""
+        if self.summary_thread is not None:
+            self.summary_thread.join(timeout)
+
+    def _stable_messages(self):
+        with self.lock:
+            summary = self.summary
+            history = self.pending + self.turns
+
+        messages = [{'role': 'system', 'content': self.prefix}]
+        if summary:
+            messages.append({'role': 'system', 'content': f"Interview notes so far:\n{summary}"})
+        return messages, history
+
+    def _fit_history(self, history, budget):
+        """Keep the newest history that fits; older unsummarized turns go first"""
+        kept = []
+        for message in reversed(history):
+            cost = estimate_tokens(message['content'])
+            if cost > budget:
+                break
+            kept.append(message)
+            budget -= cost
+        kept.reverse()
+        return kept
+
+    def build_prefix_messages(self, reserve_tokens=0):
+        """Messages shared by the next turn's prompt, i.e. everything before the new input"""
+        messages, history = self._stable_messages()
+        budget = self.token_ceiling - reserve_tokens - sum(estimate_tokens(m['content']) for m in messages)
+        return messages + self._fit_history(history, budget)
+
+    def build_messages(self, user_input, turn_context=""):
+        """Build the chat messages for a turn within the token ceiling"""
+        messages, history = self._stable_messages()
+
+        final_content = user_input
+        if turn_context:
+            final_content = f"{turn_context}\n\nCandidate: {user_input}"
+        final_message = {'role': 'user', 'content': final_content}
+
+        budget = self.token_ceiling - sum(estimate_tokens(m['content']) for m in messages + [final_message])
+        return messages + self._fit_history(history, budget) + [final_message]
+
+
+def make_ollama_summarizer(client, model_name):
+    """Summarizer callable that asks an Ollama model to update the running notes"""
+    def summarize(previous_summary, messages):
+        transcript = "\n".join(
+            f"{'Candidate' if m['role'] == 'user' else 'Interviewer'}: {m['content']}" for m in messages
+        )
+        prompt = f"Previous notes:\n{previous_summary or '(none)'}\n\nNew exchanges:\n{transcript}"
+        response = client.chat(model=model_name, messages=[
+            {'role': 'system', 'content': SUMMARY_INSTRUCTIONS},
+            {'role': 'user', 'content': prompt}
+        ])
+        return strip_think_tags(response['message']['content'])
+    return summarize
\ No newline at end of file
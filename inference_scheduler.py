@@ -0,0 +1,300 @@
+"""Central scheduler for Ollama inference requests.
+
+All chat and question-generation calls from every interview in the process
+go through one InferenceScheduler instead of hitting Ollama directly:
+
+* per-model queues are bounded; a full queue raises SchedulerBusyError so
+  the UI can tell the candidate to retry instead of piling on more load
+* requests are ordered by priority (interactive chat, then question
+  generation, then background work) and arrival order
+* requests for the model that is already loaded are drained in batches of
+  up to max_batch before switching, and different models never run at the
+  same time, so Ollama does not thrash swapping models in and out of memory
+* every call passes keep_alive, and warmup() preloads a model ahead of use
+* callers can ask for their queue position while they wait
+"""
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from metrics import inc, observe
+
+PRIORITY_CHAT = 0
+PRIORITY_QUESTION_GENERATION = 1
+PRIORITY_BACKGROUND = 2
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a model's queue is full"""
+
+
+class InferenceRequest:
+    """A queued chat request; consume it with iter_chunks() or result()"""
+
+    def __init__(self, scheduler, model, messages, priority, seq, options=None, kind='chat'):
+        self.scheduler = scheduler
+        self.model = model
+        self.messages = messages
+        self.priority = priority
+        self.seq = seq
+        self.options = options
+        self.kind = kind
+        self.chunks = queue.Queue()
+        # Events set on every chunk, for consumers waiting on several requests at once
+        self.watchers = []
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.response = None
+        self.error = None
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+
+    @property
+    def queue_wait(self):
+        """Seconds spent queued before a worker picked the request up"""
+        if self.started_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+    def position(self):
+        """Number of queued requests that will be served before this one"""
+        return self.scheduler.queue_position(self)
+
+    def cancel(self):
+        """Drop the request if queued, or stop streaming if already running"""
+        self.cancelled = True
+
+    def watch(self, event):
+        """Set event whenever a chunk (or the end of the stream) arrives"""
+        self.watchers.append(event)
+        if not self.chunks.empty():
+            event.set()
+
+    def put_chunk(self, chunk):
+        """Hand a chunk, or None at the end, to the consumer"""
+        self.chunks.put(chunk)
+        for event in self.watchers:
+            event.set()
+
+    def iter_chunks(self, on_wait=None, poll_interval=0.5):
+        """Yield Ollama stream chunks; on_wait(position) is called while queued"""
+        finished = False
+        try:
+            while True:
+                try:
+                    chunk = self.chunks.get(timeout=poll_interval)
+                except queue.Empty:
+                    if on_wait is not None and not self.started.is_set():
+                        on_wait(self.position())
+                    continue
+                if chunk is None:
+                    break
+                yield chunk
+            finished = True
+        finally:
+            if not finished:
+                # The consumer went away; stop generating for nobody
+                self.cancel()
+        if self.error is not None:
+            raise self.error
+
+    def result(self, timeout=None):
+        """Wait for the complete (non-streamed) response"""
+        if not self.done.wait(timeout):
+            raise TimeoutError(f"Request for {self.model} did not finish in {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class InferenceScheduler:
+    def __init__(self, client, max_queue_per_model=32, max_concurrency=2, max_batch=4, keep_alive='15m',
+                 warmup_interval=60):
+        self.client = client
+        self.warmup_interval = warmup_interval
+        self.max_queue_per_model = max_queue_per_model
+        self.max_concurrency = max_concurrency
+        self.max_batch = max_batch
+        self.keep_alive = keep_alive
+        self.queues = {}
+        self.in_flight = {}
+        self.active_model = None
+        self.batch_count = 0
+        self.warm_models = {}
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.stopping = False
+        self.workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(max_concurrency)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, model, messages, priority=PRIORITY_CHAT, options=None, kind='chat'):
+        """Queue a request; raises SchedulerBusyError when the model's queue is full"""
+        with self.cond:
+            model_queue = self.queues.setdefault(model, [])
+            waiting = sum(1 for entry in model_queue if not entry[2].cancelled)
+            if waiting >= self.max_queue_per_model:
+                inc('scheduler.rejected')
+                raise SchedulerBusyError(f"{model} has {waiting} requests waiting; try again shortly")
+            request = InferenceRequest(self, model, messages, priority, next(self.seq), options, kind)
+            heapq.heappush(model_queue, (priority, request.seq, request))
+            self.cond.notify()
+        return request
+
+    def warmup(self, model):
+        """Preload a model in the background unless it was used recently"""
+        with self.cond:
+            # Checked and set together so concurrent turns queue one warmup between them
+            last_used = self.warm_models.get(model)
+            if last_used is not None and time.monotonic() - last_used < self.warmup_interval:
+                return None
+            self.warm_models[model] = time.monotonic()
+        try:
+            return self.submit(model, [], PRIORITY_BACKGROUND, kind='warmup')
+        except SchedulerBusyError:
+            return None
+
+    def queue_position(self, request):
+        with self.cond:
+            if request.started.is_set():
+                return 0
+            key = (request.priority, request.seq)
+            return sum(1 for model_queue in self.queues.values()
+                       for priority, seq, queued in model_queue
+                       if (priority, seq) < key and not queued.cancelled)
+
+    def stats(self):
+        """Snapshot of queue depths and in-flight requests per model"""
+        with self.cond:
+            return {
+                'active_model': self.active_model,
+                'queued': {model: sum(1 for entry in q if not entry[2].cancelled)
+                           for model, q in self.queues.items()},
+                'in_flight': dict(self.in_flight)
+            }
+
+    def shutdown(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        for worker in self.workers:
+            worker.join()
+
+    def _pick(self):
+        """Choose the next request; must hold self.cond. Returns None to wait."""
+        for model_queue in self.queues.values():
+            while model_queue and model_queue[0][2].cancelled:
+                request = heapq.heappop(model_queue)[2]
+                request.put_chunk(None)
+                request.done.set()
+
+        waiting = {model: q[0][:2] for model, q in self.queues.items() if q}
+        if not waiting:
+            return None
+
+        running = [model for model, count in self.in_flight.items() if count > 0]
+        current = running[0] if running else self.active_model
+        others_waiting = any(model != current for model in waiting)
+
+        if current in waiting and (self.batch_count < self.max_batch or not others_waiting):
+            model = current
+        elif running:
+            # Let the loaded model drain before another one is swapped in
+            return None
+        else:
+            model = min(waiting, key=waiting.get)
+
+        if model != self.active_model or self.batch_count >= self.max_batch:
+            self.active_model = model
+            self.batch_count = 0
+        self.batch_count += 1
+        return heapq.heappop(self.queues[model])[2]
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                request = self._pick()
+                while request is None:
+                    if self.stopping:
+                        return
+                    self.cond.wait()
+                    request = self._pick()
+                self.in_flight[request.model] = self.in_flight.get(request.model, 0) + 1
+            try:
+                self._run(request)
+            finally:
+                with self.cond:
+                    self.in_flight[request.model] -= 1
+                    self.warm_models[request.model] = time.monotonic()
+                    self.cond.notify_all()
+
+    def _run(self, request):
+        request.started_at = time.monotonic()
+        request.started.set()
+        observe(f"scheduler.queue_wait.{request.kind}", request.queue_wait)
+        try:
+            if request.kind == 'warmup':
+                # An empty prompt makes Ollama load the model without generating
+                self.client.generate(model=request.model, prompt='', keep_alive=self.keep_alive)
+                return
+            if request.kind == 'embed':
+                # messages holds the input texts
+                response = self.client.embed(model=request.model, input=request.messages,
+                                             keep_alive=self.keep_alive)
+                request.response = {'model': request.model, 'embeddings': response['embeddings'],
+                                    'queue_wait': request.queue_wait}
+                return
+
+            content = []
+            last_chunk = None
+            for chunk in self.client.chat(model=request.model, messages=request.messages, stream=True,
+                                          keep_alive=self.keep_alive, options=request.options):
+                if request.cancelled:
+                    break
+                content.append(chunk['message']['content'])
+                request.put_chunk(chunk)
+                last_chunk = chunk
+
+            request.response = {
+                'model': request.model,
+                'message': {'role': 'assistant', 'content': "".join(content)},
+                'done': True,
+                'eval_count': last_chunk.get('eval_count') if last_chunk is not None else None,
+                'eval_duration': last_chunk.get('eval_duration') if last_chunk is not None else None,
+                'queue_wait': request.queue_wait
+            }
+        except Exception as e:
+            request.error = e
+        finally:
+            request.put_chunk(None)
+            request.done.set()
+
+
+class ScheduledClient:
+    """Drop-in for the parts of ollama.Client the app uses, routed through a scheduler"""
+
+    def __init__(self, scheduler, priority=PRIORITY_CHAT, on_wait=None):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.on_wait = on_wait
+        self.last_request = None
+
+    def chat(self, model, messages, stream=False, options=None, **kwargs):
+        request = self.scheduler.submit(model, messages, self.priority, options)
+        self.last_request = request
+        if stream:
+            return request.iter_chunks(self.on_wait)
+        # Still report queue position while waiting for a non-streamed reply
+        for _ in request.iter_chunks(self.on_wait):
+            pass
+        return request.result()
+
+    def embed(self, model, input, **kwargs):
+        request = self.scheduler.submit(model, list(input), self.priority, kind='embed')
+        self.last_request = request
+        for _ in request.iter_chunks(self.on_wait):
+            pass
+        return request.result()
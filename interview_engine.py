@@ -0,0 +1,365 @@
+"""Headless interview engine.
+
+InterviewSession holds everything one interview needs (analytics, the
+session recorder, resume index, conversation memory and speculative
+prefetch) and exposes the interview as plain method calls, with no
+Streamlit dependency. The Streamlit app, interview_service.py and load
+generators all drive the same code:
+
+    session = InterviewSession("alice", "mistral:7b")
+    opening = session.ingest_resume(pdf_bytes)
+    reply = session.submit_answer("I built a Django service...")
+    session_id, report = session.end()
+
+The interview's state lives in the recorder's session log (see
+session_state.py), so another worker can pick it up after a restart:
+
+    session = InterviewSession.resume(session_id, username="alice")
+
+Streaming is reported through callbacks: on_text(text_so_far) as tokens
+arrive and on_wait(requests_ahead) while the request is queued.
+"""
+import time
+from datetime import datetime
+
+from analytics_utils import InterviewAnalytics
+from conversation_context import ConversationContext, make_ollama_summarizer
+from inference_scheduler import PRIORITY_BACKGROUND, PRIORITY_CHAT, PRIORITY_QUESTION_GENERATION
+from llm_streaming import stream_chat, strip_think_tags
+from metrics import observe, span
+from model_router import ModelRouter
+from resume_index import ResumeIndex
+from session_recorder import InterviewRecorder
+from shared_resources import (get_model_manager, get_pdf_ingestor, get_question_cache, get_relevance_scorer,
+                              get_response_cache, get_scheduler, get_sentiment_scorer, get_state_backend)
+from speculation import TurnSpeculator, parse_numbered_questions
+
+QUESTION_PROMPT = """
+    Based on the following resume, generate relevant interview questions that assess both technical knowledge and behavioral aspects.
+
+    Resume content:
+    {resume_text}
+
+    Generate 3 technical questions and 2 behavioral questions. Format your response as a numbered list."""
+
+
+class InterviewSession:
+    """One candidate's interview, independent of any front end"""
+
+    def __init__(self, username, model_name=None, stream=True, speculative_prefetch=False,
+                 base_dir="interview_sessions", model_manager=None, scheduler=None, target_role=None,
+                 session_id=None):
+        self.username = username
+        self.stream = stream
+        self.speculative_prefetch = speculative_prefetch
+        self.model_manager = model_manager or get_model_manager()
+        self.scheduler = scheduler or get_scheduler()
+        self.analytics = InterviewAnalytics(technical_keywords=self.model_manager.get_keyword_taxonomy(),
+                                            sentiment_scorer=get_sentiment_scorer(), async_sentiment=True,
+                                            relevance_scorer=get_relevance_scorer())
+        self.recorder = InterviewRecorder(base_dir, state_backend=get_state_backend(base_dir))
+        self.speculator = TurnSpeculator(self.scheduler)
+        self.router = ModelRouter(self.model_manager, self.scheduler)
+        self.response_cache = get_response_cache()
+
+        self.model_name = None
+        self.target_role = None
+        self.resume_text = ""
+        self.resume_index = None
+        # Set when only the first pages of a long resume PDF were read
+        self.resume_notice = None
+        self.conversation = None
+        self.planned_questions = []
+        self.llm_stats = []
+        self.routing_log = []
+        self.question_shown_at = None
+        self.question_ready_at = None
+        self.ended = False
+
+        if session_id is not None:
+            self._resume(session_id, username)
+            return
+        self.recorder.start_session(username)
+        self.set_model(model_name or self.model_manager.list_models()[0][0])
+        self.set_target_role(target_role)
+
+    @classmethod
+    def resume(cls, session_id, username=None, **kwargs):
+        """Rebuild a live interview from its session log; ValueError if it is finished or not username's"""
+        return cls(username, session_id=session_id, **kwargs)
+
+    def _resume(self, session_id, username):
+        session_data = self.recorder.resume_session(session_id, username)
+        self.username = session_data['username']
+        # Set directly: these are already in the log
+        self.model_name = session_data['model_used'] or self.model_manager.list_models()[0][0]
+        self.target_role = session_data.get('target_role')
+        self.routing_log = session_data['routing_log']
+
+        transcript = self.transcript
+        if session_data['resume_text']:
+            self.resume_text = session_data['resume_text']
+            self.resume_index = ResumeIndex(self.resume_text)
+            self.analytics.resume_chunks = [chunk['text'] for chunk in self.resume_index.chunks]
+            if transcript:
+                self.planned_questions = parse_numbered_questions(transcript[0]['content'])
+
+        # Answers the interviewer never replied to (e.g. a full queue) were not part of the conversation
+        conversation = self._get_conversation()
+        for index, message in enumerate(transcript):
+            if message['role'] == 'assistant' or (index + 1 < len(transcript)
+                                                  and transcript[index + 1]['role'] == 'assistant'):
+                conversation.add_turn(message['role'], message['content'])
+        for turn in session_data['turns']:
+            self.analytics.restore_turn(turn['metrics'], transcript[turn['interaction']]['content'])
+        self.llm_stats = [message['metadata'] for message in transcript
+                          if message['role'] == 'assistant' and message.get('metadata')]
+
+        if transcript and transcript[-1]['role'] == 'assistant':
+            self.question_ready_at = datetime.fromisoformat(transcript[-1]['timestamp']).timestamp()
+
+    @property
+    def transcript(self):
+        """The interview's messages, as recorded in the session log"""
+        return self.recorder.interactions
+
+    def is_stale(self):
+        """Whether another worker has advanced this interview; resume it again before use"""
+        return self.recorder.is_stale()
+
+    def set_model(self, model_name):
+        """Switch the interviewer model for the following turns"""
+        if model_name == self.model_name:
+            return
+        self.model_name = model_name
+        self.recorder.set_model_used(model_name)
+
+    def set_target_role(self, target_role):
+        """Record the role the candidate is interviewing for, used to group cohort analytics"""
+        target_role = (target_role or '').strip() or None
+        if target_role == self.target_role:
+            return
+        self.target_role = target_role
+        self.recorder.set_target_role(target_role)
+    
+    def _record_routing(self, client):
+        routing = client.routing_record()
+        self.routing_log.append(routing)
+        self.recorder.set_model_used(routing['served_by'], routing=routing)
+        return routing
+
+    def _run_llm(self, messages, priority, on_text=None, on_wait=None, task='chat', answer=None):
+        """Run a call on the model the router picks; the selected model only sets the persona"""
+        client = self.router.client(self.router.route(task, self.model_name, answer), priority, on_wait)
+
+        if not self.stream:
+            with span('llm.total'):
+                response = client.chat(model=client.decision.model, messages=messages)
+            self._record_routing(client)
+            return strip_think_tags(response['message']['content'])
+
+        text, stats = stream_chat(client, client.decision.model, messages, on_text=on_text)
+        stats['queue_wait'] = client.last_request.queue_wait
+        stats['model'] = client.last_request.model
+        stats['routing'] = self._record_routing(client)
+        self.llm_stats.append(stats)
+        if stats['time_to_first_token'] is not None:
+            observe('llm.time_to_first_token', stats['time_to_first_token'])
+        observe('llm.total', stats['total_time'])
+        return text
+
+    def _response_cache_scope(self):
+        return self.response_cache.scope_key(self.recorder.current_session, self.resume_text)
+
+    def _cached_reply(self, last_question, answer, on_text=None):
+        """A reply already given to this input for this question and persona, or None"""
+        if self.response_cache is None:
+            return None
+        started = time.perf_counter()
+        self.response_cache.configure(self.model_manager.get_response_cache_policy())
+        reply, kind = self.response_cache.get(self.model_name, self.model_manager.get_model_config(self.model_name),
+                                              last_question, answer, self._response_cache_scope())
+        if reply is None:
+            return None
+        if on_text is not None:
+            on_text(reply)
+        if self.stream:
+            self.llm_stats.append({'cache': kind, 'model': None, 'time_to_first_token': None,
+                                   'tokens_per_sec': None, 'total_time': time.perf_counter() - started})
+        return reply
+
+    def _get_conversation(self):
+        model_config = self.model_manager.get_model_config(self.model_name)
+
+        # Stable prefix: only changes when the model (and so its prompt) changes
+        prefix = model_config['system_prompt']
+        if self.resume_index is not None:
+            prefix += f"\nResume overview:\n{self.resume_index.overview()}"
+        recent_turns, token_ceiling = self.model_manager.get_context_limits(self.model_name)
+        # Summaries go through the router too, so they fall back like any other call
+        summary_route = self.router.route('summary', self.model_name)
+        summarizer = make_ollama_summarizer(self.router.client(summary_route, PRIORITY_BACKGROUND), summary_route.model)
+
+        if self.conversation is None:
+            self.conversation = ConversationContext(prefix, recent_turns, token_ceiling, summarizer)
+        else:
+            self.conversation.reconfigure(prefix, recent_turns, token_ceiling, summarizer)
+        return self.conversation
+
+    def _add_message(self, role, content, metadata=None, timestamp=None):
+        self.recorder.record_interaction(role, content, timestamp=timestamp, metadata=metadata)
+
+    def generate_questions(self, on_text=None, on_wait=None):
+        """Interview questions for the current resume, from the cache when possible"""
+        model_config = self.model_manager.get_model_config(self.model_name)
+
+        question_cache = get_question_cache()
+        # Cached per generating model, so a routing change produces fresh questions
+        generating_model = self.router.route('question_generation', self.model_name).model
+        questions = question_cache.get(self.resume_text, generating_model, model_config)
+        if questions is None:
+            system_prompt = model_config['system_prompt'] + QUESTION_PROMPT.format(resume_text=self.resume_text)
+            questions = self._run_llm([{'role': 'system', 'content': system_prompt}],
+                                      PRIORITY_QUESTION_GENERATION, on_text, on_wait, task='question_generation')
+            question_cache.put(self.resume_text, generating_model, model_config, questions)
+
+        self.planned_questions = parse_numbered_questions(questions)
+        return questions
+
+    def ingest_resume(self, pdf_bytes=None, resume_text=None, on_text=None, on_wait=None):
+        """Load the resume (PDF bytes or text) and open the interview; returns the opening message"""
+        if resume_text is None:
+            extraction = get_pdf_ingestor().extract(pdf_bytes)
+            resume_text = extraction['text']
+            if extraction['pages_extracted'] < extraction['page_count']:
+                self.resume_notice = (f"Only the first {extraction['pages_extracted']} of "
+                                      f"{extraction['page_count']} resume pages were read.")
+        self.resume_text = resume_text
+        self.resume_index = ResumeIndex(resume_text)
+        self.analytics.resume_chunks = [chunk['text'] for chunk in self.resume_index.chunks]
+        self.recorder.set_resume_text(resume_text)
+
+        questions = self.generate_questions(on_text, on_wait)
+        opening_message = f"Based on your resume, let's start with these questions:\n\n{questions}"
+        self._add_message('assistant', opening_message)
+        self._get_conversation().add_turn('assistant', opening_message)
+        self._question_ready()
+        self._start_speculation(opening_message)
+        return opening_message
+
+    def _question_ready(self):
+        self.question_ready_at = time.time()
+        self.question_shown_at = None
+
+    def mark_question_shown(self, shown_at=None):
+        """Front ends call this once the latest question is on screen; response time counts from here"""
+        if self.question_shown_at is None and self.question_ready_at is not None:
+            self.question_shown_at = shown_at or time.time()
+
+    def last_question(self):
+        return next((message['content'] for message in reversed(self.transcript)
+                     if message['role'] == 'assistant'), "")
+
+    def _resume_context(self, query):
+        if self.resume_index is None:
+            return self.resume_text
+        top_k, token_budget = self.model_manager.get_resume_budget(self.model_name)
+        return self.resume_index.build_context(query, top_k, token_budget)
+
+    def _turn_context(self, last_question, answer):
+        """Resume context (and planned follow-ups) for a turn, reusing speculative work when available"""
+        prefetch = self.speculator.take()
+
+        if prefetch is not None and prefetch.question_scores is not None and self.resume_index is not None:
+            # BM25 scores add up over query terms, so only the answer still needs scoring
+            top_k, token_budget = self.model_manager.get_resume_budget(self.model_name)
+            scores = prefetch.question_scores + self.resume_index.score(answer)
+            resume_context = self.resume_index.format_chunks(self.resume_index.select(scores, top_k, token_budget))
+        else:
+            resume_context = self._resume_context(f"{last_question}\n{answer}")
+
+        turn_context = f"Relevant resume sections:\n{resume_context}" if resume_context else ""
+        if prefetch is not None and prefetch.follow_up_candidates:
+            follow_ups = "\n".join(f"- {question}" for question in prefetch.follow_up_candidates)
+            turn_context += f"\n\nPlanned follow-up questions you may use next:\n{follow_ups}"
+        return turn_context
+
+    def _start_speculation(self, last_question):
+        """Precompute answer-independent work for the next turn while the candidate types"""
+        if not self.speculative_prefetch:
+            return
+        # Everything the interviewer has said after the opening question list
+        asked_text = "\n".join(message['content'] for message in self.transcript[1:]
+                               if message['role'] == 'assistant')
+        # Warm the model the answer will be routed to; the answer's length is not known yet
+        chat_model = self.router.route('chat', self.model_name).model
+        self.speculator.start(chat_model, self.conversation, self.resume_index,
+                              last_question, self.planned_questions, asked_text)
+
+    def last_llm_stats(self):
+        """Timing stats of the most recent streamed turn, if any"""
+        if self.stream and self.llm_stats:
+            return self.llm_stats[-1]
+        return None
+
+    def submit_answer(self, answer, on_text=None, on_wait=None):
+        """Record the candidate's answer and return the interviewer's reply.
+
+        Raises SchedulerBusyError when the model's queue is full; nothing
+        is recorded then, and the answer can be sent again.
+        """
+        # Falls back to when the question was generated if no front end reported rendering it
+        shown_at = self.question_shown_at or self.question_ready_at
+        response_time = time.time() - shown_at if shown_at else 0
+        answered_at = datetime.now().isoformat()
+        last_question = self.last_question()
+
+        conversation = self._get_conversation()
+        reply = self._cached_reply(last_question, answer, on_text)
+        if reply is not None:
+            # Nothing to prompt, so the prefetched context for this turn is not needed
+            self.speculator.cancel()
+        else:
+            with span('prompt.resume_context'):
+                turn_context = self._turn_context(last_question, answer)
+            with span('prompt.build'):
+                messages = conversation.build_messages(answer, turn_context)
+            reply = self._run_llm(messages, PRIORITY_CHAT, on_text, on_wait, answer=answer)
+            if self.response_cache is not None and reply:
+                self.response_cache.put(self.model_name, self.model_manager.get_model_config(self.model_name),
+                                        last_question, answer, reply, self._response_cache_scope())
+        # Recorded only once answered, so a retry after SchedulerBusyError does not log the answer twice
+        answer_index = len(self.transcript)
+        self._add_message('user', answer, timestamp=answered_at)
+        conversation.add_turn('user', answer)
+        conversation.add_turn('assistant', reply)
+
+        self._add_message('assistant', reply, metadata=self.last_llm_stats())
+        turn = self.analytics.analyze_response(answer, last_question, response_time)
+        self.recorder.record_turn(answer_index, turn)
+
+        self._question_ready()
+        self._start_speculation(reply)
+        return reply
+
+    def release(self):
+        """Stop background work and close this process's handle on the log; the interview can still be resumed"""
+        self.speculator.cancel()
+        if self.recorder.current_session is not None:
+            self.recorder.state.close(self.recorder.current_session)
+
+    def report(self, include_samples=False):
+        """Analytics report for the interview so far"""
+        with span('analytics.report'):
+            return self.analytics.generate_report(include_samples)
+
+    def end(self):
+        """Finish the interview, save the recording and return (session_id, report)"""
+        self.speculator.cancel()
+        # Per-turn samples go into the recording so the analytics warehouse gets every turn
+        report = self.report(include_samples=True)
+        self.recorder.add_analytics(report)
+        session_id = self.recorder.current_session
+        self.recorder.end_session()
+        self.ended = True
+        return session_id, report
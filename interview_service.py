@@ -0,0 +1,384 @@
+"""Async HTTP/WebSocket service around the headless interview engine.
+
+Runs interviews without a browser so they can be load-tested, scripted or
+served to another front end. Every worker process shares the process-wide
+scheduler, caches and config. Interview state is kept in the session state
+backend (INTERVIEW_STATE_BACKEND), so a request can be served by any worker
+that shares it and INTERVIEW_SESSION_SECRET, which signs session tokens:
+
+    python interview_service.py --port 8080
+
+Endpoints:
+
+    POST   /sessions                    {"username", "password", "model"?, "stream"?, "target_role"?}
+    POST   /sessions/{id}/resume        PDF bytes, or {"resume_text": ...}
+    POST   /sessions/{id}/answers       {"answer": ...}
+    GET    /sessions/{id}/report
+    DELETE /sessions/{id}               ends the interview and saves the recording
+    GET    /sessions/{id}/ws            WebSocket: send {"answer": ...}, receive
+                                        {"type": "queued"|"token"|"reply"|"error", ...}
+    GET    /health
+    GET    /metrics                     Prometheus text, or JSON with ?format=json
+
+Malformed or incomplete request bodies get 400 (an error event with
+"status": 400 on the WebSocket).
+
+Engine calls block on Ollama, so they run in a thread pool; streamed
+tokens are handed back to the event loop for the WebSocket. Requests on
+one session are served one at a time. Sessions idle for --idle-timeout
+seconds are dropped from memory (their log stays, so they can be resumed),
+and logs nobody has touched for an hour are finalized into recordings.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+
+from inference_scheduler import SchedulerBusyError
+from interview_engine import InterviewSession
+from metrics import REGISTRY
+from pdf_ingest import PdfIngestionError
+from session_recorder import InterviewRecorder
+from shared_resources import get_scheduler, get_state_backend, get_user_store, start_metrics_export
+
+try:
+    from aiohttp import WSMsgType, web
+except ImportError:
+    # Only needed when serving; the registry works without it
+    WSMsgType = web = None
+
+DEFAULT_IDLE_TIMEOUT = 1800
+EVICTION_INTERVAL = 60
+
+
+class SessionRegistry:
+    """Live interviews, keyed by a signed token naming the session.
+
+    Sessions created or resumed here are kept in memory until they have
+    been idle for idle_timeout seconds; a token for a session this process
+    does not have, or one another worker has advanced since, is resumed
+    from the shared session log.
+    """
+
+    def __init__(self, base_dir="interview_sessions", secret=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.base_dir = base_dir
+        # Without a shared secret, tokens are only valid in this process
+        self.secret = (secret or os.environ.get('INTERVIEW_SESSION_SECRET') or secrets.token_hex(32)).encode('utf-8')
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.last_used = {}
+        # One asyncio.Lock per session, so a session serves one request at a time
+        self.session_locks = {}
+        self.lock = threading.Lock()
+        # Recorder that finalizes abandoned logs, created on the first eviction pass
+        self.recovery = None
+
+    def _signature(self, session_id):
+        return hmac.new(self.secret, session_id.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+    def _session_id(self, token):
+        """The session a token names, or None if its signature is wrong"""
+        session_id, _, signature = token.rpartition('.')
+        if session_id and hmac.compare_digest(signature, self._signature(session_id)):
+            return session_id
+        return None
+
+    def _keep(self, session_id, session):
+        with self.lock:
+            previous = self.sessions.get(session_id)
+            self.sessions[session_id] = session
+            self.last_used[session_id] = time.monotonic()
+        if previous is not None and previous is not session:
+            previous.release()
+
+    def _drop(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            self.last_used.pop(session_id, None)
+        return session
+
+    def create(self, username, model_name=None, stream=True, speculative_prefetch=False, target_role=None):
+        session = InterviewSession(username, model_name, stream=stream, speculative_prefetch=speculative_prefetch,
+                                   base_dir=self.base_dir, target_role=target_role)
+        session_id = session.recorder.current_session
+        token = f"{session_id}.{self._signature(session_id)}"
+        self._keep(session_id, session)
+        return token, session
+
+    def session_lock(self, token):
+        """The asyncio.Lock serializing requests on a token's session, or None for an invalid token"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        with self.lock:
+            return self.session_locks.setdefault(session_id, asyncio.Lock())
+
+    def get(self, token):
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is not None and not session.is_stale():
+            with self.lock:
+                self.last_used[session_id] = time.monotonic()
+            return session
+        try:
+            session = InterviewSession.resume(session_id, base_dir=self.base_dir)
+        except ValueError:
+            # Finished, or finalized after being abandoned
+            stale = self._drop(session_id)
+            if stale is not None:
+                stale.release()
+            return None
+        self._keep(session_id, session)
+        return session
+
+    def pop(self, token):
+        session = self.get(token)
+        if session is not None:
+            self._drop(session.recorder.current_session)
+        return session
+
+    def evict_idle(self):
+        """Drop sessions idle for idle_timeout seconds from memory and finalize abandoned logs.
+
+        An evicted session's log is kept, so a later request (here or on
+        another worker) resumes it; logs untouched for an hour are
+        finalized into recordings. Returns the evicted session ids.
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        with self.lock:
+            idle = [session_id for session_id, used in self.last_used.items()
+                    if used < cutoff and not (session_id in self.session_locks
+                                              and self.session_locks[session_id].locked())]
+        for session_id in idle:
+            session = self._drop(session_id)
+            if session is not None:
+                session.release()
+        with self.lock:
+            for session_id, lock in list(self.session_locks.items()):
+                if session_id not in self.sessions and not lock.locked():
+                    del self.session_locks[session_id]
+
+        if self.recovery is None:
+            self.recovery = InterviewRecorder(self.base_dir, state_backend=get_state_backend(self.base_dir))
+        self.recovery.recover_orphaned_sessions()
+        return idle
+
+
+# metrics.REGISTRY is the metrics registry, hence the suffix
+REGISTRY_KEY = web.AppKey('registry', SessionRegistry) if web is not None else None
+
+
+def create_app(base_dir="interview_sessions", idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Build the aiohttp application; aiohttp is only needed when serving"""
+    if web is None:
+        raise ImportError("The interview service needs aiohttp: pip install aiohttp")
+
+    registry = SessionRegistry(base_dir, idle_timeout=idle_timeout)
+
+    def busy_response(e):
+        return web.json_response({'error': str(e)}, status=503, headers={'Retry-After': '2'})
+
+    async def run_blocking(func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+
+    async def json_body(request, *required):
+        """The request's JSON object; 400 if it is malformed or a required field is not a string"""
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Malformed JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Expected a JSON object")
+        for field in required:
+            if not isinstance(body.get(field), str):
+                raise web.HTTPBadRequest(text=f"'{field}' must be a string")
+        return body
+
+    @contextlib.asynccontextmanager
+    async def locked_session(request):
+        """The token's session, held for this request; 404 if unknown or finished"""
+        token = request.match_info['token']
+        lock = registry.session_lock(token)
+        if lock is None:
+            raise web.HTTPNotFound(text="Unknown or finished session")
+        async with lock:
+            # May resume the session from the shared log
+            session = await run_blocking(registry.get, token)
+            if session is None:
+                raise web.HTTPNotFound(text="Unknown or finished session")
+            yield session
+
+    async def evict_idle_sessions(app):
+        async def evict_periodically():
+            while True:
+                await asyncio.sleep(EVICTION_INTERVAL)
+                await run_blocking(registry.evict_idle)
+
+        task = asyncio.create_task(evict_periodically())
+        yield
+        task.cancel()
+
+    async def health(request):
+        return web.json_response({'status': 'ok', 'sessions': len(registry.sessions),
+                                  'scheduler': get_scheduler().stats()})
+
+    async def metrics(request):
+        if request.query.get('format') == 'json':
+            snapshot = REGISTRY.snapshot()
+            snapshot['scheduler'] = get_scheduler().stats()
+            return web.json_response(snapshot)
+        return web.Response(text=REGISTRY.to_prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def create_session(request):
+        body = await json_body(request, 'username', 'password')
+        if not await run_blocking(get_user_store().authenticate, body['username'], body['password']):
+            raise web.HTTPUnauthorized(text="Invalid credentials")
+        token, session = await run_blocking(
+            registry.create, body['username'], body.get('model'), body.get('stream', True),
+            body.get('speculative_prefetch', False), body.get('target_role')
+        )
+        return web.json_response({'session': token, 'model': session.model_name}, status=201)
+
+    async def ingest_resume(request):
+        if request.content_type == 'application/json':
+            kwargs = {'resume_text': (await json_body(request, 'resume_text'))['resume_text']}
+        else:
+            kwargs = {'pdf_bytes': await request.read()}
+        async with locked_session(request) as session:
+            try:
+                opening_message = await run_blocking(session.ingest_resume, **kwargs)
+            except SchedulerBusyError as e:
+                return busy_response(e)
+            except PdfIngestionError as e:
+                raise web.HTTPBadRequest(text=str(e))
+            # The client renders the questions as soon as this response arrives
+            session.mark_question_shown()
+            return web.json_response({'opening_message': opening_message,
+                                      'planned_questions': session.planned_questions,
+                                      'resume_notice': session.resume_notice})
+
+    async def submit_answer(request):
+        answer = (await json_body(request, 'answer'))['answer'].strip()
+        if not answer:
+            raise web.HTTPBadRequest(text="Empty answer")
+        async with locked_session(request) as session:
+            try:
+                reply = await run_blocking(session.submit_answer, answer)
+            except SchedulerBusyError as e:
+                return busy_response(e)
+            session.mark_question_shown()
+            return web.json_response({'reply': reply, 'stats': session.last_llm_stats()})
+
+    async def report(request):
+        async with locked_session(request) as session:
+            return web.json_response(await run_blocking(session.report))
+
+    async def end_session(request):
+        lock = registry.session_lock(request.match_info['token'])
+        if lock is None:
+            raise web.HTTPNotFound(text="Unknown or finished session")
+        async with lock:
+            session = await run_blocking(registry.pop, request.match_info['token'])
+            if session is None:
+                raise web.HTTPNotFound(text="Unknown or finished session")
+            session_id, final_report = await run_blocking(session.end)
+        return web.json_response({'session_id': session_id, 'report': final_report})
+
+    async def websocket(request):
+        # Unknown tokens get a 404 before the upgrade
+        async with locked_session(request):
+            pass
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        loop = asyncio.get_running_loop()
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            try:
+                answer = message.json().get('answer')
+            except (ValueError, AttributeError):
+                answer = None
+            if not isinstance(answer, str):
+                await ws.send_json({'type': 'error', 'error': "Expected {\"answer\": \"...\"}", 'status': 400})
+                continue
+            answer = answer.strip()
+            if not answer:
+                await ws.send_json({'type': 'error', 'error': 'Empty answer', 'status': 400})
+                continue
+
+            events = asyncio.Queue()
+            sent = [0]
+
+            def on_text(text):
+                # Only forward the new part of the reply
+                delta, sent[0] = text[sent[0]:], len(text)
+                loop.call_soon_threadsafe(events.put_nowait, {'type': 'token', 'text': delta})
+
+            def on_wait(ahead):
+                loop.call_soon_threadsafe(events.put_nowait, {'type': 'queued', 'ahead': ahead})
+
+            def run(session):
+                try:
+                    reply = session.submit_answer(answer, on_text=on_text, on_wait=on_wait)
+                    event = {'type': 'reply', 'reply': reply, 'stats': session.last_llm_stats()}
+                except Exception as e:
+                    event = {'type': 'error', 'error': str(e), 'busy': isinstance(e, SchedulerBusyError)}
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+            try:
+                async with locked_session(request) as session:
+                    loop.run_in_executor(None, run, session)
+                    while True:
+                        event = await events.get()
+                        await ws.send_json(event)
+                        if event['type'] == 'reply':
+                            session.mark_question_shown()
+                        if event['type'] in ('reply', 'error'):
+                            break
+            except web.HTTPNotFound:
+                await ws.send_json({'type': 'error', 'error': "Unknown or finished session", 'status': 404})
+                break
+        return ws
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app[REGISTRY_KEY] = registry
+    app.cleanup_ctx.append(evict_idle_sessions)
+    app.add_routes([
+        web.get('/health', health),
+        web.get('/metrics', metrics),
+        web.post('/sessions', create_session),
+        web.post('/sessions/{token}/resume', ingest_resume),
+        web.post('/sessions/{token}/answers', submit_answer),
+        web.get('/sessions/{token}/report', report),
+        web.delete('/sessions/{token}', end_session),
+        web.get('/sessions/{token}/ws', websocket),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interview engine HTTP/WebSocket service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--base-dir', default='interview_sessions')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Seconds before an idle session is dropped from memory")
+    args = parser.parse_args()
+
+    from aiohttp import web
+    start_metrics_export()
+    web.run_app(create_app(args.base_dir, args.idle_timeout), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*[+#]*")
+
+STOP_WORDS = frozenset(['the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
+
+DEFAULT_TECHNICAL_KEYWORDS = {
+    'programming': ['code', 'algorithm', 'function', 'class', 'method'],
+    'database': ['sql', 'query', 'database', 'schema', 'table'],
+    'web': ['html', 'css', 'javascript', 'api', 'http']
+}
+
+VOWELS = set('aeiou')
+
+
+def _has_vowel(word):
+    return any(ch in VOWELS for ch in word)
+
+
+def stem(token):
+    """Light Porter-style suffix stripping (steps 1a-1c) so word forms match"""
+    if len(token) <= 3 or not token.isalpha():
+        return token
+
+    # Step 1a: plurals
+    if token.endswith('sses'):
+        token = token[:-2]
+    elif token.endswith('ies'):
+        token = token[:-2]
+    elif token.endswith('s') and not token.endswith('ss') and not token.endswith('us'):
+        token = token[:-1]
+
+    # Step 1b: past tense and gerunds
+    for suffix in ('ing', 'ed'):
+        if token.endswith(suffix) and _has_vowel(token[:-len(suffix)]) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            if token.endswith(('at', 'bl', 'iz')):
+                token += 'e'
+            elif len(token) > 2 and token[-1] == token[-2] and token[-1] not in 'lsz':
+                token = token[:-1]
+            elif (len(token) == 3 and token[0] not in VOWELS and token[1] in VOWELS
+                  and token[2] not in VOWELS and token[2] not in 'wxy'):
+                token += 'e'
+            break
+
+    # Step 1c: terminal y
+    if token.endswith('y') and _has_vowel(token[:-1]):
+        token = token[:-1] + 'i'
+
+    return token
+
+
+def tokenize(text, use_stemming=True):
+    """Lowercase text and split it into word tokens in a single pass"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if use_stemming:
+        return [stem(token) for token in tokens]
+    return tokens
+
+
+class KeywordMatcher:
+    """Precompiled whole-word matcher for a fixed set of keywords and phrases.
+
+    Keywords are normalized once at construction. Matching tokenizes the
+    text once and probes a set of its n-grams, so cost is linear in the
+    text length regardless of how many keywords there are.
+    """
+
+    def __init__(self, keywords, use_stemming=True):
+        self.use_stemming = use_stemming
+        self.patterns = {}
+        for keyword in keywords:
+            pattern = tuple(tokenize(keyword, use_stemming))
+            if pattern:
+                self.patterns.setdefault(pattern, []).append(keyword)
+        self.max_ngram = max((len(pattern) for pattern in self.patterns), default=0)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _ngrams(self, tokens):
+        grams = set()
+        for n in range(1, self.max_ngram + 1):
+            for i in range(len(tokens) - n + 1):
+                grams.add(tuple(tokens[i:i + n]))
+        return grams
+
+    def find(self, text=None, tokens=None):
+        """Return the set of distinct keywords present in text (or pre-tokenized tokens)"""
+        if tokens is None:
+            tokens = tokenize(text, self.use_stemming)
+        grams = self._ngrams(tokens)
+        found = set()
+        for pattern in self.patterns.keys() & grams:
+            found.update(self.patterns[pattern])
+        return found
+
+    def match_fraction(self, text=None, tokens=None):
+        """Fraction of distinct keyword patterns present in text"""
+        if not self.patterns:
+            return 0
+        if tokens is None:
+            tokens = tokenize(text, self.use_stemming)
+        return len(self.patterns.keys() & self._ngrams(tokens)) / len(self.patterns)
+
+
+class TaxonomyMatcher:
+    """Matcher over a {category: [keywords]} taxonomy built once and reused"""
+
+    def __init__(self, taxonomy, use_stemming=True):
+        self.taxonomy = taxonomy
+        self.matcher = KeywordMatcher(
+            [keyword for keywords in taxonomy.values() for keyword in keywords],
+            use_stemming
+        )
+
+    def category_matches(self, text=None, tokens=None):
+        """Count matched keywords per category"""
+        found = self.matcher.find(text, tokens)
+        return {category: sum(1 for keyword in keywords if keyword in found)
+                for category, keywords in self.taxonomy.items()}
+
+
+def question_keywords(question):
+    """Distinct non-stop-word tokens of a question, in order of appearance"""
+    return list(dict.fromkeys(
+        token for token in TOKEN_PATTERN.findall(question.lower()) if token not in STOP_WORDS
+    ))
+
+
+def load_taxonomy(path):
+    """Load a {category: [keywords]} taxonomy from a JSON file"""
+    with open(path, 'r') as f:
+        taxonomy = json.load(f)
+    if not all(isinstance(keywords, list) for keywords in taxonomy.values()):
+        raise ValueError(f"Invalid keyword taxonomy in {path}")
+    return taxonomy
\ No newline at end of file
@@ -0,0 +1,160 @@
+import time
+
+from metrics import observe, span
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class ThinkTagFilter:
+    """Incrementally drop <think>...</think> spans from a stream of text chunks.
+
+    Tags may be split across chunks, so any trailing text that could be the
+    start of a tag is held back until the next chunk arrives. Text after a
+    <think> is held until its </think>; if the stream ends first, flush()
+    releases it unchanged, as the non-streamed cleanup always did.
+    """
+
+    def __init__(self):
+        self.in_think = False
+        self.pending = ""
+        self.held = []
+
+    def feed(self, chunk):
+        """Consume a chunk and return the visible text it releases"""
+        text = self.pending + chunk
+        self.pending = ""
+        visible = []
+
+        while text:
+            tag = THINK_CLOSE if self.in_think else THINK_OPEN
+            idx = text.find(tag)
+            if idx != -1:
+                if not self.in_think:
+                    visible.append(text[:idx])
+                self.held = []
+                text = text[idx + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            # Hold back a suffix that may be the beginning of the tag
+            keep = self._partial_tag_length(text, tag)
+            (self.held if self.in_think else visible).append(text[:len(text) - keep])
+            self.pending = text[len(text) - keep:] if keep else ""
+            break
+
+        return "".join(visible)
+
+    def flush(self):
+        """Release any held-back text once the stream has ended"""
+        text = self.pending
+        if self.in_think:
+            # Never closed: not a thinking span after all
+            text = THINK_OPEN + "".join(self.held) + text
+        self.pending = ""
+        self.held = []
+        self.in_think = False
+        return text
+
+    @staticmethod
+    def _partial_tag_length(text, tag):
+        """Length of the longest suffix of text that is a proper prefix of tag"""
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+
+def strip_think_tags(text):
+    """Remove <think> spans from a complete (non-streamed) reply"""
+    with span('llm.clean'):
+        think_filter = ThinkTagFilter()
+        return (think_filter.feed(text) + think_filter.flush()).strip()
+
+
+class StreamStats:
+    """Timing statistics for a single streamed LLM turn"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.first_visible_at = None
+        self.finished_at = None
+        self.chunk_count = 0
+        self.eval_count = None
+        self.eval_duration = None
+
+    def on_chunk(self, visible):
+        now = time.perf_counter()
+        self.chunk_count += 1
+        if self.first_token_at is None:
+            self.first_token_at = now
+        if visible and self.first_visible_at is None:
+            self.first_visible_at = now
+
+    def on_done(self, chunk):
+        self.finished_at = time.perf_counter()
+        # Ollama reports exact token counts and durations (ns) on the final chunk
+        self.eval_count = chunk.get('eval_count')
+        self.eval_duration = chunk.get('eval_duration')
+
+    def to_dict(self):
+        """Summarize the turn: time-to-first-token and tokens/sec"""
+        finished_at = self.finished_at or time.perf_counter()
+        total = finished_at - self.started_at
+
+        ttft = None
+        if self.first_token_at is not None:
+            ttft = self.first_token_at - self.started_at
+        first_visible = None
+        if self.first_visible_at is not None:
+            first_visible = self.first_visible_at - self.started_at
+
+        if self.eval_count and self.eval_duration:
+            tokens = self.eval_count
+            tokens_per_sec = self.eval_count / (self.eval_duration / 1e9)
+        else:
+            tokens = self.chunk_count
+            generation_time = finished_at - (self.first_token_at or self.started_at)
+            tokens_per_sec = tokens / generation_time if generation_time > 0 else 0.0
+
+        return {
+            'time_to_first_token': ttft,
+            'time_to_first_visible_token': first_visible,
+            'total_time': total,
+            'tokens': tokens,
+            'tokens_per_sec': tokens_per_sec
+        }
+
+
+def stream_chat(client, model, messages, on_text=None, **kwargs):
+    """Stream a chat completion, hiding <think> spans as they arrive.
+
+    on_text is called with the visible text accumulated so far whenever it
+    grows. Returns (visible_text, stats_dict).
+    """
+    think_filter = ThinkTagFilter()
+    stats = StreamStats()
+    parts = []
+    filter_time = 0.0
+
+    for chunk in client.chat(model=model, messages=messages, stream=True, **kwargs):
+        filter_started = time.perf_counter()
+        visible = think_filter.feed(chunk['message']['content'])
+        filter_time += time.perf_counter() - filter_started
+        stats.on_chunk(visible)
+        if visible:
+            parts.append(visible)
+            if on_text:
+                on_text("".join(parts))
+        if chunk.get('done'):
+            stats.on_done(chunk)
+
+    tail = think_filter.flush()
+    if tail:
+        parts.append(tail)
+        if on_text:
+            on_text("".join(parts))
+
+    observe('llm.clean', filter_time)
+    return "".join(parts).strip(), stats.to_dict()
\ No newline at end of file
@@ -1,6 +1,45 @@
 import json
 import os
 
+from keyword_matcher import DEFAULT_TECHNICAL_KEYWORDS
+
+DEFAULT_RESUME_TOP_K = 3
+DEFAULT_RESUME_TOKEN_BUDGET = 600
+DEFAULT_RECENT_TURNS = 6
+DEFAULT_CONTEXT_TOKEN_CEILING = 3000
+
+# Documented in model_router.py, which applies it
+DEFAULT_ROUTING_POLICY = {
+    'enabled': False,
+    'tasks': {
+        'question_generation': {'model': 'llama2:13b'},
+        'short_answer': {'model': 'mistral:7b', 'max_answer_words': 12},
+        'summary': {'model': 'mistral:7b'},
+        'chat': {'model': None}
+    },
+    'fallbacks': {
+        'llama2:13b': ['deepseek-r1:7b', 'mistral:7b'],
+        'deepseek-r1:7b': ['mistral:7b'],
+        'mistral:7b': ['deepseek-r1:7b']
+    },
+    'slo_time_to_first_token': 10.0,
+    'max_queue_depth': 4,
+    'race': True
+}
+
+# Documented in response_cache.py, which applies it
+DEFAULT_RESPONSE_CACHE_POLICY = {
+    'enabled': True,
+    'scope': 'session',
+    'near_duplicates': False,
+    'max_temperature': 0.75,
+    'max_distance': 7,
+    'min_tokens': 4,
+    'memory_entries': 1024,
+    'disk_entries': 20000,
+    'ttl_hours': 168
+}
+
 class ModelManager:
     def __init__(self, config_file="model_config.json"):
         self.config_file = config_file
@@ -12,7 +51,11 @@ class ModelManager:
                     'system_prompt': """You are an AI interviewer. Assess candidate responses professionally 
                     and provide constructive feedback. Focus on both technical accuracy and communication skills.""",
                     'temperature': 0.7,
-                    'max_tokens': 1000
+                    'max_tokens': 1000,
+                    'resume_top_k': DEFAULT_RESUME_TOP_K,
+                    'resume_token_budget': DEFAULT_RESUME_TOKEN_BUDGET,
+                    'recent_turns': DEFAULT_RECENT_TURNS,
+                    'context_token_ceiling': DEFAULT_CONTEXT_TOKEN_CEILING
                 },
                 'llama2:13b': {
                     'name': 'Llama 2 13B',
@@ -20,7 +63,11 @@ class ModelManager:
                     'system_prompt': """You are an expert technical interviewer. Focus on deep technical knowledge,
                     problem-solving ability, and coding skills. Provide detailed feedback on technical accuracy.""",
                     'temperature': 0.8,
-                    'max_tokens': 1500
+                    'max_tokens': 1500,
+                    'resume_top_k': 4,
+                    'resume_token_budget': 900,
+                    'recent_turns': 8,
+                    'context_token_ceiling': 3500
                 },
                 'mistral:7b': {
                     'name': 'Mistral 7B',
@@ -28,11 +75,20 @@ class ModelManager:
                     'system_prompt': """You are a behavioral interview specialist. Focus on assessing soft skills,
                     communication ability, and cultural fit. Provide nuanced feedback on behavioral aspects.""",
                     'temperature': 0.6,
-                    'max_tokens': 1000
+                    'max_tokens': 1000,
+                    'resume_top_k': DEFAULT_RESUME_TOP_K,
+                    'resume_token_budget': DEFAULT_RESUME_TOKEN_BUDGET,
+                    'recent_turns': DEFAULT_RECENT_TURNS,
+                    'context_token_ceiling': DEFAULT_CONTEXT_TOKEN_CEILING
                 }
             },
-            'custom_prompts': {}
+            'custom_prompts': {},
+            'keyword_taxonomy': DEFAULT_TECHNICAL_KEYWORDS,
+            'routing': DEFAULT_ROUTING_POLICY,
+            'response_cache': DEFAULT_RESPONSE_CACHE_POLICY
         }
+        self.update_listeners = []
+        self.config_mtime = None
         self.load_config()
     
     def load_config(self):
@@ -40,19 +96,55 @@ class ModelManager:
         if os.path.exists(self.config_file):
             with open(self.config_file, 'r') as f:
                 self.config = json.load(f)
+            self.config_mtime = os.path.getmtime(self.config_file)
         else:
             self.config = self.default_config
             self.save_config()
     
     def save_config(self):
         """Save current configuration to file"""
-        with open(self.config_file, 'w') as f:
+        # Write atomically so other processes never read a half-written file
+        tmp_file = f"{self.config_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
             json.dump(self.config, f, indent=2)
+        os.replace(tmp_file, self.config_file)
+        self.config_mtime = os.path.getmtime(self.config_file)
+    
+    def reload_if_changed(self):
+        """Re-read the config file if another process changed it; returns True on reload"""
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except FileNotFoundError:
+            return False
+        if mtime == self.config_mtime:
+            return False
+        
+        old_models = self.config['models']
+        self.load_config()
+        for model_name, model_config in self.config['models'].items():
+            old_config = old_models.get(model_name, {})
+            changes = {key: value for key, value in model_config.items() if old_config.get(key) != value}
+            if changes:
+                for callback in self.update_listeners:
+                    callback(model_name, changes)
+        return True
     
     def get_model_config(self, model_name):
         """Get configuration for a specific model"""
         return self.config['models'].get(model_name)
     
+    def get_resume_budget(self, model_name):
+        """Get (top_k, token_budget) for resume context sent to a model per turn"""
+        model_config = self.get_model_config(model_name) or {}
+        return (model_config.get('resume_top_k', DEFAULT_RESUME_TOP_K),
+                model_config.get('resume_token_budget', DEFAULT_RESUME_TOKEN_BUDGET))
+    
+    def get_context_limits(self, model_name):
+        """Get (recent_turns, token_ceiling) for conversation memory sent to a model"""
+        model_config = self.get_model_config(model_name) or {}
+        return (model_config.get('recent_turns', DEFAULT_RECENT_TURNS),
+                model_config.get('context_token_ceiling', DEFAULT_CONTEXT_TOKEN_CEILING))
+    
     def list_models(self):
         """List all available models"""
         return [(model_id, config['name'], config['description']) 
@@ -77,11 +169,47 @@ class ModelManager:
             del self.config['custom_prompts'][name]
             self.save_config()
     
+    def add_update_listener(self, callback):
+        """Register callback(model_name, changes) to run after a model config update"""
+        self.update_listeners.append(callback)
+    
+    def get_keyword_taxonomy(self):
+        """Get the technical keyword taxonomy used for scoring"""
+        return self.config.get('keyword_taxonomy', self.default_config['keyword_taxonomy'])
+    
+    def get_routing_policy(self):
+        """Get the policy deciding which model serves each kind of call"""
+        return self.config.get('routing', self.default_config['routing'])
+    
+    def update_routing_policy(self, updates):
+        """Change top-level routing policy settings, e.g. {'enabled': False}"""
+        policy = dict(self.get_routing_policy())
+        policy.update(updates)
+        self.config['routing'] = policy
+        self.save_config()
+    
+    def get_response_cache_policy(self):
+        """Get the policy for reusing replies to repeated candidate inputs"""
+        return self.config.get('response_cache', self.default_config['response_cache'])
+    
+    def update_keyword_taxonomy(self, category, keywords):
+        """Add or replace the keywords of a taxonomy category"""
+        taxonomy = dict(self.get_keyword_taxonomy())
+        taxonomy[category] = list(keywords)
+        self.config['keyword_taxonomy'] = taxonomy
+        self.save_config()
+    
     def update_model_config(self, model_name, updates):
         """Update configuration for a specific model"""
         if model_name in self.config['models']:
-            self.config['models'][model_name].update(updates)
+            model_config = self.config['models'][model_name]
+            changes = {key: value for key, value in updates.items()
+                       if model_config.get(key) != value}
+            model_config.update(updates)
             self.save_config()
+            if changes:
+                for callback in self.update_listeners:
+                    callback(model_name, changes)
     
     def get_formatted_prompt(self, model_name, custom_prompt_name=None, **kwargs):
         """Get formatted prompt for a model, optionally using a custom template"""
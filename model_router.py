@@ -0,0 +1,212 @@
+"""Per-call model routing with latency-SLO fallback.
+
+The model the user picks sets the interviewer persona (system prompt and
+context limits). Which model actually runs a call is decided here, from
+the "routing" policy in model_config.json:
+
+    "routing": {
+        "enabled": true,
+        "tasks": {
+            "question_generation": {"model": "llama2:13b"},
+            "short_answer": {"model": "mistral:7b", "max_answer_words": 12},
+            "summary": {"model": "mistral:7b"},
+            "chat": {"model": null}
+        },
+        "fallbacks": {"llama2:13b": ["deepseek-r1:7b", "mistral:7b"]},
+        "slo_time_to_first_token": 10.0,
+        "max_queue_depth": 4,
+        "race": true
+    }
+
+Routing is off by default, so every call runs on the selected model:
+sending tasks to other models swaps models in and out of Ollama's memory,
+which costs more than it saves unless all the routed models stay loaded.
+A task whose model is null runs on the selected model. When the routed
+model's queue is deeper than max_queue_depth (or full) the next fallback
+is used up front; when it has not produced a first token within the SLO
+and race is on, the first fallback is queued as well and whichever starts
+streaming first wins, the other being cancelled. The scheduler never runs
+two models at once, so in practice the race is won by a model that is
+already loaded instead of waiting for a swap. Summaries of older turns
+use the same fallbacks.
+"""
+import queue
+import threading
+import time
+
+from inference_scheduler import PRIORITY_CHAT, SchedulerBusyError, ScheduledClient
+from metrics import inc
+
+
+class RoutingDecision:
+    """Where one call goes: the routed model, then alternates in order"""
+
+    def __init__(self, task, requested, model, fallbacks, reason, slo=None, race=False, max_queue_depth=None):
+        self.task = task
+        self.requested = requested
+        self.model = model
+        self.fallbacks = [m for m in fallbacks if m != model]
+        self.reason = reason
+        self.slo = slo
+        self.race = race
+        self.max_queue_depth = max_queue_depth
+
+
+class ModelRouter:
+    """Applies the routing policy of a ModelManager's config"""
+
+    def __init__(self, model_manager, scheduler):
+        self.model_manager = model_manager
+        self.scheduler = scheduler
+
+    def route(self, task, selected_model, answer=None):
+        """Decide the model for a task ('chat', 'question_generation' or 'summary')"""
+        policy = self.model_manager.get_routing_policy()
+        if not policy.get('enabled'):
+            return RoutingDecision(task, selected_model, selected_model, [], 'routing disabled')
+
+        tasks = policy.get('tasks', {})
+        route_name = task
+        if task == 'chat' and answer is not None:
+            short = tasks.get('short_answer', {})
+            if short.get('model') and len(answer.split()) <= short.get('max_answer_words', 0):
+                route_name = 'short_answer'
+
+        model = tasks.get(route_name, {}).get('model')
+        available = {model_id for model_id, _, _ in self.model_manager.list_models()}
+        if not model or model not in available:
+            model, reason = selected_model, 'selected model'
+        else:
+            reason = route_name
+        fallbacks = [m for m in policy.get('fallbacks', {}).get(model, []) if m in available]
+        if model != selected_model and selected_model not in fallbacks:
+            # The user's choice is always a last resort
+            fallbacks.append(selected_model)
+        return RoutingDecision(task, selected_model, model, fallbacks, reason,
+                               policy.get('slo_time_to_first_token'), policy.get('race', False),
+                               policy.get('max_queue_depth'))
+
+    def client(self, decision, priority=PRIORITY_CHAT, on_wait=None):
+        return RoutedClient(self.scheduler, decision, priority, on_wait)
+
+
+class RoutedClient(ScheduledClient):
+    """ScheduledClient that serves a RoutingDecision, falling back or racing on overload and slowness"""
+
+    def __init__(self, scheduler, decision, priority=PRIORITY_CHAT, on_wait=None, wait_report_interval=0.5):
+        super().__init__(scheduler, priority, on_wait)
+        self.decision = decision
+        self.wait_report_interval = wait_report_interval
+        self.fallback_reason = None
+
+    def _queue_depth(self, model):
+        stats = self.scheduler.stats()
+        return stats['queued'].get(model, 0) + stats['in_flight'].get(model, 0)
+
+    def _submit_first(self, models, messages, options):
+        """Submit to the first model that is not overloaded; returns (request, remaining models)"""
+        models = list(models)
+        last_error = None
+        while models:
+            model = models.pop(0)
+            if (models and self.decision.max_queue_depth is not None
+                    and self._queue_depth(model) >= self.decision.max_queue_depth):
+                self.fallback_reason = self.fallback_reason or 'queue depth'
+                continue
+            try:
+                return self.scheduler.submit(model, messages, self.priority, options), models
+            except SchedulerBusyError as e:
+                self.fallback_reason = self.fallback_reason or 'busy'
+                last_error = e
+        raise last_error or SchedulerBusyError("No model available for this request")
+
+    def _first_chunk(self, messages, options):
+        """Wait for the first chunk from the routed model or, past the SLO, from a fallback"""
+        # Set by every active request when a chunk arrives
+        arrived = threading.Event()
+        request, remaining = self._submit_first([self.decision.model, *self.decision.fallbacks], messages, options)
+        request.watch(arrived)
+        active = [request]
+        deadline = time.monotonic() + self.decision.slo if self.decision.slo else None
+        last_wait_report = time.monotonic()
+        error = None
+
+        while True:
+            arrived.clear()
+            for candidate in list(active):
+                try:
+                    chunk = candidate.chunks.get_nowait()
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    # Finished without output, e.g. the model is not installed: try the next one
+                    active.remove(candidate)
+                    error = candidate.error or error
+                    self.fallback_reason = self.fallback_reason or 'error'
+                    continue
+                for other in active:
+                    if other is not candidate:
+                        other.cancel()
+                return candidate, chunk
+            if not active and not remaining:
+                break
+
+            now = time.monotonic()
+            need_alternate = not active or (self.decision.race and deadline is not None and now >= deadline)
+            if need_alternate and remaining:
+                if active:
+                    self.fallback_reason = self.fallback_reason or 'slo'
+                    inc('router.slo_exceeded')
+                try:
+                    alternate, remaining = self._submit_first(remaining, messages, options)
+                    alternate.watch(arrived)
+                    active.append(alternate)
+                except SchedulerBusyError as e:
+                    error = error or e
+                    remaining = []
+                deadline = now + self.decision.slo if self.decision.slo else None
+                continue
+
+            if self.on_wait is not None and active and now - last_wait_report >= self.wait_report_interval:
+                last_wait_report = now
+                if not any(candidate.started.is_set() for candidate in active):
+                    self.on_wait(min(candidate.position() for candidate in active))
+
+            # Sleep until a chunk arrives, the SLO passes or the next queue position report is due
+            wakeups = []
+            if self.decision.race and deadline is not None and remaining:
+                wakeups.append(deadline - now)
+            if self.on_wait is not None:
+                wakeups.append(last_wait_report + self.wait_report_interval - now)
+            arrived.wait(max(min(wakeups), 0) if wakeups else None)
+
+        raise error or RuntimeError(f"No model could serve the {self.decision.task} request")
+
+    def _stream(self, messages, options):
+        self.fallback_reason = None
+        winner, first_chunk = self._first_chunk(messages, options)
+        self.last_request = winner
+        if winner.model != self.decision.model:
+            inc('router.fallbacks')
+        yield first_chunk
+        yield from winner.iter_chunks(self.on_wait)
+
+    def chat(self, model, messages, stream=False, options=None, **kwargs):
+        chunks = self._stream(messages, options)
+        if stream:
+            return chunks
+        for _ in chunks:
+            pass
+        return self.last_request.result()
+
+    def routing_record(self):
+        """What was asked for and what served it, for the session record"""
+        served_by = self.last_request.model if self.last_request is not None else None
+        return {
+            'task': self.decision.task,
+            'requested': self.decision.requested,
+            'routed': self.decision.model,
+            'reason': self.decision.reason,
+            'served_by': served_by,
+            'fallback_reason': self.fallback_reason if served_by != self.decision.model else None
+        }
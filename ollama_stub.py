@@ -0,0 +1,279 @@
+"""Local stand-in for the Ollama HTTP API, for testing and load experiments.
+
+Implements the endpoints the app uses (/api/chat, /api/generate, /api/embed,
+/api/tags, /api/ps) with deterministic replies and configurable latency: model load
+(swap) time, prompt evaluation speed, token rate and how many requests the
+server runs in parallel. Point the app at it with OLLAMA_HOST:
+
+    python ollama_stub.py --port 11435 --tokens-per-sec 40 --load-seconds 3
+    OLLAMA_HOST=http://127.0.0.1:11435 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ("Thank you for that answer. Could you walk me through a specific example, "
+                 "including the trade-offs you considered and how you measured the outcome?")
+
+QUESTIONS_REPLY = """1. Describe the architecture of a system you built and the main design trade-offs.
+2. How would you optimize a slow SQL query on a large table?
+3. Explain how you test and deploy code changes safely.
+4. Tell me about a time you disagreed with a teammate and how you resolved it.
+5. Describe a project that failed and what you learned from it."""
+
+
+class StubProfile:
+    """Latency profile of the simulated Ollama server"""
+
+    def __init__(self, tokens_per_sec=50.0, prompt_tokens_per_sec=500.0, load_seconds=2.0,
+                 num_parallel=1, reply_tokens=None, think_tokens=0, models=None):
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.load_seconds = load_seconds
+        self.num_parallel = num_parallel
+        self.reply_tokens = reply_tokens
+        self.think_tokens = think_tokens
+        self.models = models or ['deepseek-r1:7b', 'llama2:13b', 'mistral:7b']
+
+
+class StubState:
+    """Shared server state: the loaded model and request counters"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.slots = threading.BoundedSemaphore(profile.num_parallel)
+        self.lock = threading.Lock()
+        self.loaded_model = None
+        self.model_loads = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+
+    def ensure_loaded(self, model):
+        """Simulate swapping a model into memory"""
+        with self.lock:
+            if self.loaded_model == model:
+                return 0.0
+            self.loaded_model = model
+            self.model_loads += 1
+        time.sleep(self.profile.load_seconds)
+        return self.profile.load_seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'loaded_model': self.loaded_model,
+                'model_loads': self.model_loads,
+                'requests': self.requests,
+                'active': self.active,
+                'max_active': self.max_active
+            }
+
+
+def reply_for(messages):
+    """Deterministic reply text for a conversation"""
+    system = " ".join(m['content'] for m in messages if m.get('role') == 'system')
+    if 'generate' in system.lower() and 'questions' in system.lower():
+        return QUESTIONS_REPLY
+    last = messages[-1]['content'] if messages else ''
+    digest = hashlib.sha256(last.encode('utf-8')).hexdigest()[:6]
+    return f"{DEFAULT_REPLY} (ref {digest})"
+
+
+def embedding_for(text, dim=64):
+    """Deterministic unit vector from the words of a text, so similar texts are close"""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode('utf-8')).digest()
+        vector[digest[0] % dim] += 1.0 if digest[1] & 1 else -1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def tokenize_reply(text):
+    """Split text into word-ish pieces that mimic streamed tokens"""
+    pieces = []
+    for i, word in enumerate(text.split(' ')):
+        pieces.append(word if i == 0 else ' ' + word)
+    return pieces
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': m, 'model': m} for m in self.state.profile.models]})
+        elif self.path == '/api/ps':
+            loaded = self.state.loaded_model
+            self._send_json({'models': [{'name': loaded, 'model': loaded}] if loaded else []})
+        elif self.path == '/stub/stats':
+            self._send_json(self.state.snapshot())
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.path == '/api/chat':
+            messages = payload.get('messages', [])
+            self._generate(payload, reply_for(messages) if messages else '', messages, chat=True)
+        elif self.path == '/api/generate':
+            prompt = payload.get('prompt', '')
+            messages = [{'role': 'user', 'content': prompt}]
+            self._generate(payload, reply_for(messages) if prompt else '', messages, chat=False)
+        elif self.path == '/api/embed':
+            self._embed(payload)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _embed(self, payload):
+        state = self.state
+        inputs = payload.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        with state.slots:
+            with state.lock:
+                state.requests += 1
+            load_duration = state.ensure_loaded(payload.get('model'))
+            prompt_tokens = sum(len(text) for text in inputs) // 4
+            time.sleep(prompt_tokens / state.profile.prompt_tokens_per_sec)
+        self._send_json({
+            'model': payload.get('model'),
+            'embeddings': [embedding_for(text) for text in inputs],
+            'load_duration': int(load_duration * 1e9),
+            'prompt_eval_count': prompt_tokens
+        })
+
+    def _chunk(self, model, text, chat, done=False, **extra):
+        chunk = {
+            'model': model,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'done': done
+        }
+        if chat:
+            chunk['message'] = {'role': 'assistant', 'content': text}
+        else:
+            chunk['response'] = text
+        chunk.update(extra)
+        return chunk
+
+    def _generate(self, payload, reply, messages, chat):
+        state = self.state
+        profile = state.profile
+        model = payload.get('model')
+        stream = payload.get('stream', True)
+        started = time.perf_counter()
+
+        with state.slots:
+            with state.lock:
+                state.requests += 1
+                state.active += 1
+                state.max_active = max(state.max_active, state.active)
+            try:
+                load_duration = state.ensure_loaded(model)
+
+                prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+                prompt_seconds = prompt_tokens / profile.prompt_tokens_per_sec
+                time.sleep(prompt_seconds)
+
+                pieces = []
+                if reply:
+                    if profile.think_tokens:
+                        pieces = ['<think>'] + [' hmm'] * profile.think_tokens + ['</think>']
+                    pieces += tokenize_reply(reply)
+                    if profile.reply_tokens:
+                        pieces = (pieces * (profile.reply_tokens // max(1, len(pieces)) + 1))[:profile.reply_tokens]
+
+                if stream:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+
+                for piece in pieces:
+                    time.sleep(1.0 / profile.tokens_per_sec)
+                    if stream:
+                        self._write_chunk(self._chunk(model, piece, chat))
+
+                eval_duration = len(pieces) / profile.tokens_per_sec
+                final = self._chunk(
+                    model, '' if stream else ''.join(pieces), chat, done=True,
+                    done_reason='stop' if pieces else 'load',
+                    total_duration=int((time.perf_counter() - started) * 1e9),
+                    load_duration=int(load_duration * 1e9),
+                    prompt_eval_count=prompt_tokens,
+                    prompt_eval_duration=int(prompt_seconds * 1e9),
+                    eval_count=len(pieces),
+                    eval_duration=int(eval_duration * 1e9)
+                )
+                if stream:
+                    self._write_chunk(final)
+                    self.wfile.write(b'0\r\n\r\n')
+                else:
+                    self._send_json(final)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client cancelled the stream
+                pass
+            finally:
+                with state.lock:
+                    state.active -= 1
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + '\n').encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+def start_stub_server(profile=None, host='127.0.0.1', port=0):
+    """Start the stub in a background thread; returns (server, base_url)"""
+    state = StubState(profile or StubProfile())
+    handler = type('BoundStubHandler', (StubHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--tokens-per-sec', type=float, default=50.0)
+    parser.add_argument('--prompt-tokens-per-sec', type=float, default=500.0)
+    parser.add_argument('--load-seconds', type=float, default=2.0)
+    parser.add_argument('--num-parallel', type=int, default=1)
+    parser.add_argument('--reply-tokens', type=int, default=None)
+    parser.add_argument('--think-tokens', type=int, default=0)
+    args = parser.parse_args()
+
+    profile = StubProfile(args.tokens_per_sec, args.prompt_tokens_per_sec, args.load_seconds,
+                          args.num_parallel, args.reply_tokens, args.think_tokens)
+    server, url = start_stub_server(profile, args.host, args.port)
+    print(f"Ollama stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from metrics import inc, span
+
+DEFAULT_MAX_PAGES = 20
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+class PdfIngestionError(Exception):
+    """Raised when a PDF is rejected or cannot be extracted in time"""
+
+
+def _extract_page_range(data, start, end):
+    """Worker: extract text from pages [start, end) and report the total page count"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    texts = [reader.pages[i].extract_text() or "" for i in range(start, min(end, page_count))]
+    return page_count, texts
+
+
+class PdfIngestor:
+    """Extracts resume text in a bounded worker pool with size, page and time limits.
+
+    Extracted text is cached on disk by the SHA-256 of the file, so
+    re-uploading the same PDF never reaches the pool. Only the first
+    max_pages pages are read; extract() reports when a file had more.
+    """
+
+    def __init__(self, max_workers=2, timeout=30.0, max_pages=DEFAULT_MAX_PAGES,
+                 max_bytes=DEFAULT_MAX_BYTES, pages_per_task=4,
+                 cache_dir="interview_sessions/cache/pdf_text"):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        # Pages read by the first task, which is all most resumes have; the rest of a longer
+        # file is split across the workers, so each is sent the file and parses it once
+        self.pages_per_task = pages_per_task
+        self.cache_dir = cache_dir
+        self.pool = None
+        # Extractions in progress per pool, including pools already replaced after a timeout
+        self.active = {}
+        self.pool_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _acquire_pool(self):
+        with self.pool_lock:
+            if self.pool is None:
+                # spawn avoids forking a multi-threaded server process
+                context = multiprocessing.get_context('spawn')
+                self.pool = context.Pool(self.max_workers, maxtasksperchild=100)
+            self.active[self.pool] = self.active.get(self.pool, 0) + 1
+            return self.pool
+
+    def _release_pool(self, pool, timed_out=False):
+        """Done with a pool. After a timeout, new extractions get a fresh pool, and the
+        old one (with the worker stuck on the pathological file) is terminated as soon
+        as the other extractions still running on it finish."""
+        with self.pool_lock:
+            if timed_out and self.pool is pool:
+                self.pool = None
+            self.active[pool] -= 1
+            retired = self.pool is not pool and not self.active[pool]
+            if retired:
+                del self.active[pool]
+        if retired:
+            pool.terminate()
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def extract_text(self, data):
+        """Extract text from PDF bytes, using the cache when possible"""
+        return self.extract(data)['text']
+
+    def extract(self, data):
+        """Text of the PDF with its page_count and how many pages were extracted (at most max_pages)"""
+        if len(data) > self.max_bytes:
+            raise PdfIngestionError(
+                f"PDF is {len(data) / 1024 / 1024:.1f} MB; the limit is {self.max_bytes / 1024 / 1024:.1f} MB"
+            )
+
+        digest = hashlib.sha256(data).hexdigest()
+        cache_path = self._cache_path(digest)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            if result['pages_extracted'] >= min(result['page_count'], self.max_pages):
+                inc('pdf.cache_hits')
+                return result
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        inc('pdf.cache_misses')
+        with span('pdf.extract'):
+            result = self._extract_uncached(data)
+        if result['pages_extracted'] < result['page_count']:
+            inc('pdf.truncated')
+
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, cache_path)
+        return result
+
+    def _extract_uncached(self, data):
+        pool = self._acquire_pool()
+        deadline = time.monotonic() + self.timeout
+        timed_out = False
+        try:
+            # The first task also tells us how many pages there are
+            first = pool.apply_async(_extract_page_range, (data, 0, min(self.pages_per_task, self.max_pages)))
+            page_count, first_texts = first.get(self._remaining(deadline))
+
+            last_page = min(page_count, self.max_pages)
+            rest = max(0, last_page - self.pages_per_task)
+            chunk = -(-rest // self.max_workers) if rest else 1
+            pending = [
+                pool.apply_async(_extract_page_range, (data, start, min(start + chunk, last_page)))
+                for start in range(self.pages_per_task, last_page, chunk)
+            ]
+            page_texts = first_texts[:last_page]
+            for result in pending:
+                page_texts.extend(result.get(self._remaining(deadline))[1])
+        except multiprocessing.TimeoutError:
+            timed_out = True
+            raise PdfIngestionError(f"PDF extraction timed out after {self.timeout:.0f}s")
+        except Exception as e:
+            raise PdfIngestionError(f"Could not read PDF: {e}")
+        finally:
+            self._release_pool(pool, timed_out)
+
+        return {'text': "\n".join(page_texts), 'page_count': page_count, 'pages_extracted': last_page}
+
+    @staticmethod
+    def _remaining(deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise multiprocessing.TimeoutError()
+        return remaining
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        with self.pool_lock:
+            pool, self.pool = self.pool, None
+            if pool is not None and not self.active.get(pool):
+                self.active.pop(pool, None)
+        if pool is not None:
+            pool.close()
+            pool.join()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+
+class QuestionCache:
+    """Persistent cache of generated interview questions.
+
+    Entries are keyed by a hash of the normalized resume text, the model id
+    and the model's resolved system prompt and temperature, so a changed
+    model configuration never serves stale questions.
+    """
+
+    def __init__(self, cache_dir="interview_sessions/cache/questions", max_entries=500,
+                 ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_resume(resume_text):
+        """Collapse whitespace so re-extracted copies of a resume hash the same"""
+        return re.sub(r'\s+', ' ', resume_text).strip()
+
+    @staticmethod
+    def config_fingerprint(model_config):
+        """Hash the parts of a model configuration that affect generation"""
+        relevant = {
+            'system_prompt': model_config.get('system_prompt', ''),
+            'temperature': model_config.get('temperature')
+        }
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def make_key(self, resume_text, model_name, model_config):
+        """Build the content address for a resume/model/prompt combination"""
+        payload = json.dumps([
+            self.normalize_resume(resume_text),
+            model_name,
+            self.config_fingerprint(model_config)
+        ])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, resume_text, model_name, model_config):
+        """Return cached questions or None on a miss"""
+        path = self._path(self.make_key(resume_text, model_name, model_config))
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - entry['created_at'] > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        # Touch the entry so size eviction drops least recently used first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['questions']
+
+    def put(self, resume_text, model_name, model_config, questions):
+        """Store generated questions and evict old entries if over capacity"""
+        key = self.make_key(resume_text, model_name, model_config)
+        entry = {
+            'key': key,
+            'model': model_name,
+            'config_fingerprint': self.config_fingerprint(model_config),
+            'created_at': time.time(),
+            'questions': questions
+        }
+
+        # Write atomically so concurrent readers never see a partial entry
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        now = time.time()
+        entries = []
+        for dir_entry in os.scandir(self.cache_dir):
+            if not dir_entry.name.endswith('.json'):
+                continue
+            try:
+                mtime = dir_entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if now - mtime > self.ttl_seconds:
+                self._remove(dir_entry.path)
+            else:
+                entries.append((mtime, dir_entry.path))
+
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    def invalidate_model(self, model_name):
+        """Remove every cached entry generated by the given model"""
+        for dir_entry in os.scandir(self.cache_dir):
+            if not dir_entry.name.endswith('.json'):
+                continue
+            try:
+                with open(dir_entry.path, 'r') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            if entry.get('model') == model_name:
+                self._remove(dir_entry.path)
+
+    def on_model_config_updated(self, model_name, updates):
+        """ModelManager listener: drop entries when prompt or temperature change"""
+        if 'system_prompt' in updates or 'temperature' in updates:
+            self.invalidate_model(model_name)
+
+    def clear(self):
+        """Remove all cached entries"""
+        for dir_entry in os.scandir(self.cache_dir):
+            if dir_entry.name.endswith('.json'):
+                self._remove(dir_entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
\ No newline at end of file
@@ -0,0 +1,435 @@
+"""Compressed, paged storage for finished interview recordings.
+
+A recording is one `<session_id>.irec` file:
+
+    b"IREC" + version byte + 4-byte header length (big endian)
+    header  JSON, uncompressed: session fields, analytics summary, codec,
+            resume hash and a table of (offset, length, count) per page
+    body    independently compressed blocks: interaction pages of
+            page_size interactions each, then the full analytics report
+
+Listing or cataloguing a session reads only the header, and a transcript
+can be read one page at a time. Resume text is stored once per distinct
+resume under resumes/<sha256>.<ext>, however many sessions used it.
+
+Blocks are compressed with zstd when the zstandard package is installed
+and gzip otherwise; the codec is recorded in the header. New recordings are
+written at a fast "hot" level, and compact() later rewrites old ones at a
+"cold" level, migrates legacy pretty/compact JSON recordings and applies
+retention:
+
+    python recording_store.py compact --cold-after-days 7 --retain-days 365
+    python recording_store.py stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import struct
+import time
+
+MAGIC = b"IREC"
+FORMAT_VERSION = 1
+EXTENSION = ".irec"
+LEGACY_EXTENSION = ".json"
+DEFAULT_PAGE_SIZE = 25
+CODEC_EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+# Resumes younger than this are never garbage-collected: a recording that
+# references one may still be being written by another worker
+RESUME_GC_GRACE = 3600
+
+_HEADER_PREFIX = struct.Struct(">4sBI")
+
+
+def _gzip_codec():
+    return {
+        'name': 'gzip',
+        'extension': CODEC_EXTENSIONS['gzip'],
+        'compress': lambda data, tier: gzip.compress(data, compresslevel=6 if tier == 'hot' else 9, mtime=0),
+        'decompress': gzip.decompress
+    }
+
+
+def _zstd_codec():
+    import zstandard
+
+    return {
+        'name': 'zstd',
+        'extension': CODEC_EXTENSIONS['zstd'],
+        # ZstdCompressor objects are not thread-safe, so each call gets its own
+        'compress': lambda data, tier: zstandard.ZstdCompressor(level=3 if tier == 'hot' else 19).compress(data),
+        'decompress': lambda data: zstandard.ZstdDecompressor().decompress(data)
+    }
+
+
+_CODEC_FACTORIES = {'zstd': _zstd_codec, 'gzip': _gzip_codec}
+_codecs = {}
+
+
+def get_codec(name=None):
+    """The named codec, or the best one available (zstd, falling back to gzip)"""
+    if name is None:
+        try:
+            return get_codec('zstd')
+        except ImportError:
+            return get_codec('gzip')
+    if name not in _codecs:
+        if name not in _CODEC_FACTORIES:
+            raise ValueError(f"Unknown recording codec: {name}")
+        _codecs[name] = _CODEC_FACTORIES[name]()
+    return _codecs[name]
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RecordingStore:
+    """Reads and writes recordings in one directory, in either format"""
+
+    def __init__(self, recordings_dir, codec=None, page_size=DEFAULT_PAGE_SIZE):
+        self.recordings_dir = recordings_dir
+        self.resumes_dir = os.path.join(recordings_dir, "resumes")
+        self.codec_name = codec
+        self.page_size = page_size
+        os.makedirs(self.resumes_dir, exist_ok=True)
+
+    @property
+    def codec(self):
+        return get_codec(self.codec_name)
+
+    def path(self, session_id):
+        """Path of a session's recording, preferring the paged format"""
+        path = os.path.join(self.recordings_dir, session_id + EXTENSION)
+        if os.path.exists(path):
+            return path
+        legacy_path = os.path.join(self.recordings_dir, session_id + LEGACY_EXTENSION)
+        if os.path.exists(legacy_path):
+            return legacy_path
+        raise FileNotFoundError(f"Session {session_id} not found")
+
+    def iter_sessions(self):
+        """Yield (session_id, path) for every recording without reading it"""
+        paged = {}
+        legacy = {}
+        with os.scandir(self.recordings_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(EXTENSION):
+                    paged[entry.name[:-len(EXTENSION)]] = entry.path
+                elif entry.name.endswith(LEGACY_EXTENSION):
+                    legacy[entry.name[:-len(LEGACY_EXTENSION)]] = entry.path
+        # A legacy file next to its paged copy is left over from an interrupted migration
+        legacy.update(paged)
+        yield from legacy.items()
+
+    def has_recordings(self):
+        return next(self.iter_sessions(), None) is not None
+
+    # Writing
+
+    def _resume_path(self, digest, extension):
+        return os.path.join(self.resumes_dir, digest + extension)
+
+    def _store_resume(self, resume_text, codec):
+        if not resume_text:
+            return None
+        data = resume_text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._find_resume(digest)
+        if path is None:
+            _write_atomic(self._resume_path(digest, codec['extension']), codec['compress'](data, 'cold'))
+        else:
+            # Refresh the mtime so garbage collection sees the resume as in use
+            os.utime(path)
+        return digest
+
+    def save(self, session_id, session_data, tier='hot'):
+        """Write a session dict (as the recorder builds it) in the paged format"""
+        codec = self.codec
+        session_data = dict(session_data)
+        interactions = session_data.pop('interactions', [])
+        analytics = session_data.pop('analytics', None)
+        resume_text = session_data.pop('resume_text', '')
+
+        blocks = []
+        pages = []
+        offset = 0
+        for start in range(0, len(interactions), self.page_size):
+            page = interactions[start:start + self.page_size]
+            block = codec['compress'](_dumps(page), tier)
+            pages.append([offset, len(block), len(page)])
+            blocks.append(block)
+            offset += len(block)
+
+        analytics_block = None
+        if analytics is not None:
+            block = codec['compress'](_dumps(analytics), tier)
+            analytics_block = [offset, len(block)]
+            blocks.append(block)
+
+        header = {
+            **session_data,
+            'session_id': session_id,
+            'interaction_count': len(interactions),
+            'resume_sha256': self._store_resume(resume_text, codec),
+            'summary': analytics.get('summary') if analytics else None,
+            'response_count': analytics.get('response_count') if analytics else None,
+            'codec': codec['name'],
+            'tier': tier,
+            'pages': pages,
+            'analytics_block': analytics_block
+        }
+        header_bytes = _dumps(header)
+        data = _HEADER_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)) + header_bytes + b"".join(blocks)
+
+        path = os.path.join(self.recordings_dir, session_id + EXTENSION)
+        _write_atomic(path, data)
+        return path
+
+    # Reading
+
+    @staticmethod
+    def _read_header(f):
+        magic, version, header_length = _HEADER_PREFIX.unpack(f.read(_HEADER_PREFIX.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} recording")
+        header = json.loads(f.read(header_length))
+        header['body_offset'] = _HEADER_PREFIX.size + header_length
+        return header
+
+    @staticmethod
+    def _read_block(f, header, offset, length):
+        f.seek(header['body_offset'] + offset)
+        return json.loads(get_codec(header['codec'])['decompress'](f.read(length)))
+
+    @staticmethod
+    def _load_legacy(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _legacy_header(session_id, session_data):
+        header = {key: value for key, value in session_data.items()
+                  if key not in ('interactions', 'analytics', 'resume_text')}
+        analytics = session_data.get('analytics')
+        header.update({
+            'session_id': session_id,
+            'interaction_count': len(session_data.get('interactions', [])),
+            'summary': analytics.get('summary') if analytics else None,
+            'response_count': analytics.get('response_count') if analytics else None,
+            'codec': None,
+            'tier': 'legacy'
+        })
+        return header
+
+    def read_header(self, session_id=None, path=None):
+        """Session fields and analytics summary, without decompressing anything"""
+        path = path or self.path(session_id)
+        session_id = session_id or _session_id(path)
+        if path.endswith(LEGACY_EXTENSION):
+            return self._legacy_header(session_id, self._load_legacy(path))
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+        del header['body_offset']
+        return header
+
+    def page_count(self, session_id):
+        return max(1, -(-self.read_header(session_id)['interaction_count'] // self.page_size))
+
+    def load_page(self, session_id, page):
+        """One page of interactions (0-based); pages follow the size they were written with"""
+        path = self.path(session_id)
+        if path.endswith(LEGACY_EXTENSION):
+            interactions = self._load_legacy(path).get('interactions', [])
+            return interactions[page * self.page_size:(page + 1) * self.page_size]
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            if page >= len(header['pages']):
+                return []
+            offset, length, _ = header['pages'][page]
+            return self._read_block(f, header, offset, length)
+
+    def iter_interactions(self, session_id):
+        """Yield interactions one page at a time"""
+        path = self.path(session_id)
+        if path.endswith(LEGACY_EXTENSION):
+            yield from self._load_legacy(path).get('interactions', [])
+            return
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            for offset, length, _ in header['pages']:
+                yield from self._read_block(f, header, offset, length)
+
+    def load_resume(self, digest):
+        if digest is None:
+            return ''
+        path = self._find_resume(digest)
+        if path is None:
+            raise FileNotFoundError(f"Resume {digest} not found")
+        codec_name = next(name for name, extension in CODEC_EXTENSIONS.items() if path.endswith(extension))
+        with open(path, 'rb') as f:
+            return get_codec(codec_name)['decompress'](f.read()).decode('utf-8')
+
+    def _find_resume(self, digest):
+        for extension in CODEC_EXTENSIONS.values():
+            path = self._resume_path(digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self, session_id=None, path=None, include_interactions=True, include_resume=True,
+             include_analytics=True):
+        """Rebuild the full session dict, skipping the parts that are not needed"""
+        path = path or self.path(session_id)
+        if path.endswith(LEGACY_EXTENSION):
+            return self._load_legacy(path)
+
+        with open(path, 'rb') as f:
+            header = self._read_header(f)
+            session_data = {key: value for key, value in header.items()
+                            if key not in ('session_id', 'interaction_count', 'resume_sha256', 'summary',
+                                           'response_count', 'codec', 'tier', 'pages', 'analytics_block',
+                                           'body_offset')}
+            if include_interactions:
+                session_data['interactions'] = [interaction
+                                                for offset, length, _ in header['pages']
+                                                for interaction in self._read_block(f, header, offset, length)]
+            if include_analytics:
+                block = header['analytics_block']
+                session_data['analytics'] = self._read_block(f, header, *block) if block else None
+        if include_resume:
+            session_data['resume_text'] = self.load_resume(header['resume_sha256'])
+        return session_data
+
+    # Maintenance
+
+    def delete(self, session_id):
+        """Remove a session's recording in every format; its resume is left to compact()"""
+        for extension in (EXTENSION, LEGACY_EXTENSION):
+            try:
+                os.remove(os.path.join(self.recordings_dir, session_id + extension))
+            except FileNotFoundError:
+                pass
+
+    def compact(self, cold_after_days=7, retain_days=None, catalogs=(), dry_run=False):
+        """Migrate, recompress and expire recordings, then drop unreferenced resumes.
+
+        Recordings last written more than retain_days ago are deleted (and
+        removed from catalogs, such as the SessionIndex and analytics warehouse). Legacy JSON and hot
+        recordings older than cold_after_days are rewritten at the cold level.
+        Recordings whose header cannot be read are left alone and listed in
+        skipped_sessions; resumes are then not garbage-collected at all,
+        since a skipped recording may still reference any of them.
+        """
+        now = time.time()
+        stats = {'migrated': 0, 'recompressed': 0, 'deleted': 0, 'resumes_removed': 0,
+                 'bytes_before': 0, 'bytes_after': 0, 'skipped': 0, 'skipped_sessions': []}
+        referenced = set()
+
+        for session_id, path in list(self.iter_sessions()):
+            try:
+                file_stat = os.stat(path)
+                header = self.read_header(session_id, path)
+            except (OSError, ValueError) as e:
+                stats['skipped'] += 1
+                stats['skipped_sessions'].append(f"{session_id}: {e}")
+                continue
+            age_days = (now - file_stat.st_mtime) / 86400
+            stats['bytes_before'] += file_stat.st_size
+
+            if retain_days is not None and age_days > retain_days:
+                stats['deleted'] += 1
+                if not dry_run:
+                    self.delete(session_id)
+                    for catalog in catalogs:
+                        catalog.remove_session(session_id)
+                continue
+
+            if age_days > cold_after_days and header['tier'] != 'cold':
+                stats['migrated' if header['tier'] == 'legacy' else 'recompressed'] += 1
+                if not dry_run:
+                    path = self.save(session_id, self.load(path=path), tier='cold')
+                    # Keep the recording's age so retention still counts from when it was made
+                    os.utime(path, (file_stat.st_atime, file_stat.st_mtime))
+                    legacy_path = os.path.join(self.recordings_dir, session_id + LEGACY_EXTENSION)
+                    if os.path.exists(legacy_path):
+                        os.remove(legacy_path)
+                    header = self.read_header(session_id, path)
+
+            if header.get('resume_sha256'):
+                referenced.add(header['resume_sha256'])
+            stats['bytes_after'] += os.path.getsize(path) if not dry_run else file_stat.st_size
+
+        if stats['skipped']:
+            return stats
+        with os.scandir(self.resumes_dir) as entries:
+            for entry in entries:
+                digest = entry.name.split('.', 1)[0]
+                if digest in referenced or now - entry.stat().st_mtime < RESUME_GC_GRACE:
+                    continue
+                stats['resumes_removed'] += 1
+                if not dry_run:
+                    os.remove(entry.path)
+        return stats
+
+    def stats(self):
+        """Recording counts and bytes per tier, plus the shared resume store"""
+        tiers = {}
+        for session_id, path in self.iter_sessions():
+            tier = 'legacy' if path.endswith(LEGACY_EXTENSION) else self.read_header(session_id, path)['tier']
+            entry = tiers.setdefault(tier, {'recordings': 0, 'bytes': 0})
+            entry['recordings'] += 1
+            entry['bytes'] += os.path.getsize(path)
+        with os.scandir(self.resumes_dir) as entries:
+            sizes = [entry.stat().st_size for entry in entries]
+        return {'tiers': tiers, 'resumes': len(sizes), 'resume_bytes': sum(sizes)}
+
+
+def _session_id(path):
+    name = os.path.basename(path)
+    return name[:-len(EXTENSION)] if name.endswith(EXTENSION) else name[:-len(LEGACY_EXTENSION)]
+
+
+def read_recording(path, include_resume=True, include_analytics=True):
+    """Load a recording of either format from its path"""
+    store = RecordingStore(os.path.dirname(path))
+    return store.load(path=path, include_resume=include_resume, include_analytics=include_analytics)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain interview recordings")
+    parser.add_argument('command', choices=['compact', 'stats'])
+    parser.add_argument('--base-dir', default="interview_sessions")
+    parser.add_argument('--cold-after-days', type=float, default=7,
+                        help="Recompress (and migrate legacy JSON) recordings older than this")
+    parser.add_argument('--retain-days', type=float, default=None,
+                        help="Delete recordings older than this; kept forever by default")
+    parser.add_argument('--codec', choices=sorted(_CODEC_FACTORIES), default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    store = RecordingStore(os.path.join(args.base_dir, "recordings"), codec=args.codec)
+    if args.command == 'stats':
+        print(json.dumps(store.stats(), indent=2))
+        return
+
+    from analytics_warehouse import AnalyticsWarehouse
+    from session_index import SessionIndex
+    catalogs = [SessionIndex(os.path.join(args.base_dir, "sessions.db")),
+                AnalyticsWarehouse(os.path.join(args.base_dir, "warehouse.db"))]
+    stats = store.compact(args.cold_after_days, args.retain_days, catalogs, args.dry_run)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
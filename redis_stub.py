@@ -0,0 +1,215 @@
+"""Local stand-in for a Redis server, for sharing session state between workers without Redis.
+
+Speaks the Redis protocol (RESP2) for the commands the session state
+backend uses (lists, hashes, DEL, MULTI/EXEC pipelines) and keeps
+everything in memory, so redis-py clients in several worker processes can
+share interviews on a development machine:
+
+    python redis_stub.py --port 6380
+    INTERVIEW_STATE_BACKEND=redis://127.0.0.1:6380/0 streamlit run app.py
+
+Data is lost when the stub stops; use a real Redis server in production.
+"""
+import argparse
+import socketserver
+import threading
+
+
+class RespError(Exception):
+    """Error reply sent back to the client"""
+
+
+class Status(bytes):
+    """Simple-string reply such as +OK"""
+
+
+OK = Status(b'OK')
+
+
+class StubStore:
+    """In-memory keyspace of lists and hashes, shared by all connections"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _typed(self, key, kind):
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def execute(self, command, args):
+        name = command.upper()
+        handler = getattr(self, f"cmd_{name.decode('ascii', 'replace').lower()}", None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{name.decode('ascii', 'replace')}'")
+        with self.lock:
+            return handler(*args)
+
+    def cmd_ping(self, *args):
+        return args[0] if args else Status(b'PONG')
+
+    def cmd_select(self, db):
+        return OK
+
+    def cmd_client(self, *args):
+        # redis-py announces its name and version on connect
+        return OK
+
+    def cmd_rpush(self, key, *values):
+        items = self._typed(key, list)
+        if items is None:
+            items = self.data[key] = []
+        items.extend(values)
+        return len(items)
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._typed(key, list) or []
+        start, stop = int(start), int(stop)
+        if start < 0:
+            start = max(0, len(items) + start)
+        stop = len(items) + stop if stop < 0 else stop
+        return items[start:stop + 1]
+
+    def cmd_llen(self, key):
+        return len(self._typed(key, list) or [])
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise RespError("ERR wrong number of arguments for 'hset' command")
+        fields = self._typed(key, dict)
+        if fields is None:
+            fields = self.data[key] = {}
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        return (self._typed(key, dict) or {}).get(field)
+
+    def cmd_hgetall(self, key):
+        fields = self._typed(key, dict) or {}
+        return [item for pair in fields.items() for item in pair]
+
+    def cmd_hexists(self, key, field):
+        return int(field in (self._typed(key, dict) or {}))
+
+    def cmd_hdel(self, key, *fields):
+        existing = self._typed(key, dict) or {}
+        removed = sum(1 for field in fields if existing.pop(field, None) is not None)
+        if key in self.data and not existing:
+            del self.data[key]
+        return removed
+
+    def cmd_del(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+
+def encode(value):
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode('utf-8')
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return f":{value}\r\n".encode('ascii')
+    if isinstance(value, Status):
+        return b"+" + value + b"\r\n"
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    store = None
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, e.g. typed into telnet
+            return line.split()
+        parts = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        queued = None
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            name = command[0].upper()
+            if name == b'MULTI':
+                queued, reply = [], OK
+            elif name == b'EXEC':
+                if queued is None:
+                    reply = RespError("ERR EXEC without MULTI")
+                else:
+                    reply = []
+                    for queued_command in queued:
+                        try:
+                            reply.append(self.store.execute(queued_command[0], queued_command[1:]))
+                        except RespError as e:
+                            reply.append(e)
+                        except (TypeError, ValueError):
+                            reply.append(RespError("ERR wrong number or type of arguments"))
+                    queued = None
+            elif name == b'DISCARD':
+                queued, reply = None, OK
+            elif queued is not None:
+                queued.append(command)
+                reply = Status(b'QUEUED')
+            else:
+                try:
+                    reply = self.store.execute(command[0], command[1:])
+                except RespError as e:
+                    reply = e
+                except (TypeError, ValueError):
+                    reply = RespError("ERR wrong number or type of arguments")
+            self.wfile.write(encode(reply))
+            self.wfile.flush()
+
+
+class StubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_stub_server(host='127.0.0.1', port=0):
+    """Start the stub in a background thread; returns (server, redis_url)"""
+    store = StubStore()
+    handler = type('BoundRespHandler', (RespHandler,), {'store': store})
+    server = StubServer((host, port), handler)
+    server.store = store
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for a Redis server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port)
+    print(f"Redis stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Semantic answer relevance from cached embeddings.
+
+RelevanceScorer embeds the question, the answer and the resume chunks and
+scores how closely the answer addresses the question, with the question
+expanded by the resume sections it is most similar to. One turn is one
+cosine-similarity matrix product; rescoring uses one product per batch.
+
+Embedders:
+
+    HashedTfidfEmbedder   built in, no model call: hashed term frequencies,
+                          weighted by IDF over the texts scored together
+    OllamaEmbedder        a local embedding model (e.g. nomic-embed-text)
+                          through the inference scheduler
+
+Vectors are cached by content hash in a memory-mapped file per embedder
+(EmbeddingCache), so a repeated question or resume chunk is embedded once
+across sessions and worker processes. Answers are embedded without being
+stored: they rarely repeat, and storing them would grow the file forever.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from functools import lru_cache
+
+import numpy as np
+
+from keyword_matcher import STOP_WORDS, tokenize
+from metrics import span
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token, dim):
+    """Stable (index, sign) for a token; crc32 so every process agrees"""
+    h = zlib.crc32(token.encode('utf-8'))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+
+class HashedTfidfEmbedder:
+    """Sublinear term frequencies hashed into a fixed number of dimensions.
+
+    The cached vectors hold term frequencies only; RelevanceScorer applies
+    IDF over the texts being compared, so terms shared by every resume
+    section (or by the question and every section) count for less.
+    """
+
+    idf_weighted = True
+    # Cosine below which an answer is considered off-topic
+    low_relevance = 0.1
+
+    def __init__(self, dim=2048, use_stemming=True):
+        self.dim = dim
+        self.use_stemming = use_stemming
+        self.name = f"hashed-tfidf-{dim}"
+
+    def embed_batch(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for token in tokenize(text, self.use_stemming):
+                if token not in STOP_WORDS:
+                    counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                index, sign = _bucket(token, self.dim)
+                vectors[row, index] += sign * (1.0 + np.log(count))
+        return vectors
+
+
+class OllamaEmbedder:
+    """Embeddings from a local Ollama model, requested in one call per batch"""
+
+    idf_weighted = False
+    low_relevance = 0.45
+
+    def __init__(self, client, model):
+        self.client = client
+        self.model = model
+        self.name = f"ollama-{model.replace('/', '_').replace(':', '_')}"
+        self.dim = None
+
+    def embed_batch(self, texts):
+        response = self.client.embed(model=self.model, input=list(texts))
+        vectors = np.asarray(response['embeddings'], dtype=np.float32)
+        self.dim = vectors.shape[1]
+        return vectors
+
+
+class EmbeddingCache:
+    """Vectors keyed by content hash, in a memory-mapped file shared by processes.
+
+    A SQLite table maps keys to rows of the vector file; a row is only
+    marked ready after its vector has been written, so concurrent readers
+    never see a partial vector.
+    """
+
+    def __init__(self, cache_dir, dim, initial_rows=1024):
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.initial_rows = initial_rows
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "keys.db")
+        self.vectors_path = os.path.join(cache_dir, f"vectors-{dim}.f32")
+        self.lock = threading.Lock()
+        self.vectors = None
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    row INTEGER PRIMARY KEY,
+                    key TEXT UNIQUE NOT NULL,
+                    ready INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, 'ab').close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _mapped(self, row):
+        """The vector file mapped to cover row, growing (never shrinking) the file if needed"""
+        if self.vectors is None or row >= self.vectors.shape[0]:
+            needed = (row + 1) * self.row_bytes
+            size = os.path.getsize(self.vectors_path)
+            if size < needed:
+                # Double the file; writing the last byte extends it without truncating other writers
+                size = max(needed, 2 * size, self.initial_rows * self.row_bytes)
+                with open(self.vectors_path, 'r+b') as f:
+                    f.seek(size - 1)
+                    f.write(b'\0')
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                     shape=(size // self.row_bytes, self.dim))
+        return self.vectors
+
+    def get_many(self, keys):
+        """Cached vectors for the keys found, as {key: vector}"""
+        if not keys:
+            return {}
+        rows = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                query = (f"SELECT key, row FROM entries WHERE ready = 1 "
+                         f"AND key IN ({','.join('?' * len(chunk))})")
+                rows.update(conn.execute(query, chunk).fetchall())
+        if not rows:
+            return {}
+        with self.lock:
+            vectors = self._mapped(max(rows.values()))
+            return {key: np.array(vectors[row]) for key, row in rows.items()}
+
+    def put_many(self, keys, vectors):
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.executemany("INSERT OR IGNORE INTO entries (key) VALUES (?)", [(key,) for key in keys])
+                placeholders = ','.join('?' * len(keys))
+                rows = dict(conn.execute(
+                    f"SELECT key, row FROM entries WHERE ready = 0 AND key IN ({placeholders})", keys
+                ).fetchall())
+            if not rows:
+                return
+            with self.lock:
+                mapped = self._mapped(max(rows.values()))
+                for key, vector in zip(keys, vectors):
+                    if key in rows:
+                        mapped[rows[key]] = vector
+                mapped.flush()
+            with conn:
+                conn.executemany("UPDATE entries SET ready = 1 WHERE row = ?", [(row,) for row in rows.values()])
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class RelevanceScorer:
+    """Scores answers against questions (and the resume) with cached embeddings"""
+
+    def __init__(self, embedder, cache_dir=None, expansion_chunks=2, expansion_weight=0.5):
+        self.embedder = embedder
+        self.cache_dir = cache_dir
+        self.caches = {}
+        self.expansion_chunks = expansion_chunks
+        self.expansion_weight = expansion_weight
+        self.low_relevance = embedder.low_relevance
+
+    def _key(self, text):
+        return hashlib.blake2b(f"{self.embedder.name}\0{text}".encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache(self, dim):
+        if self.cache_dir is None or dim is None:
+            return None
+        cache = self.caches.get(dim)
+        if cache is None:
+            cache = self.caches[dim] = EmbeddingCache(os.path.join(self.cache_dir, self.embedder.name), dim)
+        return cache
+
+    def embed(self, texts, transient=()):
+        """Embedding matrix for texts, computing only those not cached yet.
+
+        Texts in transient (answers) are neither looked up nor stored.
+        """
+        transient = set(transient)
+        keys = [self._key(text) for text in texts]
+        stored = {key for key, text in zip(keys, texts) if text not in transient}
+        cache = self._cache(self.embedder.dim)
+        found = cache.get_many(list(stored)) if cache is not None else {}
+
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            text_for_key = dict(zip(keys, texts))
+            with span('relevance.embed'):
+                computed = self.embedder.embed_batch([text_for_key[key] for key in missing])
+            found.update(zip(missing, computed))
+            cache = self._cache(computed.shape[1])
+            keep = [i for i, key in enumerate(missing) if key in stored]
+            if cache is not None and keep:
+                cache.put_many([missing[i] for i in keep], computed[keep])
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+    def _weighted(self, vectors):
+        """Apply IDF over the given texts for TF-only embedders, then L2-normalize"""
+        if self.embedder.idf_weighted:
+            doc_freqs = (vectors != 0).sum(axis=0)
+            vectors = vectors * (np.log((1 + len(vectors)) / (1 + doc_freqs)) + 1.0)
+        return _normalize(vectors)
+
+    def score(self, question, answer, resume_chunks=()):
+        """Relevance of one answer in [0, 1].
+
+        The question vector is blended with the resume chunks most similar
+        to it, so an answer about the project a question refers to scores
+        well even when it uses the resume's words rather than the question's.
+        """
+        with span('relevance.score'):
+            vectors = self._weighted(self.embed([question, answer, *resume_chunks], transient=[answer]))
+            similarity = vectors @ vectors[:2].T
+            query = vectors[0]
+            if len(vectors) > 2 and self.expansion_chunks:
+                chunk_similarity = similarity[2:, 0]
+                top = np.argsort(-chunk_similarity)[:self.expansion_chunks]
+                top = top[chunk_similarity[top] > 0]
+                if len(top):
+                    query = _normalize((query + self.expansion_weight * vectors[2:][top].mean(axis=0))[None])[0]
+            return float(max(0.0, query @ vectors[1]))
+
+    def score_batch(self, questions, answers):
+        """Relevance of many (question, answer) pairs, without resume expansion"""
+        if not answers:
+            return np.zeros(0)
+        with span('relevance.score'):
+            # IDF (for TF-only embedders) is taken over the whole batch
+            vectors = self._weighted(self.embed(list(questions) + list(answers), transient=answers))
+            n = len(answers)
+            return np.clip(np.einsum('ij,ij->i', vectors[:n], vectors[n:]), 0.0, 1.0)
+
+
+def create_embedder(spec='hashed', scheduled_client=None):
+    """'hashed', 'hashed:<dim>' or 'ollama:<model>'"""
+    kind, _, argument = spec.partition(':')
+    if kind == 'hashed':
+        return HashedTfidfEmbedder(int(argument) if argument else 2048)
+    if kind == 'ollama':
+        if not argument:
+            raise ValueError("ollama embedder needs a model, e.g. ollama:nomic-embed-text")
+        return OllamaEmbedder(scheduled_client, argument)
+    raise ValueError(f"Unknown embedder: {spec}")
@@ -0,0 +1,267 @@
+"""Batch re-scoring of recorded interviews.
+
+Replays the candidate answers of every recording through InterviewAnalytics
+on a process pool and writes per-turn metrics to columnar part files:
+
+    python rescore.py --output rescored/ --workers 8
+    python rescore.py --output rescored/ --fast   # no TextBlob; batched lexicon sentiment
+    python rescore.py --output rescored/ --sentiment lexicon
+    python rescore.py --output rescored/ --fast --relevance   # adds embedding relevance
+
+Completed sessions are listed in the output directory's manifest, so an
+interrupted run picks up where it stopped when started again.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from keyword_matcher import DEFAULT_TECHNICAL_KEYWORDS
+from recording_store import RecordingStore, read_recording
+
+MANIFEST_FILE = "_completed_sessions.txt"
+
+_worker_state = {}
+
+
+def iter_recordings(recordings_dir):
+    """Yield (session_id, path) for each recording, paged or legacy JSON, without loading it"""
+    return RecordingStore(recordings_dir).iter_sessions()
+
+
+def load_recording(path):
+    """Session fields and interactions of a recording; resume and analytics are not needed here"""
+    return read_recording(path, include_resume=False, include_analytics=False)
+
+
+def extract_turns(session_data):
+    """Pair each candidate answer with the interviewer message that preceded it"""
+    turns = []
+    question = None
+    for interaction in session_data.get('interactions', []):
+        if interaction['role'] == 'assistant':
+            question = interaction
+        elif interaction['role'] == 'user':
+            turns.append({
+                'question': question['content'] if question else '',
+                'question_time': question['timestamp'] if question else None,
+                'answer': interaction['content'],
+                'answer_time': interaction['timestamp']
+            })
+    return turns
+
+
+def _init_worker(taxonomy, fast, sentiment='textblob', relevance_cache=None):
+    from sentiment import LexiconBackend, create_backend
+
+    _worker_state['taxonomy'] = taxonomy
+    _worker_state['fast'] = fast
+    if fast:
+        # Fast mode never uses TextBlob; it scores a whole batch with the lexicon
+        # backend, and leaves sentiment empty when the lexicon is not installed
+        try:
+            _worker_state['sentiment'] = LexiconBackend()
+        except FileNotFoundError:
+            _worker_state['sentiment'] = None
+    else:
+        _worker_state['sentiment'] = create_backend(sentiment)
+    _worker_state['relevance'] = None
+    if relevance_cache is not None:
+        from relevance import HashedTfidfEmbedder, RelevanceScorer
+        _worker_state['relevance'] = RelevanceScorer(HashedTfidfEmbedder(), cache_dir=relevance_cache)
+    if fast:
+        from analytics_utils import InterviewAnalytics
+        # Only its keyword and accuracy scorers (and their bounded matcher caches) are used
+        _worker_state['analytics'] = InterviewAnalytics(technical_keywords=taxonomy)
+
+
+def _score_full(turns):
+    """Replay turns through the live analytics, including sentiment"""
+    from analytics_utils import InterviewAnalytics
+    from sentiment import SentimentScorer
+
+    analytics = InterviewAnalytics(technical_keywords=_worker_state['taxonomy'],
+                                   sentiment_scorer=SentimentScorer(_worker_state['sentiment']))
+    rows = []
+    for turn, response_time in zip(turns, _response_times(turns)):
+        rows.append(analytics.analyze_response(turn['answer'], turn['question'], response_time))
+    return rows
+
+
+def _score_fast(turns):
+    """The live analytics' text metrics without TextBlob; sentiment is filled in per batch"""
+    analytics = _worker_state['analytics']
+    rows = []
+    for turn, response_time in zip(turns, _response_times(turns)):
+        answer = turn['answer'] or ''
+        rows.append({
+            'response_times': response_time,
+            'answer_lengths': float(len(answer.split())),
+            'sentiment_scores': float('nan'),
+            **analytics.score_text(turn['question'], answer)
+        })
+    return rows
+
+
+def _response_times(turns):
+    """Seconds between each question and its answer (0 when unknown)"""
+    asked = pd.to_datetime(pd.Series([t['question_time'] for t in turns], dtype=object), errors='coerce')
+    answered = pd.to_datetime(pd.Series([t['answer_time'] for t in turns], dtype=object), errors='coerce')
+    return (answered - asked).dt.total_seconds().fillna(0).clip(lower=0).tolist()
+
+
+def score_recordings(paths):
+    """Worker task: score a batch of recordings and return (session_ids, rows)"""
+    session_ids = []
+    rows = []
+    questions = []
+    answers = []
+    for session_id, path in paths:
+        try:
+            session_data = load_recording(path)
+            turns = extract_turns(session_data)
+            scored = (_score_fast(turns) if _worker_state['fast'] else _score_full(turns)) if turns else []
+        except Exception as e:
+            # One bad recording must not abort the run; it stays out of the manifest
+            print(f"Skipping {session_id}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+
+        if turns:
+            for index, metrics in enumerate(scored):
+                rows.append({
+                    'session_id': session_id,
+                    'username': session_data.get('username'),
+                    'model_used': session_data.get('model_used'),
+                    'start_time': session_data.get('start_time'),
+                    'turn_index': index,
+                    **metrics
+                })
+            questions.extend(turn['question'] for turn in turns)
+            answers.extend(turn['answer'] for turn in turns)
+        session_ids.append(session_id)
+
+    if _worker_state['fast'] and _worker_state['sentiment'] is not None and rows:
+        # One vectorized call for every answer in the batch
+        for row, score in zip(rows, _worker_state['sentiment'].score_batch(answers)):
+            row['sentiment_scores'] = float(score)
+    if _worker_state['relevance'] is not None and rows:
+        # One cosine-similarity product for the whole batch
+        for row, score in zip(rows, _worker_state['relevance'].score_batch(questions, answers)):
+            row['relevance'] = float(score)
+    return session_ids, rows
+
+
+def _load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _write_part(output_dir, rows, part_number):
+    """Write one part file, as Parquet when a Parquet engine is installed"""
+    frame = pd.DataFrame(rows)
+    base = os.path.join(output_dir, f"part-{part_number:05d}")
+    try:
+        frame.to_parquet(f"{base}.parquet.tmp", index=False)
+        os.replace(f"{base}.parquet.tmp", f"{base}.parquet")
+    except ImportError:
+        frame.to_csv(f"{base}.csv.gz.tmp", index=False, compression='gzip')
+        os.replace(f"{base}.csv.gz.tmp", f"{base}.csv.gz")
+
+
+def _next_part_number(output_dir):
+    parts = [name for name in os.listdir(output_dir) if name.startswith('part-')]
+    return max((int(name[5:10]) for name in parts), default=-1) + 1
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(recordings_dir, output_dir, workers=None, batch_size=50, fast=False, taxonomy=None, sentiment='textblob',
+        relevance_cache=None):
+    """Re-score all recordings not yet in the output manifest.
+
+    With relevance_cache (an embedding cache directory), each turn also gets
+    the hashed TF-IDF relevance of its answer to its question.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    completed = _load_manifest(output_dir)
+    pending = [item for item in iter_recordings(recordings_dir) if item[0] not in completed]
+    total = len(pending)
+    print(f"{len(completed)} sessions already scored, {total} to go", file=sys.stderr)
+    if not total:
+        return 0
+
+    part_number = _next_part_number(output_dir)
+    done = 0
+    started = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(taxonomy or DEFAULT_TECHNICAL_KEYWORDS, fast, sentiment,
+                                       relevance_cache)) as pool, \
+            open(os.path.join(output_dir, MANIFEST_FILE), 'a') as manifest:
+        futures = [pool.submit(score_recordings, batch) for batch in _batches(pending, batch_size)]
+        for future in as_completed(futures):
+            try:
+                session_ids, rows = future.result()
+            except Exception as e:
+                # E.g. a crashed worker; the batch's sessions are retried on the next run
+                print(f"\nBatch failed: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            if rows:
+                _write_part(output_dir, rows, part_number)
+                part_number += 1
+            # Sessions are marked complete only after their rows are on disk
+            manifest.write("".join(f"{session_id}\n" for session_id in session_ids))
+            manifest.flush()
+
+            done += len(session_ids)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = (total - done) / rate if rate else 0.0
+            print(f"\r{done}/{total} sessions ({rate:.1f}/s, ETA {eta:.0f}s)", end='', file=sys.stderr)
+
+    print(file=sys.stderr)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded interviews with the current analytics")
+    parser.add_argument('--recordings-dir', default=os.path.join("interview_sessions", "recordings"))
+    parser.add_argument('--output', required=True, help="Output directory for part files")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=50, help="Recordings per worker task")
+    parser.add_argument('--fast', action='store_true',
+                        help="Text metrics without TextBlob; sentiment from the lexicon backend")
+    parser.add_argument('--sentiment', choices=['textblob', 'lexicon'], default='textblob',
+                        help="Sentiment backend for the full analytics replay")
+    parser.add_argument('--relevance', action='store_true',
+                        help="Add answer relevance from the built-in hashed TF-IDF embedder")
+    parser.add_argument('--embedding-cache', default=os.path.join("interview_sessions", "cache", "embeddings"))
+    parser.add_argument('--config', default="model_config.json", help="Model config holding the keyword taxonomy")
+    args = parser.parse_args()
+
+    taxonomy = None
+    if os.path.exists(args.config):
+        from model_config import ModelManager
+        taxonomy = ModelManager(args.config).get_keyword_taxonomy()
+
+    run(args.recordings_dir, args.output, args.workers, args.batch_size, args.fast, taxonomy, args.sentiment,
+        args.embedding_cache if args.relevance else None)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""Cache of interviewer replies for repeated candidate inputs.
+
+Practice interviews see the same inputs over and over ("hello", "can you
+repeat the question", a rehearsed STAR answer). ResponseCache answers
+them without an LLM call, in two tiers:
+
+* exact: keyed by the scope, the model, its resolved configuration (system
+  prompt, temperature), the question being answered and the normalized
+  input; an in-memory LRU in front of a bounded SQLite table shared by
+  workers
+* near-duplicate (opt-in): 64-bit SimHash signatures of the input,
+  looked up through eight 8-bit LSH bands and accepted within a small
+  Hamming distance, for answers that differ only in wording details
+  (a few words added or swapped move a short answer 0-10 bits, unrelated
+  answers are 20+ bits apart; the default of 7 prefers a miss to a wrong
+  reply)
+
+A reply also depends on the candidate's resume and the conversation so
+far, so by default ("scope": "session") it is only reused within the
+interview it was given in. "resume" shares replies between interviews on
+the same resume (a candidate rehearsing), and "global" between everyone
+(e.g. scripted load tests); both are opt-in.
+
+Models whose temperature is above max_temperature, or whose config sets
+"response_cache": false, are never cached: their replies are meant to
+vary. Hits, misses and bypasses are counted in the metrics registry.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
+
+import numpy as np
+
+from keyword_matcher import tokenize
+from metrics import inc
+from model_config import DEFAULT_RESPONSE_CACHE_POLICY
+
+SIMHASH_BITS = 64
+# Signatures within BANDS - 1 bits share at least one band, so max_distance should stay below BANDS
+BANDS = 8
+BAND_BITS = SIMHASH_BITS // BANDS
+_BIT_POSITIONS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def normalize_input(text):
+    """Lowercase, collapse whitespace and drop surrounding punctuation"""
+    return re.sub(r'\s+', ' ', text.lower()).strip(" \t\n.,!?;:'\"")
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(tokens):
+    """64-bit SimHash over words and word pairs"""
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return sum(1 << int(i) for i in np.flatnonzero(votes > 0))
+
+
+def _bands(signature):
+    return [(signature >> (i * BAND_BITS)) & ((1 << BAND_BITS) - 1) for i in range(BANDS)]
+
+
+def _signed(value):
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class ResponseCache:
+    """Two-tier (exact, near-duplicate) cache of LLM replies"""
+
+    def __init__(self, db_path="interview_sessions/cache/responses.db", policy=None):
+        self.db_path = db_path
+        self.policy = dict(DEFAULT_RESPONSE_CACHE_POLICY, **(policy or {}))
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.counts = {'exact': 0, 'near': 0, 'miss': 0, 'bypass': 0}
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    context TEXT NOT NULL,
+                    simhash INTEGER,
+                    {", ".join(f"b{band} INTEGER" for band in range(BANDS))},
+                    reply TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            for band in range(BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_responses_b{band} ON responses (context, b{band})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def configure(self, policy):
+        """Apply the response_cache section of the model config"""
+        self.policy = dict(DEFAULT_RESPONSE_CACHE_POLICY, **(policy or {}))
+        oldest = time.time() - self.policy['ttl_hours'] * 3600
+        with self.lock:
+            for key in [key for key, (_, created_at) in self.memory.items() if created_at < oldest]:
+                del self.memory[key]
+            while len(self.memory) > self.policy['memory_entries']:
+                self.memory.popitem(last=False)
+
+    def enabled_for(self, model_config):
+        """Whether replies of a model configuration may be cached"""
+        if not self.policy['enabled'] or model_config is None:
+            return False
+        if model_config.get('response_cache') is not None:
+            return bool(model_config['response_cache'])
+        return (model_config.get('temperature') or 0.0) <= self.policy['max_temperature']
+
+    def scope_key(self, session_id, resume_text):
+        """Who may share replies under the policy's scope: one interview, one resume or everyone"""
+        scope = self.policy['scope']
+        if scope == 'session':
+            return f"session:{session_id}"
+        if scope == 'resume':
+            return "resume:" + hashlib.sha256((resume_text or '').encode('utf-8')).hexdigest()
+        if scope == 'global':
+            return "global"
+        raise ValueError(f"Unknown response cache scope: {scope}")
+
+    @staticmethod
+    def context_key(model_name, model_config, question, scope=''):
+        """What the reply depends on besides the input: scope, model, resolved prompt and question"""
+        payload = json.dumps([scope, model_name, model_config.get('system_prompt', ''),
+                              model_config.get('temperature'), re.sub(r'\s+', ' ', question).strip()])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _key(context, normalized):
+        return hashlib.sha256(f"{context}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, reply, created_at):
+        with self.lock:
+            self.memory[key] = (reply, created_at)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.policy['memory_entries']:
+                self.memory.popitem(last=False)
+
+    def _count(self, outcome):
+        with self.lock:
+            self.counts[outcome] += 1
+        inc(f"response_cache.{outcome}")
+
+    def get(self, model_name, model_config, question, user_input, scope=''):
+        """Cached reply as (reply, 'exact' | 'near'), or (None, None); scope comes from scope_key()"""
+        if not self.enabled_for(model_config):
+            self._count('bypass')
+            return None, None
+
+        context = self.context_key(model_name, model_config, question, scope)
+        normalized = normalize_input(user_input)
+        key = self._key(context, normalized)
+        now = time.time()
+        oldest = now - self.policy['ttl_hours'] * 3600
+
+        with self.lock:
+            reply, created_at = self.memory.get(key, (None, None))
+            if reply is not None and created_at < oldest:
+                del self.memory[key]
+                reply = None
+            elif reply is not None:
+                self.memory.move_to_end(key)
+        if reply is not None:
+            self._count('exact')
+            return reply, 'exact'
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT reply, created_at FROM responses WHERE key = ? AND created_at >= ?",
+                               (key, oldest)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._remember(key, row[0], row[1])
+                self._count('exact')
+                return row[0], 'exact'
+
+            tokens = tokenize(normalized)
+            if self.policy['near_duplicates'] and len(tokens) >= self.policy['min_tokens']:
+                signature = simhash(tokens)
+                bands = _bands(signature)
+                candidates = conn.execute(
+                    "SELECT key, simhash, reply FROM responses WHERE context = ? AND created_at >= ? AND ("
+                    + " OR ".join(f"b{band} = ?" for band in range(BANDS)) + ")",
+                    (context, oldest, *bands)
+                ).fetchall()
+                best = None
+                for candidate_key, candidate_signature, candidate_reply in candidates:
+                    if candidate_signature is None:
+                        continue
+                    distance = bin((candidate_signature & ((1 << 64) - 1)) ^ signature).count('1')
+                    if distance <= self.policy['max_distance'] and (best is None or distance < best[0]):
+                        best = (distance, candidate_key, candidate_reply)
+                if best is not None:
+                    conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, best[1]))
+                    self._count('near')
+                    return best[2], 'near'
+
+        self._count('miss')
+        return None, None
+
+    def put(self, model_name, model_config, question, user_input, reply, scope=''):
+        if not self.enabled_for(model_config):
+            return
+        context = self.context_key(model_name, model_config, question, scope)
+        normalized = normalize_input(user_input)
+        key = self._key(context, normalized)
+        tokens = tokenize(normalized)
+        signature = simhash(tokens) if len(tokens) >= self.policy['min_tokens'] else None
+        bands = _bands(signature) if signature is not None else [None] * BANDS
+        now = time.time()
+
+        self._remember(key, reply, now)
+        with closing(self._connect()) as conn, conn:
+            row = (key, context, _signed(signature) if signature is not None else None, *bands, reply, now, now)
+            conn.execute(f"INSERT OR REPLACE INTO responses VALUES ({','.join('?' * len(row))})", row)
+        self.puts += 1
+        if self.puts % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then the least recently used beyond disk_entries"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM responses WHERE created_at < ?",
+                         (time.time() - self.policy['ttl_hours'] * 3600,))
+            conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.policy['disk_entries'],))
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Lookup outcomes in this process and the hit rate among cacheable lookups"""
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts['exact'] + counts['near'] + counts['miss']
+        counts['hit_rate'] = (counts['exact'] + counts['near']) / lookups if lookups else 0.0
+        counts['memory_entries'] = len(self.memory)
+        return counts
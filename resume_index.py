@@ -0,0 +1,133 @@
+import numpy as np
+
+from keyword_matcher import tokenize
+
+SECTION_HEADINGS = {
+    'summary', 'profile', 'objective', 'about', 'experience', 'work experience',
+    'professional experience', 'employment', 'employment history', 'education',
+    'skills', 'technical skills', 'projects', 'certifications', 'achievements',
+    'awards', 'publications', 'languages', 'interests', 'activities', 'internships',
+    'volunteer', 'leadership', 'courses', 'training'
+}
+
+
+def estimate_tokens(text):
+    """Rough LLM token estimate (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _is_heading(line):
+    stripped = line.strip().rstrip(':').strip()
+    if not stripped or len(stripped.split()) > 4:
+        return False
+    if stripped.lower() in SECTION_HEADINGS:
+        return True
+    return stripped.isupper() and any(ch.isalpha() for ch in stripped)
+
+
+def split_sections(resume_text):
+    """Split resume text into (heading, body) sections using common headings"""
+    sections = []
+    heading = 'Header'
+    lines = []
+    for line in resume_text.splitlines():
+        if _is_heading(line):
+            if any(l.strip() for l in lines):
+                sections.append((heading, "\n".join(lines).strip()))
+            heading = line.strip().rstrip(':').strip().title()
+            lines = []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
+
+
+def chunk_sections(sections, chunk_words=120):
+    """Break long sections into chunks of roughly chunk_words words"""
+    chunks = []
+    for heading, body in sections:
+        words = body.split()
+        for start in range(0, len(words), chunk_words):
+            chunks.append({'section': heading, 'text': " ".join(words[start:start + chunk_words])})
+    return chunks
+
+
+class ResumeIndex:
+    """BM25 index over resume chunks, built once per uploaded resume"""
+
+    def __init__(self, resume_text, chunk_words=120, k1=1.5, b=0.75):
+        self.chunks = chunk_sections(split_sections(resume_text), chunk_words)
+        self.k1 = k1
+        self.b = b
+
+        chunk_tokens = [tokenize(f"{chunk['section']} {chunk['text']}") for chunk in self.chunks]
+        self.vocabulary = {}
+        for tokens in chunk_tokens:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        term_freqs = np.zeros((len(self.chunks), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(chunk_tokens):
+            for token in tokens:
+                term_freqs[row, self.vocabulary[token]] += 1
+
+        lengths = term_freqs.sum(axis=1)
+        avg_length = lengths.mean() if len(lengths) else 0.0
+        doc_freqs = (term_freqs > 0).sum(axis=0)
+        n_chunks = len(self.chunks)
+        self.idf = np.log(1 + (n_chunks - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        # Precompute the BM25 term weight of every (chunk, term) pair
+        norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.ones_like(lengths)
+        self.weights = term_freqs * (k1 + 1) / (term_freqs + norm[:, None]) * self.idf
+        self.token_counts = np.array([estimate_tokens(chunk['text']) for chunk in self.chunks])
+
+    def score(self, query):
+        """BM25 score of every chunk for a query"""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        term_ids = [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+        if term_ids:
+            ids, counts = np.unique(term_ids, return_counts=True)
+            scores += self.weights[:, ids] @ counts.astype(np.float32)
+        return scores
+
+    def select(self, scores, k=3, token_budget=None):
+        """Pick up to k best-scoring chunks that fit the token budget, in resume order"""
+        if not self.chunks:
+            return []
+        if not scores.any():
+            # Nothing matched: fall back to the opening of the resume
+            order = np.arange(len(self.chunks))
+        else:
+            order = np.argsort(-scores, kind='stable')
+            order = order[scores[order] > 0]
+
+        selected = []
+        used = 0
+        for idx in order:
+            if len(selected) >= k:
+                break
+            cost = int(self.token_counts[idx])
+            if token_budget is not None and used + cost > token_budget:
+                continue
+            selected.append(int(idx))
+            used += cost
+        return [self.chunks[idx] for idx in sorted(selected)]
+
+    def top_chunks(self, query, k=3, token_budget=None):
+        """Most relevant chunks for a query"""
+        return self.select(self.score(query), k, token_budget)
+
+    def overview(self, token_budget=150):
+        """Opening chunks of the resume (name, headline, summary) within a token budget"""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        return self.format_chunks(self.select(scores, len(self.chunks), token_budget))
+
+    def build_context(self, query, k=3, token_budget=None):
+        """Format the most relevant resume chunks for a prompt"""
+        return self.format_chunks(self.top_chunks(query, k, token_budget))
+
+    @staticmethod
+    def format_chunks(chunks):
+        return "\n\n".join(f"[{chunk['section']}]\n{chunk['text']}" for chunk in chunks)
\ No newline at end of file
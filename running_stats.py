@@ -0,0 +1,102 @@
+"""Streaming summary statistics in constant memory."""
+from bisect import insort
+import math
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac P-square algorithm)"""
+    
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+    
+    def add(self, x):
+        h = self.heights
+        if len(h) < 5:
+            insort(h, x)
+            return
+        
+        n = self.positions
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < h[i]) - 1
+        
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = candidate
+                n[i] += d
+    
+    def _parabolic(self, i, d):
+        h, n = self.heights, self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+    
+    def value(self):
+        h = self.heights
+        if not h:
+            return 0.0
+        if len(h) < 5:
+            # Exact linear interpolation while there are too few samples to estimate
+            rank = self.p * (len(h) - 1)
+            lower = math.floor(rank)
+            upper = min(lower + 1, len(h) - 1)
+            return h[lower] + (h[upper] - h[lower]) * (rank - lower)
+        return h[2]
+
+class RunningStats:
+    """Running count, mean, variance, min/max and optional percentiles of a metric"""
+    
+    def __init__(self, percentiles=(0.5, 0.9)):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.quantiles = {p: P2Quantile(p) for p in percentiles}
+    
+    def add(self, x):
+        # Welford's update keeps mean and variance numerically stable
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        for quantile in self.quantiles.values():
+            quantile.add(x)
+    
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+    
+    def to_dict(self):
+        stats = {
+            'count': self.count,
+            'mean': self.mean,
+            'std': math.sqrt(self.variance),
+            'min': self.min if self.min is not None else 0.0,
+            'max': self.max if self.max is not None else 0.0
+        }
+        for p, quantile in self.quantiles.items():
+            stats[f"p{int(round(p * 100))}"] = quantile.value()
+        return stats
@@ -0,0 +1,413 @@
+"""Sentiment scoring backends for candidate answers.
+
+* TextBlobBackend is the reference: TextBlob(text).sentiment.polarity,
+  one answer at a time.
+* LexiconBackend scores with the same pattern sentiment lexicon TextBlob
+  ships (read straight from its data file, without importing TextBlob),
+  compiled into NumPy arrays. A batch of answers is tokenized once and
+  scored with array operations. It follows TextBlob's tokenization and its
+  rules for averaging word senses, modifiers ("very good", "really,
+  really good") and negation ("not good"), and gives the same scores,
+  except that emoticons and sarcasm marks "(!)" are not scored.
+
+SentimentScorer adds a cache keyed by a hash of the text and a background
+thread that batches submitted answers, so scoring stays off the request
+path. Check the lexicon backend against TextBlob with:
+
+    python sentiment.py --parity [--recordings-dir interview_sessions/recordings]
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+import queue
+import re
+import threading
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import span
+
+# TextBlob also lists "n't", but its tokenizer splits "wasn't" into "was n ' t", so it never applies
+NEGATIONS = ("no", "not", "never")
+PUNCTUATION = tuple(",;:!?()[]{}`'\"@#$^&*+-|=~_")
+QUOTES = ("\u201c", "\u201d", "\u2018", "\u2019", "'", '"')
+ABBREVIATIONS = frozenset((
+    "a.", "adj.", "adv.", "al.", "a.m.", "c.", "cf.", "comp.", "conf.", "def.", "ed.", "e.g.", "esp.", "etc.",
+    "ex.", "f.", "fig.", "gen.", "id.", "i.e.", "int.", "l.", "m.", "Med.", "Mil.", "Mr.", "n.", "n.q.",
+    "orig.", "pl.", "pred.", "pres.", "p.m.", "ref.", "v.", "vs.", "w/"
+))
+ABBREVIATION_PATTERNS = (
+    re.compile(r"^[A-Za-z]\.$"),
+    re.compile(r"^([A-Za-z]\.)+$"),
+    re.compile(r"^[A-Z][b|c|d|f|g|h|j|k|l|m|n|p|q|r|s|t|v|w|x|z]+.$")
+)
+
+
+def tokenize(text):
+    """Lowercased words the way TextBlob's find_tokens splits them.
+
+    Contractions and quotes become tokens of their own ("wasn't" -> was n ' t),
+    leading and trailing punctuation is split off, and periods stay on
+    abbreviations ("e.g.", "U.S.").
+    """
+    text = text.replace("n't", " n't")
+    for quote in QUOTES:
+        text = text.replace(quote, f" {quote} ")
+    tokens = []
+    for token in text.split():
+        while token.startswith(PUNCTUATION):
+            tokens.append(token[0])
+            token = token[1:]
+        tail = []
+        while token.endswith(PUNCTUATION + (".",)):
+            if token.endswith(PUNCTUATION):
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith("..."):
+                tail.append("...")
+                token = token[:-3].rstrip(".")
+            if token.endswith("."):
+                if token in ABBREVIATIONS or any(pattern.match(token) for pattern in ABBREVIATION_PATTERNS):
+                    break
+                tail.append(".")
+                token = token[:-1]
+        if token:
+            tokens.append(token)
+        tokens.extend(reversed(tail))
+    return [token.lower() for token in tokens]
+
+
+SAMPLE_ANSWERS = [
+    "I really enjoyed leading the migration, it was a great learning experience.",
+    "The project was not successful and the deadline was terrible.",
+    "I built a REST API in Django with PostgreSQL.",
+    "Honestly I don't think that approach is good, it was very slow and buggy.",
+    "We had a bad outage but the team handled it extremely well.",
+    "I am not sure. I never used Kubernetes in production.",
+    "It was an amazing team and I was very happy with the results!",
+    "The code was messy, so I refactored it into small, clean modules.",
+]
+
+
+class TextBlobBackend:
+    """Reference implementation: TextBlob's pattern analyzer, one text at a time"""
+
+    name = 'textblob'
+
+    def score(self, text):
+        from textblob import TextBlob
+        return TextBlob(text).sentiment.polarity
+
+    def score_batch(self, texts):
+        return np.array([self.score(text) for text in texts], dtype=np.float64)
+
+
+def find_textblob_lexicon():
+    """Path of TextBlob's en-sentiment.xml, located without importing textblob"""
+    spec = importlib.util.find_spec('textblob')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(list(spec.submodule_search_locations)[0], 'en', 'en-sentiment.xml')
+    return path if os.path.exists(path) else None
+
+
+def load_pattern_lexicon(path):
+    """Word -> (polarity, intensity, is_modifier), averaged the way pattern does"""
+    senses = {}
+    for word in ElementTree.parse(path).getroot().findall('word'):
+        form = word.attrib.get('form')
+        if not form:
+            continue
+        scores = (float(word.attrib.get('polarity', 0.0)), float(word.attrib.get('intensity', 1.0)))
+        senses.setdefault(form, {}).setdefault(word.attrib.get('pos'), []).append(scores)
+
+    lexicon = {}
+    for form, by_pos in senses.items():
+        # Average the senses per part of speech, then across parts of speech
+        per_pos = {pos: np.mean(scores, axis=0) for pos, scores in by_pos.items()}
+        polarity, intensity = np.mean(list(per_pos.values()), axis=0)
+        lexicon[form] = [float(polarity), float(intensity), 'RB' in per_pos, per_pos]
+
+    # Like TextBlob, derive adverbs from adjectives ("terrible" -> "terribly")
+    for form, (_, _, _, per_pos) in list(lexicon.items()):
+        if 'JJ' in per_pos:
+            stem = form[:-1] + 'i' if form.endswith('y') else form
+            stem = stem[:-2] if stem.endswith('le') else stem
+            polarity, intensity = per_pos['JJ']
+            lexicon[stem + 'ly'] = [float(polarity), float(intensity), True, {}]
+
+    return {form: tuple(values[:3]) for form, values in lexicon.items()}
+
+
+class LexiconBackend:
+    """Vectorized pattern-lexicon scorer; scores many answers in one call"""
+
+    name = 'lexicon'
+
+    def __init__(self, lexicon_path=None):
+        lexicon_path = lexicon_path or find_textblob_lexicon()
+        if lexicon_path is None:
+            raise FileNotFoundError("Sentiment lexicon not found; install textblob or pass lexicon_path")
+        lexicon = load_pattern_lexicon(lexicon_path)
+
+        # Id 0 is "unknown word"; negations get ids too so they can be flagged
+        words = sorted(set(lexicon) | set(NEGATIONS) | {'!'})
+        self.vocab = {word: i + 1 for i, word in enumerate(words)}
+        size = len(words) + 1
+        self.known = np.zeros(size, dtype=bool)
+        self.polarity = np.zeros(size, dtype=np.float64)
+        self.intensity = np.ones(size, dtype=np.float64)
+        self.modifier = np.zeros(size, dtype=bool)
+        self.adverb = np.zeros(size, dtype=bool)
+        self.negation = np.zeros(size, dtype=bool)
+        for word, i in self.vocab.items():
+            if word in lexicon:
+                self.known[i] = True
+                self.polarity[i], self.intensity[i], self.modifier[i] = lexicon[word]
+            self.adverb[i] = word.endswith('ly')
+            self.negation[i] = word in NEGATIONS
+
+    def _encode(self, texts):
+        """Token ids for all texts, concatenated, each token's text index and its lengths"""
+        ids, docs, lengths, stripped = [], [], [], []
+        vocab = self.vocab
+        for doc, text in enumerate(texts):
+            for token in tokenize(text):
+                ids.append(vocab.get(token, 0))
+                docs.append(doc)
+                lengths.append(len(token))
+                stripped.append(len(token.strip("'")))
+        return (np.array(ids, dtype=np.int32), np.array(docs, dtype=np.int32),
+                np.array(lengths, dtype=np.int32), np.array(stripped, dtype=np.int32))
+
+    @staticmethod
+    def _last_before(mask):
+        """Index of the latest True strictly before each position, -1 if none"""
+        positions = np.where(mask, np.arange(len(mask)), -1)
+        last = np.maximum.accumulate(positions)
+        return np.concatenate(([-1], last[:-1]))
+
+    def score_batch(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0, dtype=np.float64)
+        ids, docs, lengths, stripped = self._encode(texts)
+        if not len(ids):
+            return np.zeros(len(texts), dtype=np.float64)
+
+        # TextBlob scans the words keeping a pending modifier ("very") and a pending
+        # negation ("not"); each is the latest word that set it, unless a word that
+        # clears it came since. Short words in between keep both: "not a good",
+        # "really, really good".
+        known = self.known[ids]
+        negation = self.negation[ids]
+        modifier = known & self.modifier[ids]
+
+        def pending(sets, clears):
+            source = self._last_before(sets)
+            valid = (source >= 0) & (source > self._last_before(clears))
+            valid &= docs[np.maximum(source, 0)] == docs
+            return np.maximum(source, 0), valid
+
+        # A long unknown word drops the modifier, except that a negation after an -ly
+        # modifier negates the modifier's assessment right away and leaves it pending
+        # ("really not good").
+        adverb = self.adverb[ids]
+        long_unknown = ~known & (lengths > 2)
+        modifier_source, has_modifier = pending(modifier, (known & ~modifier) | (long_unknown & ~negation))
+        has_modifier &= adverb[modifier_source] | (modifier_source > self._last_before(long_unknown & negation))
+        reverses = ~known & negation & has_modifier & adverb[modifier_source]
+        _, negated = pending(negation & ~reverses, (~negation & (known | (stripped > 1))) | reverses)
+        negated &= known
+
+        # A known word after a pending modifier joins its assessment, scaled by the
+        # previous word's intensity (inverted when that word was negated): "very good",
+        # "not very good". Only the last word of a chain sets the polarity.
+        merged = known & has_modifier
+        chain = np.cumsum(known & ~merged) - 1
+        previous = self._last_before(known)
+        intensity = self.intensity[ids]
+        factor = np.where(negated, 1.0 / intensity, intensity)
+        polarity = self.polarity[ids]
+        polarity = np.where(merged, np.clip(polarity * factor[np.maximum(previous, 0)], -1.0, 1.0), polarity)
+
+        words = np.flatnonzero(known)
+        if not len(words):
+            return np.zeros(len(texts), dtype=np.float64)
+        chains = chain[words]
+        last_word = np.append(chains[1:] != chains[:-1], True)
+        heads = words[last_word]
+        chain_count = len(heads)
+
+        chain_negated = np.zeros(chain_count, dtype=bool)
+        chain_negated[chain[words[negated[words]]]] = True
+        chain_negated[chain[previous[reverses]]] = True
+
+        # Each "!" boosts the latest assessment in its text, unless a later word joins it
+        boosts = (ids == self.vocab['!']) & (previous >= 0)
+        boosts &= docs[np.maximum(previous, 0)] == docs
+        boosts &= np.isin(previous, heads)
+        boost_counts = np.bincount(chain[previous[boosts]], minlength=chain_count)
+        assessment = np.clip(polarity[heads] * 1.25 ** boost_counts, -1.0, 1.0)
+        assessment = np.where(chain_negated, assessment * -0.5, assessment)
+
+        head_docs = docs[heads]
+        totals = np.bincount(head_docs, weights=assessment, minlength=len(texts))
+        counts = np.bincount(head_docs, minlength=len(texts)).astype(np.float64)
+        return np.divide(totals, counts, out=np.zeros(len(texts)), where=counts > 0)
+
+    def score(self, text):
+        return float(self.score_batch([text])[0])
+
+
+BACKENDS = {'lexicon': LexiconBackend, 'textblob': TextBlobBackend}
+
+
+def create_backend(name='lexicon'):
+    """Build a backend by name; falls back to TextBlob if the lexicon is unavailable"""
+    if name == 'lexicon':
+        try:
+            return LexiconBackend()
+        except FileNotFoundError:
+            return TextBlobBackend()
+    return BACKENDS[name]()
+
+
+class SentimentScorer:
+    """Cached, batching front for a backend.
+
+    score()/score_batch() run inline; submit() returns a Future that a
+    background thread resolves, scoring everything queued at that moment
+    in one batch.
+    """
+
+    def __init__(self, backend, cache_size=4096, max_batch=256):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.worker = None
+
+    def _key(self, text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def _cached(self, key):
+        with self.lock:
+            value = self.cache.get(key)
+            if value is not None:
+                self.cache.move_to_end(key)
+            return value
+
+    def _store(self, key, value):
+        with self.lock:
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def score_batch(self, texts):
+        keys = [self._key(text) for text in texts]
+        scores = [self._cached(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = self.backend.score_batch([texts[i] for i in missing])
+            for i, value in zip(missing, fresh):
+                scores[i] = float(value)
+                self._store(keys[i], scores[i])
+        return scores
+
+    def score(self, text):
+        return self.score_batch([text])[0]
+
+    def submit(self, text):
+        """Score in the background; returns a concurrent.futures.Future"""
+        future = Future()
+        cached = self._cached(self._key(text))
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        self.requests.put((text, future))
+        if self.worker is None:
+            with self.lock:
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self._run, daemon=True)
+                    self.worker.start()
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with span('sentiment.batch'):
+                    scores = self.score_batch([text for text, _ in batch])
+                for (_, future), score in zip(batch, scores):
+                    future.set_result(score)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+def parity_report(texts, candidate=None, reference=None):
+    """Compare a backend against TextBlob on the given texts"""
+    candidate = candidate or LexiconBackend()
+    reference = reference or TextBlobBackend()
+    expected = reference.score_batch(texts)
+    actual = candidate.score_batch(texts)
+    errors = np.abs(expected - actual)
+    same_sign = np.sign(np.round(expected, 3)) == np.sign(np.round(actual, 3))
+    return {
+        'count': len(texts),
+        'mean_abs_error': float(errors.mean()) if len(texts) else 0.0,
+        'max_abs_error': float(errors.max()) if len(texts) else 0.0,
+        'sign_agreement': float(same_sign.mean()) if len(texts) else 1.0,
+        'exact': float((errors < 1e-9).mean()) if len(texts) else 1.0,
+        'worst': [texts[i] for i in np.argsort(-errors)[:5]]
+    }
+
+
+def _recorded_answers(recordings_dir):
+    from rescore import extract_turns, iter_recordings, load_recording
+    answers = []
+    for _, path in iter_recordings(recordings_dir):
+        answers.extend(turn['answer'] for turn in extract_turns(load_recording(path)))
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment backends")
+    parser.add_argument('--parity', action='store_true', help="Compare the lexicon backend with TextBlob")
+    parser.add_argument('--recordings-dir', help="Use recorded answers instead of the built-in samples")
+    parser.add_argument('--max-mean-error', type=float, default=0.05)
+    parser.add_argument('--min-sign-agreement', type=float, default=0.9)
+    args = parser.parse_args()
+
+    if not args.parity:
+        parser.print_help()
+        return
+
+    texts = _recorded_answers(args.recordings_dir) if args.recordings_dir else SAMPLE_ANSWERS
+    report = parity_report(texts)
+    for key in ('count', 'mean_abs_error', 'max_abs_error', 'sign_agreement', 'exact'):
+        print(f"{key:<16} {report[key]:.4f}" if isinstance(report[key], float) else f"{key:<16} {report[key]}")
+    print("largest differences:")
+    for text in report['worst']:
+        print(f"  {text[:100]}")
+
+    if report['mean_abs_error'] > args.max_mean_error or report['sign_agreement'] < args.min_sign_agreement:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
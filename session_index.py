@@ -0,0 +1,169 @@
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+
+from recording_store import RecordingStore
+
+COLUMNS = "session_id, username, start_time, end_time, model_used, interaction_count"
+# index_meta key set once the catalog holds every recording made before it (or its current schema) existed
+SYNCED_KEY = 'synced'
+
+
+class SessionIndex:
+    """SQLite catalog of recorded sessions holding only their summary fields"""
+
+    # Databases whose schema this process has already ensured
+    initialized_paths = set()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.synced = False
+        if os.path.abspath(db_path) in SessionIndex.initialized_paths:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    model_used TEXT,
+                    interaction_count INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if 'interaction_count' not in columns:
+                # Catalogs from before the column are rebuilt once to fill it in
+                conn.execute("ALTER TABLE sessions ADD COLUMN interaction_count INTEGER")
+                conn.execute("DELETE FROM index_meta WHERE key = ?", (SYNCED_KEY,))
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_sessions_user_start
+                ON sessions (username, start_time DESC)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_sessions_start
+                ON sessions (start_time DESC)
+            """)
+        SessionIndex.initialized_paths.add(os.path.abspath(db_path))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add_session(self, session_id, session_data):
+        """Insert or replace the summary row for a session"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, session_data['username'], session_data['start_time'],
+                 session_data['end_time'], session_data['model_used'], len(session_data.get('interactions', [])))
+            )
+
+    def remove_session(self, session_id):
+        """Remove a session from the catalog"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def list_sessions(self, username=None, limit=None, offset=0):
+        """List session summaries newest first, optionally for one user and paginated"""
+        query = f"SELECT {COLUMNS} FROM sessions"
+        params = []
+        if username is not None:
+            query += " WHERE username = ?"
+            params.append(username)
+        query += " ORDER BY start_time DESC"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+
+        with closing(self._connect()) as conn, conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def count_sessions(self, username=None):
+        """Count indexed sessions, optionally for one user"""
+        with closing(self._connect()) as conn, conn:
+            if username is None:
+                row = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT COUNT(*) FROM sessions WHERE username = ?", (username,)
+                ).fetchone()
+        return row[0]
+
+    def needs_rebuild(self):
+        """Whether the catalog has not been synced with the recordings on disk since it was created or migrated"""
+        if self.synced:
+            # Only a schema migration by a newer version clears the flag again
+            return False
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM index_meta WHERE key = ?", (SYNCED_KEY,)).fetchone()
+        self.synced = row is not None
+        return not self.synced
+
+    def mark_synced(self):
+        """Record that the catalog is complete, e.g. when there were no recordings to index"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO index_meta VALUES (?, '1')", (SYNCED_KEY,))
+        self.synced = True
+
+    def rebuild(self, recordings_dir):
+        """Sync the catalog with the recordings on disk, reading only their headers.
+
+        Rows are upserted rather than recreated, and only rows whose
+        recording is gone are deleted, so sessions other workers add
+        meanwhile are kept.
+        """
+        store = RecordingStore(recordings_dir)
+        rows = []
+        for session_id, path in store.iter_sessions():
+            header = store.read_header(session_id, path)
+            rows.append((session_id, header['username'], header['start_time'],
+                         header['end_time'], header['model_used'], header['interaction_count']))
+        scanned = {row[0] for row in rows}
+
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(f"INSERT OR REPLACE INTO sessions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+                stale = []
+                for (session_id,) in conn.execute("SELECT session_id FROM sessions").fetchall():
+                    if session_id in scanned:
+                        continue
+                    try:
+                        store.path(session_id)
+                    except FileNotFoundError:
+                        stale.append((session_id,))
+                conn.executemany("DELETE FROM sessions WHERE session_id = ?", stale)
+                conn.execute("INSERT OR REPLACE INTO index_meta VALUES (?, '1')", (SYNCED_KEY,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.synced = True
+        return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the interview session catalog")
+    parser.add_argument('command', choices=['rebuild', 'count'])
+    parser.add_argument('--base-dir', default="interview_sessions")
+    args = parser.parse_args()
+
+    index = SessionIndex(os.path.join(args.base_dir, "sessions.db"))
+    if args.command == 'rebuild':
+        count = index.rebuild(os.path.join(args.base_dir, "recordings"))
+        print(f"Indexed {count} sessions")
+    else:
+        print(index.count_sessions())
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,34 +1,102 @@
-import json
 from datetime import datetime
 import os
+import secrets
+import time
+from analytics_warehouse import AnalyticsWarehouse
+from metrics import span
+from recording_store import RecordingStore
+from session_index import SessionIndex
+from session_state import FileStateBackend
 
 class InterviewRecorder:
-    def __init__(self, base_dir="interview_sessions"):
+    def __init__(self, base_dir="interview_sessions", flush_every=1, flush_interval=5.0, fsync=False,
+                 state_backend=None):
         self.base_dir = base_dir
         self.current_session = None
         self.session_data = None
+        # The live session's interactions; the engine and UI read this single transcript
+        self.interactions = []
+        # Events in the session log as of this recorder's last write or resume
+        self.event_count = 0
         self._ensure_directory_exists()
+        self.state = state_backend or FileStateBackend(os.path.join(self.base_dir, "journals"), flush_every,
+                                                       flush_interval, fsync)
+        self.index = SessionIndex(os.path.join(self.base_dir, "sessions.db"))
+        self.store = RecordingStore(os.path.join(self.base_dir, "recordings"))
+        self.warehouse = AnalyticsWarehouse(os.path.join(self.base_dir, "warehouse.db"))
     
     def _ensure_directory_exists(self):
         """Create the base directory if it doesn't exist"""
-        if not os.path.exists(self.base_dir):
-            os.makedirs(self.base_dir)
-            os.makedirs(os.path.join(self.base_dir, "recordings"))
+        os.makedirs(os.path.join(self.base_dir, "recordings"), exist_ok=True)
+    
+    def _append_event(self, event):
+        """Append one event to the session log"""
+        with span('recorder.append'):
+            self.state.append(self.current_session, event)
+            self.event_count += 1
+    
+    def flush(self):
+        """Push buffered log events to the backend"""
+        if self.current_session is not None:
+            self.state.flush(self.current_session)
     
     def start_session(self, username):
         """Start a new interview session"""
-        self.current_session = f"{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if self.current_session is not None:
+            # An unfinished session is left as an orphaned log for recovery
+            self.state.close(self.current_session)
+        
+        # The random suffix keeps sessions started in the same second from sharing a log
+        self.current_session = f"{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
         self.session_data = {
             'username': username,
             'start_time': datetime.now().isoformat(),
-            'interactions': [],
-            'resume_text': '',
             'model_used': '',
-            'end_time': None,
-            'analytics': None
+            'interaction_count': 0
+        }
+        self.interactions = []
+        self.event_count = 0
+        self._append_event({
+            'event': 'start',
+            'username': username,
+            'start_time': self.session_data['start_time']
+        })
+    
+    def resume_session(self, session_id, username=None):
+        """Continue a live session from its log, e.g. after a worker restart or in another process.
+        
+        Raises ValueError if the session has ended or (with username)
+        belongs to someone else. Returns the replayed session dict, with the
+        per-turn analytics and routing records the engine needs to rebuild
+        its own state.
+        """
+        try:
+            events = self.state.read(session_id)
+        except FileNotFoundError:
+            raise ValueError(f"No live session {session_id}") from None
+        session_data = self._replay_events(events, live=True)
+        if (session_data['start_time'] is None or session_data['end_time'] is not None
+                or (username is not None and session_data['username'] != username)):
+            raise ValueError(f"No live session {session_id}")
+        
+        if self.current_session is not None and self.current_session != session_id:
+            self.state.close(self.current_session)
+        self.current_session = session_id
+        self.session_data = {
+            'username': session_data['username'],
+            'start_time': session_data['start_time'],
+            'model_used': session_data['model_used'],
+            'interaction_count': len(session_data['interactions'])
         }
+        self.interactions = session_data['interactions']
+        self.event_count = len(events)
+        return session_data
     
-    def record_interaction(self, role, content, timestamp=None):
+    def is_stale(self):
+        """Whether another process has written to the live session since this recorder last did"""
+        return self.current_session is not None and self.state.length(self.current_session) != self.event_count
+    
+    def record_interaction(self, role, content, timestamp=None, metadata=None):
         """Record a single interaction in the session"""
         if not self.session_data:
             raise ValueError("No active session")
@@ -41,67 +109,184 @@ class InterviewRecorder:
             'content': content,
             'timestamp': timestamp
         }
+        if metadata:
+            interaction['metadata'] = metadata
         
-        self.session_data['interactions'].append(interaction)
+        self._append_event({'event': 'interaction', 'interaction': interaction})
+        self.interactions.append(interaction)
+        self.session_data['interaction_count'] += 1
+    
+    def record_turn(self, interaction_index, metrics):
+        """Store a turn's analytics samples, so a resumed session keeps its running analytics"""
+        if self.session_data:
+            self._append_event({'event': 'turn', 'interaction': interaction_index, 'metrics': metrics})
+    
+    def get_interactions(self):
+        """The interactions recorded so far in the current session"""
+        return list(self.interactions)
     
     def set_resume_text(self, resume_text):
         """Store the resume text used in the session"""
         if self.session_data:
-            self.session_data['resume_text'] = resume_text
+            self._append_event({'event': 'set', 'field': 'resume_text', 'value': resume_text})
+    
+    def set_model_used(self, model_name, routing=None):
+        """Store the AI model used in the session, or with routing, the model that served one call"""
+        if not self.session_data:
+            return
+        if routing is not None:
+            # The selected model stays model_used; routed calls are counted per serving model
+            self._append_event({'event': 'routing', 'model': model_name, 'routing': routing})
+            return
+        self.session_data['model_used'] = model_name
+        self._append_event({'event': 'set', 'field': 'model_used', 'value': model_name})
     
-    def set_model_used(self, model_name):
-        """Store the AI model used in the session"""
+    def set_target_role(self, target_role):
+        """Store the role the candidate is interviewing for"""
         if self.session_data:
-            self.session_data['model_used'] = model_name
+            self._append_event({'event': 'set', 'field': 'target_role', 'value': target_role})
     
     def add_analytics(self, analytics_data):
         """Add analytics data to the session"""
         if self.session_data:
-            self.session_data['analytics'] = analytics_data
+            self._append_event({'event': 'set', 'field': 'analytics', 'value': analytics_data})
     
     def end_session(self):
-        """End the current session and save it to disk"""
+        """End the current session and compact its log into the final recording"""
         if not self.session_data:
             raise ValueError("No active session")
-            
-        self.session_data['end_time'] = datetime.now().isoformat()
         
-        # Save session to file
-        filename = os.path.join(self.base_dir, "recordings", f"{self.current_session}.json")
-        with open(filename, 'w') as f:
-            json.dump(self.session_data, f, indent=2)
+        self._append_event({'event': 'end', 'end_time': datetime.now().isoformat()})
+        self.state.close(self.current_session)
         
         session_id = self.current_session
+        with span('recorder.compact'):
+            self._compact_journal(session_id)
+        
         self.current_session = None
         self.session_data = None
+        self.interactions = []
         
         return session_id
     
-    def load_session(self, session_id):
-        """Load a previous session"""
-        filename = os.path.join(self.base_dir, "recordings", f"{session_id}.json")
-        if not os.path.exists(filename):
-            raise FileNotFoundError(f"Session {session_id} not found")
-            
-        with open(filename, 'r') as f:
-            return json.load(f)
-    
-    def list_sessions(self, username=None):
-        """List all recorded sessions, optionally filtered by username"""
-        sessions = []
-        recordings_dir = os.path.join(self.base_dir, "recordings")
-        
-        for filename in os.listdir(recordings_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(recordings_dir, filename), 'r') as f:
-                    session_data = json.load(f)
-                    if username is None or session_data['username'] == username:
-                        sessions.append({
-                            'session_id': filename[:-5],  # Remove .json
-                            'start_time': session_data['start_time'],
-                            'end_time': session_data['end_time'],
-                            'username': session_data['username'],
-                            'model_used': session_data['model_used']
-                        })
-        
-        return sorted(sessions, key=lambda x: x['start_time'], reverse=True)
\ No newline at end of file
+    @staticmethod
+    def _replay_events(events, live=False):
+        """Rebuild a session dict from its log events; live adds the turn and routing records"""
+        session_data = {
+            'username': '',
+            'start_time': None,
+            'interactions': [],
+            'resume_text': '',
+            'model_used': '',
+            'end_time': None,
+            'analytics': None,
+            'models_served': {}
+        }
+        turns = []
+        routing_log = []
+        last_timestamp = None
+        
+        for event in events:
+            if event['event'] == 'start':
+                session_data['username'] = event['username']
+                session_data['start_time'] = event['start_time']
+                last_timestamp = event['start_time']
+            elif event['event'] == 'interaction':
+                session_data['interactions'].append(event['interaction'])
+                last_timestamp = event['interaction']['timestamp']
+            elif event['event'] == 'set':
+                session_data[event['field']] = event['value']
+            elif event['event'] == 'routing':
+                served = session_data['models_served']
+                served[event['model']] = served.get(event['model'], 0) + 1
+                routing_log.append(event['routing'])
+            elif event['event'] == 'turn':
+                turns.append(event)
+            elif event['event'] == 'end':
+                session_data['end_time'] = event['end_time']
+        
+        session_data['last_timestamp'] = last_timestamp
+        if live:
+            session_data['turns'] = turns
+            session_data['routing_log'] = routing_log
+        return session_data
+    
+    def _compact_journal(self, session_id, recovered=False):
+        """Write the final recording for a session log and remove the log"""
+        session_data = self._replay_events(self.state.read(session_id))
+        last_timestamp = session_data.pop('last_timestamp')
+        if session_data['start_time'] is None:
+            # Nothing usable was logged before the crash
+            self.state.remove(session_id)
+            return None
+        
+        if session_data['end_time'] is None:
+            session_data['end_time'] = last_timestamp
+        if recovered:
+            session_data['recovered'] = True
+        
+        self.store.save(session_id, session_data)
+        
+        self.index.add_session(session_id, session_data)
+        self.warehouse.add_session(session_id, session_data)
+        self.state.remove(session_id)
+        return session_id
+    
+    def recover_orphaned_sessions(self, stale_after=3600):
+        """Finalize session logs left behind by crashed workers or abandoned tabs.
+        
+        Only logs untouched for stale_after seconds are recovered, so
+        sessions still live in other worker processes are left alone.
+        """
+        recovered = []
+        now = time.time()
+        
+        for session_id, updated_at in self.state.sessions():
+            if session_id == self.current_session or now - updated_at < stale_after:
+                continue
+            try:
+                if self._compact_journal(session_id, recovered=True):
+                    recovered.append(session_id)
+            except FileNotFoundError:
+                # Another worker finalized it first
+                continue
+        
+        return recovered
+    
+    def load_session(self, session_id, include_resume=True, include_analytics=True):
+        """Load a previous session, optionally without its resume text and analytics"""
+        return self.store.load(session_id, include_resume=include_resume, include_analytics=include_analytics)
+    
+    def session_header(self, session_id):
+        """Summary fields of a previous session, read without loading its transcript"""
+        return self.store.read_header(session_id)
+    
+    def load_interactions(self, session_id, page=0):
+        """One page of a previous session's interactions"""
+        return self.store.load_page(session_id, page)
+    
+    def _sync_index(self):
+        if not self.index.needs_rebuild():
+            return
+        if self._has_recordings():
+            # First run against recordings made before the catalog (or its interaction counts) existed
+            self.rebuild_index()
+        else:
+            self.index.mark_synced()
+    
+    def list_sessions(self, username=None, limit=None, offset=0):
+        """List recorded sessions newest first, optionally filtered by username and paginated"""
+        self._sync_index()
+        return self.index.list_sessions(username, limit, offset)
+    
+    def count_sessions(self, username=None):
+        """Count recorded sessions, optionally filtered by username"""
+        self._sync_index()
+        return self.index.count_sessions(username)
+    
+    def rebuild_index(self):
+        """Rebuild the session catalog from the recordings on disk"""
+        return self.index.rebuild(os.path.join(self.base_dir, "recordings"))
+    
+    def _has_recordings(self):
+        return self.store.has_recordings()
\ No newline at end of file
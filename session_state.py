@@ -0,0 +1,207 @@
+"""Externalized state of in-progress interviews.
+
+An interview in progress is an append-only event log (start, interaction,
+set, routing, turn, end events) owned by the session recorder. The log is
+the interview's only transcript: the engine and the UI read the recorder's
+interactions, and any worker can rebuild a live InterviewSession from it,
+so interviews survive worker restarts and can move between processes.
+
+Backends:
+
+    FileStateBackend    one JSONL journal per session under journals/
+                        (the default; shared by the workers of one host, or
+                        of several hosts on a shared filesystem)
+    RedisStateBackend   one Redis list per session and a hash of live
+                        sessions, for workers on several nodes. Any server
+                        speaking the Redis protocol works, including the
+                        local stand-in: python redis_stub.py --port 6380
+
+INTERVIEW_STATE_BACKEND selects one: 'file' (default) or a redis:// URL,
+e.g. redis://127.0.0.1:6380/0. The Redis backend needs the redis package.
+"""
+import json
+import os
+import threading
+import time
+
+
+class FileStateBackend:
+    """Session event logs as JSONL journals, one file per session"""
+
+    def __init__(self, journals_dir, flush_every=1, flush_interval=5.0, fsync=False):
+        self.journals_dir = journals_dir
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.handles = {}
+        self.unflushed = {}
+        self.last_flush = {}
+        # session_id -> (bytes counted, complete lines in them), so length() reads only new bytes
+        self.counted = {}
+        self.lock = threading.Lock()
+        os.makedirs(journals_dir, exist_ok=True)
+
+    def path(self, session_id):
+        if not session_id or os.path.basename(session_id) != session_id or session_id.startswith('.'):
+            # Session ids can come from URLs when resuming
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.journals_dir, f"{session_id}.jsonl")
+
+    def append(self, session_id, event):
+        """Append one event, flushing on the configured cadence"""
+        with self.lock:
+            handle = self.handles.get(session_id)
+            if handle is None:
+                # Append mode, so workers taking turns on one session never overwrite each other
+                handle = self.handles[session_id] = open(self.path(session_id), 'a')
+                self.last_flush[session_id] = time.monotonic()
+            handle.write(json.dumps(event) + "\n")
+            self.unflushed[session_id] = self.unflushed.get(session_id, 0) + 1
+            if (self.unflushed[session_id] >= self.flush_every
+                    or time.monotonic() - self.last_flush[session_id] >= self.flush_interval):
+                self._flush(session_id)
+
+    def _flush(self, session_id):
+        handle = self.handles.get(session_id)
+        if handle is None:
+            return
+        handle.flush()
+        if self.fsync:
+            os.fsync(handle.fileno())
+        self.unflushed[session_id] = 0
+        self.last_flush[session_id] = time.monotonic()
+
+    def flush(self, session_id):
+        """Push buffered events to the OS (and to disk when fsync is enabled)"""
+        with self.lock:
+            self._flush(session_id)
+
+    def close(self, session_id):
+        """Flush and release this process's handle; the log itself is kept"""
+        with self.lock:
+            self._flush(session_id)
+            handle = self.handles.pop(session_id, None)
+            self.unflushed.pop(session_id, None)
+            self.last_flush.pop(session_id, None)
+            self.counted.pop(session_id, None)
+        if handle is not None:
+            handle.close()
+
+    def read(self, session_id, start=0):
+        """Events from position start on, ignoring a torn final line; FileNotFoundError if there is no log"""
+        self.flush(session_id)
+        events = []
+        with open(self.path(session_id), 'r') as f:
+            for position, line in enumerate(f):
+                if position < start:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    break
+        return events
+
+    def length(self, session_id):
+        """Number of events in the log, 0 if there is none; reads only what was appended since the last call"""
+        self.flush(session_id)
+        path = self.path(session_id)
+        with self.lock:
+            offset, count = self.counted.get(session_id, (0, 0))
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == offset:
+                    return count
+                if size < offset:
+                    # Removed and started again
+                    offset, count = 0, 0
+                f.seek(offset)
+                data = f.read(size - offset)
+        except FileNotFoundError:
+            with self.lock:
+                self.counted.pop(session_id, None)
+            return 0
+        # A torn final line is counted once it is complete
+        complete = data.rfind(b"\n") + 1
+        offset, count = offset + complete, count + data.count(b"\n", 0, complete)
+        with self.lock:
+            self.counted[session_id] = (offset, count)
+        return count
+
+    def sessions(self):
+        """(session_id, last update as epoch seconds) of every log"""
+        found = []
+        for dir_entry in os.scandir(self.journals_dir):
+            if not dir_entry.name.endswith('.jsonl'):
+                continue
+            try:
+                found.append((dir_entry.name[:-6], dir_entry.stat().st_mtime))
+            except FileNotFoundError:
+                continue
+        return found
+
+    def remove(self, session_id):
+        """Delete a log; FileNotFoundError if another worker already did"""
+        self.close(session_id)
+        os.remove(self.path(session_id))
+
+
+class RedisStateBackend:
+    """Session event logs as Redis lists, with a hash of live sessions and their last update"""
+
+    def __init__(self, client, prefix="interview:"):
+        self.client = client
+        self.prefix = prefix
+        self.live_key = f"{prefix}live"
+
+    @classmethod
+    def from_url(cls, url, prefix="interview:"):
+        # redis is only needed when this backend is configured
+        import redis
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def _key(self, session_id):
+        return f"{self.prefix}log:{session_id}"
+
+    def append(self, session_id, event):
+        pipeline = self.client.pipeline()
+        pipeline.rpush(self._key(session_id), json.dumps(event))
+        pipeline.hset(self.live_key, session_id, time.time())
+        pipeline.execute()
+
+    def flush(self, session_id):
+        """Every append is already on the server"""
+
+    def close(self, session_id):
+        """Nothing is held per session"""
+
+    def read(self, session_id, start=0):
+        events = self.client.lrange(self._key(session_id), start, -1)
+        if not events and start == 0:
+            # Like a missing journal: never started, or already finalized by another worker
+            raise FileNotFoundError(session_id)
+        return [json.loads(event) for event in events]
+
+    def length(self, session_id):
+        return self.client.llen(self._key(session_id))
+
+    def sessions(self):
+        return [(session_id.decode('utf-8') if isinstance(session_id, bytes) else session_id, float(updated_at))
+                for session_id, updated_at in self.client.hgetall(self.live_key).items()]
+
+    def remove(self, session_id):
+        pipeline = self.client.pipeline()
+        pipeline.hdel(self.live_key, session_id)
+        pipeline.delete(self._key(session_id))
+        removed, _ = pipeline.execute()
+        if not removed:
+            raise FileNotFoundError(session_id)
+
+
+def create_state_backend(spec='file', base_dir="interview_sessions"):
+    """'file' (journals under base_dir) or a redis:// / rediss:// / unix:// URL"""
+    if spec == 'file':
+        return FileStateBackend(os.path.join(base_dir, "journals"))
+    if spec.split('://', 1)[0] in ('redis', 'rediss', 'unix'):
+        return RedisStateBackend.from_url(spec)
+    raise ValueError(f"Unknown session state backend: {spec}")
@@ -0,0 +1,204 @@
+"""Process-wide shared resources.
+
+Everything here is created once per worker process and shared by all
+browser sessions: the model configuration (reloaded when the file changes
+on disk), the Ollama client and the caches and pools built on top of them.
+Startup phases are timed into STARTUP_PROFILE; run
+
+    python shared_resources.py --profile
+
+to see what importing the heavy dependencies costs on this machine.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+HEAVY_MODULES = ['streamlit', 'ollama', 'textblob', 'pandas', 'numpy', 'PyPDF2']
+
+STARTUP_PROFILE = {}
+
+_resources = {}
+_lock = threading.RLock()
+
+
+@contextmanager
+def timed(phase):
+    """Record how long a startup phase takes in STARTUP_PROFILE (first run only)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PROFILE.setdefault(phase, time.perf_counter() - started)
+
+
+def _get_or_create(name, factory):
+    resource = _resources.get(name)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(name)
+            if resource is None:
+                with timed(name):
+                    resource = factory()
+                _resources[name] = resource
+    return resource
+
+
+def get_model_manager(config_file="model_config.json"):
+    """Shared ModelManager, re-read whenever the config file changes on disk"""
+    def create():
+        from model_config import ModelManager
+        model_manager = ModelManager(config_file)
+        model_manager.add_update_listener(get_question_cache().on_model_config_updated)
+        return model_manager
+
+    model_manager = _get_or_create(f"model_manager:{config_file}", create)
+    with _lock:
+        model_manager.reload_if_changed()
+    return model_manager
+
+
+def get_ollama_client():
+    """Shared Ollama client (honours OLLAMA_HOST); ollama is imported on first use"""
+    def create():
+        import ollama
+        return ollama.Client(host=os.environ.get('OLLAMA_HOST'))
+    return _get_or_create('ollama_client', create)
+
+
+def get_scheduler():
+    """Shared inference scheduler in front of the Ollama client"""
+    def create():
+        from inference_scheduler import InferenceScheduler
+        return InferenceScheduler(
+            get_ollama_client(),
+            max_queue_per_model=int(os.environ.get('INTERVIEW_MAX_QUEUE', 32)),
+            max_concurrency=int(os.environ.get('INTERVIEW_MAX_CONCURRENCY', 2))
+        )
+    return _get_or_create('scheduler', create)
+
+
+def get_question_cache():
+    def create():
+        from question_cache import QuestionCache
+        return QuestionCache()
+    return _get_or_create('question_cache', create)
+
+
+def get_sentiment_scorer():
+    """Shared cached, batching sentiment scorer (INTERVIEW_SENTIMENT_BACKEND: lexicon or textblob)"""
+    def create():
+        from sentiment import SentimentScorer, create_backend
+        return SentimentScorer(create_backend(os.environ.get('INTERVIEW_SENTIMENT_BACKEND', 'lexicon')))
+    return _get_or_create('sentiment_scorer', create)
+
+
+def get_relevance_scorer():
+    """Shared answer-relevance scorer, or None when INTERVIEW_RELEVANCE_EMBEDDER is 'off'.
+
+    The embedder is 'hashed' (built in, the default), 'hashed:<dim>' or
+    'ollama:<model>' for a local embedding model behind the scheduler.
+    """
+    spec = os.environ.get('INTERVIEW_RELEVANCE_EMBEDDER', 'hashed')
+    if spec == 'off':
+        return None
+
+    def create():
+        from inference_scheduler import PRIORITY_BACKGROUND, ScheduledClient
+        from relevance import RelevanceScorer, create_embedder
+        client = ScheduledClient(get_scheduler(), PRIORITY_BACKGROUND) if spec.startswith('ollama:') else None
+        return RelevanceScorer(create_embedder(spec, client),
+                               cache_dir=os.path.join("interview_sessions", "cache", "embeddings"))
+    return _get_or_create(f"relevance_scorer:{spec}", create)
+
+
+def get_response_cache():
+    """Shared cache of interviewer replies to repeated inputs, or None when INTERVIEW_RESPONSE_CACHE is 'off'"""
+    if os.environ.get('INTERVIEW_RESPONSE_CACHE', 'on') == 'off':
+        return None
+
+    def create():
+        from response_cache import ResponseCache
+        return ResponseCache(os.path.join("interview_sessions", "cache", "responses.db"))
+    return _get_or_create('response_cache', create)
+
+
+def get_pdf_ingestor():
+    def create():
+        from pdf_ingest import PdfIngestor
+        return PdfIngestor()
+    return _get_or_create('pdf_ingestor', create)
+
+
+def get_user_store(db_path="users.db", legacy_json="users.json"):
+    def create():
+        from user_store import UserStore
+        return UserStore(db_path, legacy_json)
+    return _get_or_create(f"user_store:{db_path}", create)
+
+
+def get_state_backend(base_dir="interview_sessions"):
+    """Shared store of in-progress interview logs (INTERVIEW_STATE_BACKEND: 'file' or a redis:// URL)"""
+    spec = os.environ.get('INTERVIEW_STATE_BACKEND', 'file')
+
+    def create():
+        from session_state import create_state_backend
+        return create_state_backend(spec, base_dir)
+    return _get_or_create(f"state_backend:{spec}:{base_dir}", create)
+
+
+def recover_orphaned_sessions(base_dir="interview_sessions"):
+    """Finalize orphaned session logs once per process"""
+    def create():
+        from session_recorder import InterviewRecorder
+        return InterviewRecorder(base_dir, state_backend=get_state_backend(base_dir)).recover_orphaned_sessions()
+    return _get_or_create(f"recovered_sessions:{base_dir}", create)
+
+
+def start_metrics_export():
+    """Write metrics snapshots to INTERVIEW_METRICS_FILE (if set) once per process"""
+    path = os.environ.get('INTERVIEW_METRICS_FILE')
+    if not path:
+        return None
+
+    def create():
+        from metrics import REGISTRY
+        return REGISTRY.export_periodically(path, float(os.environ.get('INTERVIEW_METRICS_INTERVAL', 15)))
+    return _get_or_create('metrics_export', create)
+
+
+def profile_imports(modules=None):
+    """Import each module in a fresh interpreter and report seconds taken"""
+    results = {}
+    for module in modules or HEAVY_MODULES:
+        code = (f"import time; t = time.perf_counter(); import {module}; "
+                f"print(time.perf_counter() - t)")
+        completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        results[module] = float(completed.stdout) if completed.returncode == 0 else None
+    return results
+
+
+def main():
+    if '--profile' not in sys.argv:
+        print(__doc__)
+        return
+
+    print("Cold import times (fresh interpreter each):")
+    for module, seconds in profile_imports().items():
+        print(f"  {module:<12} {'not installed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+
+    print("Shared resource setup:")
+    for name, factory in [('model_manager', get_model_manager), ('question_cache', get_question_cache),
+                          ('user_store', get_user_store), ('ollama_client', get_ollama_client)]:
+        try:
+            factory()
+        except ImportError as e:
+            print(f"  {name:<12} unavailable ({e})")
+    for phase, seconds in STARTUP_PROFILE.items():
+        print(f"  {phase:<32} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Speculative prefetch of answer-independent work for the next interview turn.
+
+While the candidate is typing, everything that does not depend on their
+answer is computed in the background:
+
+* the prompt prefix (system prompt, notes, recent turns) is sent to Ollama
+  at the lowest priority with a one-token budget, so the model's prompt
+  cache already holds it when the real request arrives
+* the resume chunks are scored against the interviewer's last question.
+  BM25 scores add up over query terms, so on submit only the answer's
+  terms still need scoring
+* the next unasked questions from the generated question list are picked
+  as follow-up candidates
+
+Starting a new speculation or taking the current one cancels whatever is
+still pending, so superseded work never holds up real requests.
+"""
+import re
+import threading
+
+from inference_scheduler import PRIORITY_BACKGROUND, SchedulerBusyError
+
+PRIORITY_SPECULATIVE = PRIORITY_BACKGROUND + 1
+
+QUESTION_PATTERN = re.compile(r'^\s*\d+[.)]\s+(.+?)\s*$', re.MULTILINE)
+
+
+def parse_numbered_questions(text):
+    """Extract the items of a numbered list such as generated interview questions"""
+    return [match.strip() for match in QUESTION_PATTERN.findall(text)]
+
+
+class TurnPrefetch:
+    """Results of speculative work for one turn"""
+
+    def __init__(self, turn_id, last_question):
+        self.turn_id = turn_id
+        self.last_question = last_question
+        self.question_scores = None
+        self.follow_up_candidates = []
+        self.warm_request = None
+        self.ready = threading.Event()
+        self.cancelled = False
+
+    def release_warmup(self):
+        """Drop the prefix warmup if it has not started; the real request will cover it"""
+        if self.warm_request is not None and not self.warm_request.started.is_set():
+            self.warm_request.cancel()
+
+    def cancel(self):
+        self.cancelled = True
+        self.release_warmup()
+
+
+class TurnSpeculator:
+    def __init__(self, scheduler, max_follow_ups=2):
+        self.scheduler = scheduler
+        self.max_follow_ups = max_follow_ups
+        self.current = None
+        self.turn_counter = 0
+        self.lock = threading.Lock()
+
+    def start(self, model_name, conversation, resume_index, last_question, planned_questions, asked_text):
+        """Begin speculating for the turn that answers last_question"""
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+            self.turn_counter += 1
+            prefetch = TurnPrefetch(self.turn_counter, last_question)
+            self.current = prefetch
+
+        thread = threading.Thread(
+            target=self._run,
+            args=(prefetch, model_name, conversation, resume_index, planned_questions, asked_text),
+            daemon=True
+        )
+        thread.start()
+        return prefetch
+
+    def _run(self, prefetch, model_name, conversation, resume_index, planned_questions, asked_text):
+        try:
+            if conversation is not None and not prefetch.cancelled:
+                try:
+                    prefetch.warm_request = self.scheduler.submit(
+                        model_name, conversation.build_prefix_messages(),
+                        PRIORITY_SPECULATIVE, options={'num_predict': 1}
+                    )
+                except SchedulerBusyError:
+                    # Never add load when the queue is already full
+                    pass
+
+            if resume_index is not None and not prefetch.cancelled:
+                prefetch.question_scores = resume_index.score(prefetch.last_question)
+
+            if not prefetch.cancelled:
+                asked = asked_text.lower()
+                prefetch.follow_up_candidates = [
+                    question for question in planned_questions
+                    if question.lower() not in asked
+                ][:self.max_follow_ups]
+        finally:
+            prefetch.ready.set()
+
+    def take(self, timeout=0.05):
+        """Claim the current turn's prefetch, or None if it is missing or not ready"""
+        with self.lock:
+            prefetch = self.current
+            self.current = None
+        if prefetch is None or prefetch.cancelled:
+            return None
+        if not prefetch.ready.wait(timeout):
+            prefetch.cancel()
+            return None
+        prefetch.release_warmup()
+        return prefetch
+
+    def cancel(self):
+        """Abandon any pending speculation, e.g. when the interview ends"""
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+            self.current = None
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Shared pytest setup: the modules live at the repository root"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def scratch_cwd(tmp_path_factory):
+    """Run from a scratch directory, so default paths (interview_sessions/, model_config.json) stay out of the repo"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('cwd'))
+    yield
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def ollama_stub():
+    """Fast local stand-in for Ollama; must start before the shared client is first created"""
+    from ollama_stub import StubProfile, start_stub_server
+
+    server, url = start_stub_server(StubProfile(tokens_per_sec=5000, load_seconds=0.0))
+    os.environ['OLLAMA_HOST'] = url
+    yield server
+    server.shutdown()
+
+
+class FakeOllama:
+    """In-process Ollama client: replies "reply from <model>" word by word.
+
+    Models in fail raise on chat; while hold is cleared, calls block before
+    their first chunk. calls records the first message of every chat.
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.hold = threading.Event()
+        self.hold.set()
+        self.calls = []
+
+    def chat(self, model, messages, stream=True, keep_alive=None, options=None):
+        self.calls.append((model, messages[0]['content'] if messages else None))
+        if model in self.fail:
+            raise RuntimeError(f"model '{model}' not found")
+        self.hold.wait(10)
+        for word in f"reply from {model}".split():
+            yield {'model': model, 'message': {'role': 'assistant', 'content': f"{word} "}, 'done': False}
+
+    def generate(self, model, prompt='', keep_alive=None):
+        return {}
+
+    def embed(self, model, input, keep_alive=None):
+        return {'embeddings': [[float(len(text)), 1.0] for text in input]}
+
+
+@pytest.fixture
+def fake_ollama():
+    return FakeOllama
@@ -0,0 +1,75 @@
+import pytest
+
+from analytics_warehouse import AnalyticsWarehouse
+from recording_store import RecordingStore
+
+
+def session(username, model, role, day, response_times, accuracy=0.5):
+    return {
+        'username': username,
+        'model_used': model,
+        'target_role': role,
+        'start_time': f"2026-03-{day:02d}T10:00:00",
+        'end_time': f"2026-03-{day:02d}T10:20:00",
+        'analytics': {
+            'response_count': len(response_times),
+            'summary': {'average_response_time': sum(response_times) / len(response_times),
+                        'technical_accuracy': accuracy},
+            'samples': {'response_times': response_times, 'technical_accuracy': [accuracy] * len(response_times)}
+        }
+    }
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = AnalyticsWarehouse(str(tmp_path / "warehouse.db"))
+    warehouse.add_session("alice_1", session("alice", "mistral:7b", "Backend Engineer", 1, [1.0, 2.0, 3.0]))
+    warehouse.add_session("bob_1", session("bob", "llama2:13b", "Data Scientist", 2, [10.0, 20.0], 0.9))
+    warehouse.add_session("carol_1", session("carol", "mistral:7b", "", 8, [5.0]))
+    return warehouse
+
+
+def test_sessions_and_turns_are_indexed(warehouse):
+    sessions = warehouse.sessions()
+    assert sorted(sessions['session_id']) == ['alice_1', 'bob_1', 'carol_1']
+    assert sessions.set_index('session_id').loc['alice_1', 'duration_seconds'] == 1200
+    assert len(warehouse.turns()) == 6
+    assert warehouse.dimension_values('target_role') == ['Backend Engineer', 'Data Scientist']
+    with pytest.raises(ValueError):
+        warehouse.dimension_values('password')
+
+
+def test_percentiles_by_model_and_filters(warehouse):
+    result = warehouse.percentiles('response_times', q=(0.5,))
+    assert result.loc['mistral:7b'].tolist() == [4, 2.5]
+    assert result.loc['llama2:13b', 'p50'] == 15.0
+    week = warehouse.percentiles('response_times', by=None, q=(0.5,), since="2026-03-01", until="2026-03-07")
+    assert week['count'].tolist() == [5]
+    assert warehouse.percentiles('response_times', roles="Nobody").empty
+    with pytest.raises(ValueError):
+        warehouse.percentiles('favourite_colour')
+
+
+def test_distribution_and_trend(warehouse):
+    distribution = warehouse.distribution('technical_accuracy', bins=2)
+    assert distribution['count'].tolist() == [0, 6]
+    assert distribution['bin_end'].iloc[-1] == 1.0
+    trend = warehouse.trend('average_response_time', freq='W')
+    assert len(trend) == 2
+
+
+def test_replacing_removing_and_backfilling(tmp_path, warehouse):
+    version = warehouse.version()
+    warehouse.add_session("alice_1", session("alice", "mistral:7b", "Backend Engineer", 1, [1.0]))
+    assert len(warehouse.turns(username="alice")) == 1
+    warehouse.remove_session("bob_1")
+    assert warehouse.version() != version
+    assert sorted(warehouse.sessions()['session_id']) == ['alice_1', 'carol_1']
+
+    store = RecordingStore(str(tmp_path / "recordings"))
+    store.save("bob_1", session("bob", "llama2:13b", "Data Scientist", 2, [10.0, 20.0]))
+    store.save("alice_1", session("alice", "mistral:7b", "Backend Engineer", 1, [1.0, 2.0, 3.0]))
+    assert warehouse.backfill(store.recordings_dir) == 1
+    assert len(warehouse.turns(username="alice")) == 1
+    assert warehouse.backfill(store.recordings_dir, replace=True) == 2
+    assert len(warehouse.turns(username="alice")) == 3
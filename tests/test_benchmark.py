@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmark import compare_to_baseline
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(REPO, 'benchmarks', 'baseline.json')
+# Stages take a few ms over a handful of samples, so one GC pause or descheduled thread moves their
+# p95 several-fold; this catches gross regressions (lost concurrency, an extra model call per turn)
+CI_TOLERANCE = 2.0
+CI_MIN_DELTA = 0.05
+
+
+def baseline_flags(config):
+    """Command-line flags that rerun the configuration a baseline was recorded with"""
+    flags = []
+    for key, value in config.items():
+        if value is None or value is False:
+            continue
+        flags.append(f"--{key.replace('_', '-')}")
+        if value is not True:
+            flags.append(str(value))
+    return flags
+
+
+def test_compare_to_baseline():
+    baseline = {'stages': {'chat_turn': {'p95': 0.100}, 'list_sessions': {'p95': 0.001}}}
+    results = {'stages': {'chat_turn': {'p95': 0.150}, 'list_sessions': {'p95': 0.004},
+                          'end_session': {'p95': 0.5}}}
+    assert compare_to_baseline(results, baseline, 0.2) == ["chat_turn: p95 100.0 ms -> 150.0 ms"]
+    assert compare_to_baseline(results, baseline, 0.6) == []
+
+
+def test_no_regressions_against_committed_baseline(tmp_path):
+    with open(BASELINE, 'r') as f:
+        config = json.load(f)['config']
+    command = [sys.executable, os.path.join(REPO, 'benchmark.py'), *baseline_flags(config),
+               '--check-baseline', BASELINE, '--tolerance', str(CI_TOLERANCE),
+               '--min-delta', str(CI_MIN_DELTA)]
+    result = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "No regressions against baseline" in result.stdout
@@ -0,0 +1,58 @@
+from conversation_context import ConversationContext, make_ollama_summarizer
+
+
+def exchange(context, i):
+    context.add_turn('user', f"answer {i}")
+    context.add_turn('assistant', f"question {i + 1}")
+
+
+def test_old_turns_are_folded_into_the_summary_in_blocks():
+    folded = []
+
+    def summarizer(previous, messages):
+        folded.append([m['content'] for m in messages])
+        return (previous + " " if previous else "") + f"{len(messages)} messages"
+
+    context = ConversationContext("You are an interviewer.", recent_turns=2, summarizer=summarizer, fold_every=1)
+    # Up to recent_turns + fold_every exchanges stay verbatim
+    for i in range(4):
+        exchange(context, i)
+    context.wait_for_summary(5)
+    assert folded == [['answer 0', 'question 1']]
+
+    messages = context.build_messages("answer 4", turn_context="[Experience] Django")
+    assert messages[0] == {'role': 'system', 'content': "You are an interviewer."}
+    assert messages[1]['content'] == "Interview notes so far:\n2 messages"
+    assert [m['content'] for m in messages[2:-1]] == \
+        ['answer 1', 'question 2', 'answer 2', 'question 3', 'answer 3', 'question 4']
+    assert messages[-1] == {'role': 'user', 'content': "[Experience] Django\n\nCandidate: answer 4"}
+    # The next turn's prompt starts with the same messages, so Ollama can reuse its cache
+    assert context.build_prefix_messages() == messages[:-1]
+
+
+def test_failed_summaries_keep_turns_verbatim():
+    context = ConversationContext("prefix", recent_turns=1, fold_every=1,
+                                  summarizer=lambda previous, messages: 1 / 0)
+    for i in range(3):
+        exchange(context, i)
+    context.wait_for_summary(5)
+    assert context.pending and context.summary == ""
+    assert [m['content'] for m in context.build_prefix_messages()[1:]] == \
+        ['answer 0', 'question 1', 'answer 1', 'question 2', 'answer 2', 'question 3']
+
+
+def test_history_is_trimmed_to_the_token_ceiling():
+    context = ConversationContext("p" * 40, recent_turns=10, token_ceiling=40)
+    for i in range(5):
+        context.add_turn('user', f"{i}" * 40)
+    # 10 tokens of prefix, 10 for the input, room for the two newest 10-token messages
+    messages = context.build_messages("x" * 40)
+    assert [m['content'][0] for m in messages[1:-1]] == ['3', '4']
+
+
+def test_ollama_summarizer_strips_thinking(fake_ollama):
+    client = fake_ollama()
+    client.chat = lambda model, messages: {
+        'message': {'content': f"<think>{messages[1]['content']}</think>notes from {model}"}}
+    summarize = make_ollama_summarizer(client, 'mistral:7b')
+    assert summarize("", [{'role': 'user', 'content': "hi"}]) == "notes from mistral:7b"
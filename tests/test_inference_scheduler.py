@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from inference_scheduler import (PRIORITY_BACKGROUND, PRIORITY_CHAT, PRIORITY_QUESTION_GENERATION,
+                                 InferenceScheduler, ScheduledClient, SchedulerBusyError)
+
+
+@pytest.fixture
+def held(fake_ollama):
+    """A single-worker scheduler whose model calls block until client.hold is set"""
+    client = fake_ollama()
+    client.hold.clear()
+    scheduler = InferenceScheduler(client, max_concurrency=1, max_queue_per_model=3, max_batch=2)
+    yield scheduler, client
+    client.hold.set()
+    scheduler.shutdown()
+
+
+def chat(scheduler, model, label, priority=PRIORITY_CHAT):
+    return scheduler.submit(model, [{'role': 'user', 'content': label}], priority)
+
+
+def test_requests_run_by_priority_then_arrival(held):
+    scheduler, client = held
+    running = chat(scheduler, 'mistral:7b', 'running')
+    assert running.started.wait(5)
+    background = chat(scheduler, 'mistral:7b', 'background', PRIORITY_BACKGROUND)
+    questions = chat(scheduler, 'mistral:7b', 'questions', PRIORITY_QUESTION_GENERATION)
+    answer = chat(scheduler, 'mistral:7b', 'answer')
+    assert [request.position() for request in (running, answer, questions, background)] == [0, 0, 1, 2]
+
+    client.hold.set()
+    for request in (running, background, questions, answer):
+        assert request.result(5)['message']['content'] == "reply from mistral:7b "
+    assert [label for _, label in client.calls] == ['running', 'answer', 'questions', 'background']
+
+
+def test_full_queue_raises_busy(held):
+    scheduler, client = held
+    assert chat(scheduler, 'mistral:7b', 'running').started.wait(5)
+    queued = [chat(scheduler, 'mistral:7b', f'q{i}') for i in range(3)]
+    with pytest.raises(SchedulerBusyError, match="has 3 requests"):
+        chat(scheduler, 'mistral:7b', 'one too many')
+    # Other models have their own queues, and cancelled requests free their slot
+    chat(scheduler, 'llama2:13b', 'other model')
+    queued[0].cancel()
+    chat(scheduler, 'mistral:7b', 'after cancel')
+    # The cancelled request is still in the heap but not counted as waiting
+    with pytest.raises(SchedulerBusyError, match="has 3 requests"):
+        chat(scheduler, 'mistral:7b', 'full again')
+    assert scheduler.stats()['queued'] == {'mistral:7b': 3, 'llama2:13b': 1}
+
+    client.hold.set()
+    assert queued[0].result(5) is None
+    assert 'q0' not in [label for _, label in client.calls]
+
+
+def test_loaded_model_is_drained_in_batches(held):
+    scheduler, client = held
+    first = chat(scheduler, 'mistral:7b', 'm1')
+    assert first.started.wait(5)
+    requests = [chat(scheduler, 'mistral:7b', 'm2'), chat(scheduler, 'llama2:13b', 'l1'),
+                chat(scheduler, 'mistral:7b', 'm3'), chat(scheduler, 'mistral:7b', 'm4')]
+    client.hold.set()
+    for request in requests:
+        request.result(5)
+    # max_batch=2: the loaded model gets one more turn before the waiting model is swapped in
+    assert [label for _, label in client.calls] == ['m1', 'm2', 'l1', 'm3', 'm4']
+
+
+def test_scheduled_client_streams_and_reports_errors(fake_ollama):
+    client = fake_ollama(fail={'llama2:13b'})
+    scheduler = InferenceScheduler(client)
+    try:
+        scheduled = ScheduledClient(scheduler)
+        chunks = scheduled.chat('mistral:7b', [{'role': 'user', 'content': 'hi'}], stream=True)
+        assert "".join(chunk['message']['content'] for chunk in chunks) == "reply from mistral:7b "
+        assert scheduled.chat('mistral:7b', [])['queue_wait'] >= 0
+        assert scheduled.embed('mistral:7b', ["ab", "abc"])['embeddings'] == [[2.0, 1.0], [3.0, 1.0]]
+        with pytest.raises(RuntimeError):
+            scheduled.chat('llama2:13b', [{'role': 'user', 'content': 'hi'}])
+    finally:
+        scheduler.shutdown()
+
+
+def test_concurrent_warmups_queue_one_request(held):
+    scheduler, client = held
+    assert chat(scheduler, 'mistral:7b', 'running').started.wait(5)
+    barrier = threading.Barrier(8)
+    warmups = []
+
+    def warm():
+        barrier.wait()
+        warmups.append(scheduler.warmup('llama2:13b'))
+
+    threads = [threading.Thread(target=warm) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len([request for request in warmups if request is not None]) == 1
@@ -0,0 +1,61 @@
+import uuid
+
+import pytest
+
+from interview_engine import InterviewSession
+from model_config import ModelManager
+
+QUESTION = "Tell me about a system you scaled."
+
+
+@pytest.fixture
+def manager(tmp_path, ollama_stub):
+    return ModelManager(str(tmp_path / "model_config.json"))
+
+
+@pytest.fixture
+def start(tmp_path, manager, monkeypatch):
+    monkeypatch.setattr(InterviewSession, 'last_question', lambda self: QUESTION)
+
+    def start(resume_text):
+        session = InterviewSession("alice", "mistral:7b", base_dir=str(tmp_path / "sessions"), model_manager=manager)
+        session.resume_text = resume_text
+        return session
+    return start
+
+
+def served_from_cache(session, answer):
+    reply = session.submit_answer(answer)
+    return reply, session.llm_stats[-1].get('cache')
+
+
+def test_replies_are_reused_only_within_the_interview_by_default(start):
+    # Unique texts, since the shared response cache outlives the test
+    resume, answer = f"Resume {uuid.uuid4()}", f"I sharded the {uuid.uuid4().hex} tables by tenant id"
+    first = start(resume)
+    reply, cached = served_from_cache(first, answer)
+    assert cached is None
+    assert served_from_cache(first, answer) == (reply, 'exact')
+
+    # Another candidate with the same resume, question and answer still gets a fresh reply
+    assert served_from_cache(start(resume), answer)[1] is None
+
+
+def test_resume_scope_shares_replies_between_interviews_on_one_resume(start, manager):
+    manager.config['response_cache'] = dict(manager.get_response_cache_policy(), scope='resume')
+    resume, answer = f"Resume {uuid.uuid4()}", f"I sharded the {uuid.uuid4().hex} tables by tenant id"
+    reply, _ = served_from_cache(start(resume), answer)
+    assert served_from_cache(start(resume), answer) == (reply, 'exact')
+    assert served_from_cache(start(resume + " and Kafka"), answer)[1] is None
+
+
+def test_speculation_warms_the_routed_chat_model(start, manager, monkeypatch):
+    session = start("")
+    session.speculative_prefetch = True
+    warmed = []
+    monkeypatch.setattr(session.speculator, 'start', lambda model_name, *args: warmed.append(model_name))
+    session._start_speculation(QUESTION)
+    manager.config['routing'] = dict(manager.get_routing_policy(), enabled=True,
+                                     tasks={'chat': {'model': 'llama2:13b'}})
+    session._start_speculation(QUESTION)
+    assert warmed == ['mistral:7b', 'llama2:13b']
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from inference_scheduler import SchedulerBusyError
+from interview_engine import InterviewSession
+from interview_service import REGISTRY_KEY, SessionRegistry, create_app
+from shared_resources import get_user_store
+
+RESUME = "Backend engineer. Python, PostgreSQL and Kubernetes. Led a payments migration."
+
+
+@pytest.fixture
+def base_dir(tmp_path, ollama_stub):
+    return str(tmp_path / "sessions")
+
+
+def run_client(base_dir, scenario):
+    async def main():
+        async with TestClient(TestServer(create_app(base_dir))) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+async def _start(client):
+    get_user_store().register("svc_user", "secret")
+    response = await client.post('/sessions', json={'username': "svc_user", 'password': "secret"})
+    assert response.status == 201
+    return (await response.json())['session']
+
+
+def test_interview_over_http(base_dir):
+    async def scenario(client):
+        token = await _start(client)
+        response = await client.post(f'/sessions/{token}/resume', json={'resume_text': RESUME})
+        assert response.status == 200
+        assert (await response.json())['resume_notice'] is None
+
+        response = await client.post(f'/sessions/{token}/answers', json={'answer': "I led the migration."})
+        assert response.status == 200
+        assert (await response.json())['reply']
+
+        async with client.ws_connect(f'/sessions/{token}/ws') as ws:
+            await ws.send_str("not json")
+            assert (await ws.receive_json())['status'] == 400
+            await ws.send_json({'answer': 42})
+            assert (await ws.receive_json())['status'] == 400
+            await ws.send_json({'answer': "We used blue-green deploys."})
+            while (event := await ws.receive_json())['type'] != 'reply':
+                assert event['type'] in ('token', 'queued')
+
+        response = await client.get(f'/sessions/{token}/report')
+        assert (await response.json())['response_count'] == 2
+        response = await client.delete(f'/sessions/{token}')
+        assert response.status == 200
+        response = await client.get(f'/sessions/{token}/report')
+        assert response.status == 404
+    run_client(base_dir, scenario)
+
+
+def test_bad_requests_get_400(base_dir):
+    async def scenario(client):
+        response = await client.post('/sessions', data="{", headers={'Content-Type': 'application/json'})
+        assert response.status == 400
+        response = await client.post('/sessions', json={'username': ["svc_user"], 'password': "secret"})
+        assert response.status == 400
+
+        token = await _start(client)
+        response = await client.post(f'/sessions/{token}/resume', json={'text': RESUME})
+        assert response.status == 400
+        for body in ({'answer': 7}, {}, ["answer"], {'answer': "   "}):
+            response = await client.post(f'/sessions/{token}/answers', json=body)
+            assert response.status == 400
+        response = await client.post(f'/sessions/{token}x/answers', json={'answer': "hi"})
+        assert response.status == 404
+    run_client(base_dir, scenario)
+
+
+def test_concurrent_answers_on_one_session_are_serialized(base_dir):
+    async def scenario(client):
+        token = await _start(client)
+        await client.post(f'/sessions/{token}/resume', json={'resume_text': RESUME})
+        responses = await asyncio.gather(*(
+            client.post(f'/sessions/{token}/answers', json={'answer': f"Answer number {i} about Python."})
+            for i in range(4)))
+        assert [response.status for response in responses] == [200] * 4
+        response = await client.get(f'/sessions/{token}/report')
+        assert (await response.json())['response_count'] == 4
+        session = client.server.app[REGISTRY_KEY].get(token)
+        assert [message['role'] for message in session.transcript] == ['assistant'] + ['user', 'assistant'] * 4
+    run_client(base_dir, scenario)
+
+
+def test_idle_sessions_are_evicted_and_resumed(base_dir):
+    registry = SessionRegistry(base_dir, secret="s", idle_timeout=0)
+    token, session = registry.create("alice")
+    session.ingest_resume(resume_text=RESUME)
+    time.sleep(0.01)
+    assert registry.evict_idle() == [session.recorder.current_session]
+    assert not registry.sessions
+
+    # The log was kept, so the interview continues
+    resumed = registry.get(token)
+    assert resumed is not session and len(resumed.transcript) == 1
+
+
+def test_busy_answer_is_not_recorded_until_answered(base_dir, monkeypatch):
+    session = InterviewSession("alice", base_dir=base_dir)
+    session.ingest_resume(resume_text=RESUME)
+    run_llm = session._run_llm
+
+    def busy(*args, **kwargs):
+        raise SchedulerBusyError("queue full")
+
+    monkeypatch.setattr(session, '_run_llm', busy)
+    session.response_cache = None
+    with pytest.raises(SchedulerBusyError):
+        session.submit_answer("I like Python.")
+    assert len(session.transcript) == 1
+
+    monkeypatch.setattr(session, '_run_llm', run_llm)
+    session.submit_answer("I like Python.")
+    assert [message['role'] for message in session.transcript] == ['assistant', 'user', 'assistant']
+    assert session.report()['response_count'] == 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from keyword_matcher import (KeywordMatcher, TaxonomyMatcher, load_taxonomy, question_keywords, stem,
+                             tokenize)
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('queries', 'queri'), ('classes', 'class'), ('tables', 'table'), ('status', 'status'),
+    ('indexing', 'index'), ('planned', 'plan'), ('optimized', 'optimize'), ('api', 'api'), ('c++', 'c++'),
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+def test_tokens_keep_technical_names_whole():
+    assert tokenize("Node.js, C++ and C# on ci-cd!", use_stemming=False) == \
+        ['node.js', 'c++', 'and', 'c#', 'on', 'ci-cd']
+
+
+def test_whole_word_matching_of_keywords_and_phrases():
+    matcher = KeywordMatcher(['API', 'sql', 'machine learning', 'table'])
+    assert len(matcher) == 4
+    assert matcher.find("I wrote SQL queries over several tables and a rapid prototype") == {'sql', 'table'}
+    assert matcher.find("We applied Machine-Learning") == set()
+    assert matcher.find("we used machine learning behind the APIs") == {'machine learning', 'API'}
+    assert matcher.match_fraction("sql only") == 0.25
+    assert KeywordMatcher([]).match_fraction("anything") == 0
+
+
+def test_taxonomy_counts_per_category(tmp_path):
+    matcher = TaxonomyMatcher({'database': ['sql', 'schema'], 'web': ['http', 'api']})
+    assert matcher.category_matches("The API reads the schema over HTTP") == {'database': 1, 'web': 2}
+
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps({'cloud': ['aws']}))
+    assert load_taxonomy(str(path)) == {'cloud': ['aws']}
+    path.write_text(json.dumps({'cloud': 'aws'}))
+    with pytest.raises(ValueError):
+        load_taxonomy(str(path))
+
+
+def test_question_keywords_drop_stop_words_and_repeats():
+    assert question_keywords("What is the role of an index in a database index?") == \
+        ['what', 'is', 'role', 'index', 'database']
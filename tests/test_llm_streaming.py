@@ -0,0 +1,41 @@
+import random
+import re
+
+import pytest
+
+from llm_streaming import ThinkTagFilter, strip_think_tags
+
+
+def stream(text, sizes):
+    think_filter = ThinkTagFilter()
+    out, start = [], 0
+    for size in sizes:
+        out.append(think_filter.feed(text[start:start + size]))
+        start += size
+    out.append(think_filter.feed(text[start:]))
+    return "".join(out) + think_filter.flush()
+
+
+@pytest.mark.parametrize('text', [
+    "Hello <think>plan the question</think>world",
+    "<think>a</think>b<think>c</think>d",
+    "<thin> is not a tag, nor is </think> on its own",
+    "Answer first <think>then a thought that never ends",
+    "trailing partial tag <thi",
+])
+def test_split_chunks_match_the_regex_cleanup(text):
+    expected = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
+    rng = random.Random(0)
+    for _ in range(50):
+        sizes = [rng.randint(1, 6) for _ in range(len(text))]
+        assert stream(text, sizes) == expected
+    assert strip_think_tags(text) == expected.strip()
+
+
+def test_unclosed_think_is_released_at_end_of_stream():
+    think_filter = ThinkTagFilter()
+    assert think_filter.feed("Sure. <think>Tell me about") == "Sure. "
+    assert think_filter.feed(" a project</thi") == ""
+    assert think_filter.flush() == "<think>Tell me about a project</thi"
+    # The filter is ready for the next stream
+    assert think_filter.feed("<think>x</think>y") == "y"
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+
+from metrics import MetricsRegistry, SamplingProfiler
+
+
+def test_spans_and_counters_aggregate_per_name(tmp_path):
+    registry = MetricsRegistry()
+    for _ in range(3):
+        with registry.span('pdf.extract'):
+            pass
+    registry.observe('pdf.extract', 0.2)
+    registry.inc('response_cache.exact')
+    registry.inc('response_cache.exact', 2)
+
+    snapshot = registry.snapshot()
+    histogram = snapshot['histograms']['pdf.extract']
+    assert histogram['count'] == 4
+    assert histogram['max'] == 0.2 and histogram['sum'] >= 0.2
+    assert snapshot['counters'] == {'response_cache.exact': 3}
+
+    path = str(tmp_path / "metrics-{pid}.json")
+    registry.write_file(path)
+    with open(path.format(pid=snapshot['pid'])) as f:
+        assert json.load(f)['counters'] == {'response_cache.exact': 3}
+
+    registry.reset()
+    assert registry.snapshot()['histograms'] == {}
+
+
+def test_prometheus_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 1.0):
+        registry.observe('llm.chat', seconds)
+    registry.inc('scheduler.rejected')
+    text = registry.to_prometheus()
+    assert 'interview_llm_chat_seconds_bucket{le="0.01"} 1' in text
+    assert 'interview_llm_chat_seconds_bucket{le="0.1"} 3' in text
+    assert 'interview_llm_chat_seconds_bucket{le="+Inf"} 4' in text
+    assert 'interview_llm_chat_seconds_count 4' in text
+    assert 'interview_scheduler_rejected_total 1' in text
+
+
+def test_profiler_samples_other_threads():
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    thread = threading.Thread(target=busy_loop)
+    thread.start()
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        profiler.start()
+        deadline = time.monotonic() + 5
+        while profiler.samples < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        profiler.stop()
+    finally:
+        stop.set()
+        thread.join()
+    assert not profiler.running
+    assert any('busy_loop' in stack for stack, _ in profiler.top(50))
+    assert 'busy_loop' in profiler.folded()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from inference_scheduler import InferenceScheduler
+from model_config import DEFAULT_ROUTING_POLICY
+from model_router import ModelRouter
+
+MODELS = ['deepseek-r1:7b', 'llama2:13b', 'mistral:7b']
+
+
+class Manager:
+    """The two ModelManager methods the router uses"""
+
+    def __init__(self, **policy):
+        self.policy = dict(DEFAULT_ROUTING_POLICY, **policy)
+
+    def get_routing_policy(self):
+        return self.policy
+
+    def list_models(self):
+        return [(model, model, None) for model in MODELS]
+
+
+@pytest.fixture
+def scheduler_for():
+    schedulers = []
+
+    def make(client, **kwargs):
+        schedulers.append(InferenceScheduler(client, **kwargs))
+        return schedulers[-1]
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def test_routing_is_off_by_default():
+    assert not DEFAULT_ROUTING_POLICY['enabled']
+    decision = ModelRouter(Manager(), None).route('question_generation', 'mistral:7b')
+    assert (decision.model, decision.fallbacks, decision.reason) == ('mistral:7b', [], 'routing disabled')
+
+
+def test_routes_tasks_and_short_answers():
+    router = ModelRouter(Manager(enabled=True), None)
+    decision = router.route('question_generation', 'mistral:7b')
+    assert decision.model == 'llama2:13b'
+    assert decision.fallbacks == ['deepseek-r1:7b', 'mistral:7b']
+    assert router.route('chat', 'deepseek-r1:7b', answer="Yes, twice.").model == 'mistral:7b'
+    long_answer = "I would start by profiling the slow endpoint and looking at the query plan first"
+    assert router.route('chat', 'deepseek-r1:7b', answer=long_answer).model == 'deepseek-r1:7b'
+    # The user's choice stays a last resort
+    assert router.route('summary', 'llama2:13b').fallbacks == ['deepseek-r1:7b', 'llama2:13b']
+
+
+def test_falls_back_when_the_routed_model_fails(fake_ollama, scheduler_for):
+    client = fake_ollama(fail={'llama2:13b'})
+    router = ModelRouter(Manager(enabled=True), scheduler_for(client))
+    routed = router.client(router.route('question_generation', 'mistral:7b'))
+    response = routed.chat(model='llama2:13b', messages=[{'role': 'system', 'content': "questions"}])
+    assert response['message']['content'] == "reply from deepseek-r1:7b "
+    record = routed.routing_record()
+    assert (record['served_by'], record['fallback_reason']) == ('deepseek-r1:7b', 'error')
+
+
+def test_skips_an_overloaded_model_up_front(fake_ollama, scheduler_for):
+    client = fake_ollama()
+    router = ModelRouter(Manager(enabled=True, max_queue_depth=0), scheduler_for(client))
+    routed = router.client(router.route('question_generation', 'mistral:7b'))
+    assert routed.chat(model=None, messages=[])['model'] == 'mistral:7b'
+    assert routed.routing_record()['fallback_reason'] == 'queue depth'
+    assert [model for model, _ in client.calls] == ['mistral:7b']
+
+
+def test_first_chunk_wakes_on_arrival_and_reports_queue_position(fake_ollama, scheduler_for):
+    client = fake_ollama()
+    client.hold.clear()
+    scheduler = scheduler_for(client, max_concurrency=1)
+    blocker = scheduler.submit('mistral:7b', [{'role': 'user', 'content': "first"}])
+
+    positions = []
+    router = ModelRouter(Manager(enabled=True, slo_time_to_first_token=None), scheduler)
+    routed = router.client(router.route('chat', 'mistral:7b'), on_wait=positions.append)
+    routed.wait_report_interval = 0.05
+    chunks = routed.chat(model=None, messages=[{'role': 'user', 'content': "second"}], stream=True)
+
+    threading.Timer(0.3, client.hold.set).start()
+    started = time.monotonic()
+    first = next(chunks)
+    assert first['message']['content'] == "reply "
+    assert time.monotonic() - started < 5
+    # Nothing is queued ahead of it, only the running request
+    assert positions and set(positions) == {0}
+    assert "".join(chunk['message']['content'] for chunk in chunks) == "from mistral:7b "
+    assert blocker.result(5)['model'] == 'mistral:7b'
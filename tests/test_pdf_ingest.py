@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip('PyPDF2')
+
+from benchmark import make_resume_pdf
+from pdf_ingest import PdfIngestionError, PdfIngestor
+
+LINES = [f"Line {i}: built data pipelines in Python" for i in range(120)]
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    ingestor = PdfIngestor(max_workers=1, timeout=60, max_pages=2, pages_per_task=1,
+                           cache_dir=str(tmp_path / "pdf_text"))
+    yield ingestor
+    ingestor.shutdown()
+
+
+def test_long_pdf_is_truncated_and_reported(ingestor):
+    pdf = make_resume_pdf(LINES, lines_per_page=40)
+    result = ingestor.extract(pdf)
+    assert (result['page_count'], result['pages_extracted']) == (3, 2)
+    assert "Line 79:" in result['text'] and "Line 80:" not in result['text']
+
+    # Served from the cache, with the page counts
+    ingestor.shutdown()
+    assert ingestor.extract(pdf) == result
+    assert ingestor.pool is None
+
+    # A higher page limit does not reuse the truncated text
+    ingestor.max_pages = 5
+    assert "Line 119:" in ingestor.extract_text(pdf)
+
+
+def test_rejects_oversized_pdf(ingestor):
+    ingestor.max_bytes = 10
+    with pytest.raises(PdfIngestionError):
+        ingestor.extract(make_resume_pdf(LINES[:5]))
+
+
+def test_timeout_replaces_only_the_stuck_pool(ingestor):
+    pool = ingestor._acquire_pool()
+    other = ingestor._acquire_pool()
+    assert other is pool
+
+    # The timed-out extraction hands out a fresh pool, but the old one keeps
+    # serving the extraction still running on it
+    ingestor._release_pool(pool, timed_out=True)
+    assert ingestor.pool is None
+    assert pool.apply_async(sum, ([1, 2],)).get(30) == 3
+
+    ingestor._release_pool(other)
+    assert pool not in ingestor.active
+    with pytest.raises(ValueError):
+        pool.apply_async(sum, ([1, 2],))
+
+    ingestor.timeout = 0.001
+    with pytest.raises(PdfIngestionError, match="timed out"):
+        ingestor.extract(make_resume_pdf(LINES[:5]))
+    ingestor.timeout = 60
+    assert "Line 4:" in ingestor.extract_text(make_resume_pdf(LINES[:5]))
+
+
+def test_long_pdf_is_sent_once_per_worker(tmp_path):
+    ingestor = PdfIngestor(max_workers=2, timeout=60, max_pages=20, pages_per_task=1,
+                           cache_dir=str(tmp_path / "pdf_text"))
+    pool = ingestor._acquire_pool()
+    ingestor._release_pool(pool)
+    tasks = []
+    apply_async = pool.apply_async
+    pool.apply_async = lambda func, args: tasks.append(args[1:]) or apply_async(func, args)
+    try:
+        text = ingestor.extract_text(make_resume_pdf(LINES, lines_per_page=20))
+    finally:
+        ingestor.shutdown()
+    assert "Line 0:" in text and "Line 119:" in text
+    # The first page, then the other five split between the two workers
+    assert tasks == [(0, 1), (1, 4), (4, 6)]
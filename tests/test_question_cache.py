@@ -0,0 +1,51 @@
+import os
+import time
+
+from model_config import ModelManager
+from question_cache import QuestionCache
+
+CONFIG = {'system_prompt': "You are an interviewer", 'temperature': 0.6}
+QUESTIONS = ["Tell me about Django.", "How do you scale Postgres?"]
+
+
+def test_hits_survive_whitespace_changes_but_not_config_changes(tmp_path):
+    cache = QuestionCache(str(tmp_path))
+    cache.put("Python  engineer\n at Acme", 'mistral:7b', CONFIG, QUESTIONS)
+    assert cache.get("Python engineer at Acme ", 'mistral:7b', CONFIG) == QUESTIONS
+    assert cache.get("Python engineer at Acme", 'llama2:13b', CONFIG) is None
+    assert cache.get("Python engineer at Acme", 'mistral:7b', dict(CONFIG, temperature=0.7)) is None
+    assert cache.get("Python engineer at Acme", 'mistral:7b', dict(CONFIG, description="unused")) == QUESTIONS
+
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path):
+    cache = QuestionCache(str(tmp_path), max_entries=2, ttl_seconds=3600)
+    for i, resume in enumerate(["resume a", "resume b"]):
+        cache.put(resume, 'mistral:7b', CONFIG, QUESTIONS)
+        path = cache._path(cache.make_key(resume, 'mistral:7b', CONFIG))
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    assert cache.get("resume a", 'mistral:7b', CONFIG) == QUESTIONS
+    cache.put("resume c", 'mistral:7b', CONFIG, QUESTIONS)
+    assert cache.get("resume b", 'mistral:7b', CONFIG) is None
+    assert cache.get("resume a", 'mistral:7b', CONFIG) == QUESTIONS
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("resume c", 'mistral:7b', CONFIG) is None
+    assert os.listdir(str(tmp_path)) == [cache.make_key("resume a", 'mistral:7b', CONFIG) + ".json"]
+
+
+def test_prompt_or_temperature_updates_invalidate_that_model(tmp_path):
+    manager = ModelManager(str(tmp_path / "model_config.json"))
+    cache = QuestionCache(str(tmp_path / "questions"))
+    manager.add_update_listener(cache.on_model_config_updated)
+    for model in ('mistral:7b', 'llama2:13b'):
+        cache.put("resume", model, manager.get_model_config(model), QUESTIONS)
+
+    manager.update_model_config('mistral:7b', {'max_tokens': 800})
+    assert cache.get("resume", 'mistral:7b', manager.get_model_config('mistral:7b')) == QUESTIONS
+
+    old_config = dict(manager.get_model_config('mistral:7b'))
+    manager.update_model_config('mistral:7b', {'temperature': 0.5})
+    # Dropped even for readers still holding the old configuration
+    assert cache.get("resume", 'mistral:7b', old_config) is None
+    assert cache.get("resume", 'llama2:13b', manager.get_model_config('llama2:13b')) == QUESTIONS
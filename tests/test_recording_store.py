@@ -0,0 +1,115 @@
+import json
+import os
+import time
+
+import pytest
+
+from recording_store import RecordingStore, get_codec, read_recording
+from session_index import SessionIndex
+
+
+def session(resume_text="Python engineer", interactions=7):
+    return {
+        'username': "alice",
+        'start_time': "2026-01-05T10:00:00",
+        'end_time': "2026-01-05T10:30:00",
+        'model_used': "mistral:7b",
+        'resume_text': resume_text,
+        'interactions': [{'role': 'user' if i % 2 else 'assistant', 'content': f"message {i}",
+                          'timestamp': f"2026-01-05T10:{i:02d}:00"} for i in range(interactions)],
+        'analytics': {'summary': "Solid answers", 'response_count': 3, 'response_times': [1.0, 2.5]}
+    }
+
+
+@pytest.fixture(params=['gzip', 'zstd'])
+def store(request, tmp_path):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+    return RecordingStore(str(tmp_path), codec=request.param, page_size=3)
+
+
+def test_irec_round_trip(store):
+    data = session()
+    path = store.save("alice_1", data)
+    assert path.endswith("alice_1.irec")
+    assert store.load("alice_1") == data
+    assert read_recording(path) == data
+    assert "resume_text" not in store.load("alice_1", include_resume=False)
+    assert store.load("alice_1", include_analytics=False, include_interactions=False) == {
+        key: value for key, value in data.items() if key not in ('interactions', 'analytics')}
+
+
+def test_header_and_pages_are_read_separately(store):
+    data = session()
+    store.save("alice_1", data)
+    header = store.read_header("alice_1")
+    assert header['interaction_count'] == 7
+    assert header['summary'] == "Solid answers"
+    assert header['codec'] == store.codec_name and header['tier'] == 'hot'
+    assert store.page_count("alice_1") == 3
+    assert store.load_page("alice_1", 2) == data['interactions'][6:]
+    assert store.load_page("alice_1", 3) == []
+    assert list(store.iter_interactions("alice_1")) == data['interactions']
+
+
+def test_resumes_are_stored_once(store):
+    store.save("alice_1", session())
+    store.save("alice_2", session())
+    store.save("bob_1", session(resume_text=""))
+    assert store.stats()['resumes'] == 1
+    assert store.load("bob_1")['resume_text'] == ""
+
+
+def test_legacy_json_is_read_and_migrated(tmp_path):
+    store = RecordingStore(str(tmp_path), codec='gzip')
+    data = session()
+    legacy_path = os.path.join(str(tmp_path), "alice_1.json")
+    with open(legacy_path, 'w') as f:
+        json.dump(data, f)
+    assert store.read_header("alice_1")['tier'] == 'legacy'
+    assert store.load_page("alice_1", 0) == data['interactions'][:25]
+
+    old = time.time() - 10 * 86400
+    os.utime(legacy_path, (old, old))
+    assert store.compact(cold_after_days=7)['migrated'] == 1
+    assert not os.path.exists(legacy_path)
+    assert store.read_header("alice_1")['tier'] == 'cold'
+    assert store.load("alice_1") == data
+
+
+def test_compaction_expires_recordings_and_unused_resumes(tmp_path):
+    store = RecordingStore(str(tmp_path), codec='gzip')
+    index = SessionIndex(os.path.join(str(tmp_path), "sessions.db"))
+    data = session()
+    store.save("alice_1", data)
+    index.add_session("alice_1", data)
+    old = time.time() - 400 * 86400
+    os.utime(store.path("alice_1"), (old, old))
+    for entry in os.scandir(store.resumes_dir):
+        os.utime(entry.path, (old, old))
+
+    assert store.compact(retain_days=365, dry_run=True)['deleted'] == 1
+    assert store.has_recordings()
+    stats = store.compact(retain_days=365, catalogs=[index])
+    assert (stats['deleted'], stats['resumes_removed']) == (1, 1)
+    assert not store.has_recordings()
+    assert index.count_sessions() == 0
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec('lz4')
+
+
+def test_unreadable_recordings_keep_every_resume(tmp_path):
+    store = RecordingStore(str(tmp_path), codec='gzip')
+    store.save("alice_1", session())
+    with open(store.path("alice_1"), 'r+b') as f:
+        f.write(b"JUNK")
+    old = time.time() - 400 * 86400
+    for entry in os.scandir(store.resumes_dir):
+        os.utime(entry.path, (old, old))
+
+    stats = store.compact()
+    assert stats['skipped'] == 1 and stats['skipped_sessions'][0].startswith("alice_1: ")
+    assert (stats['resumes_removed'], len(os.listdir(store.resumes_dir))) == (0, 1)
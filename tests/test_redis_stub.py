@@ -0,0 +1,82 @@
+import socket
+
+import pytest
+
+from redis_stub import start_stub_server
+
+
+def encode(*args):
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class Connection:
+    """Bare RESP2 client, so the stub is tested without redis-py"""
+
+    def __init__(self, url):
+        host, port = url.split('//')[1].split('/')[0].split(':')
+        self.sock = socket.create_connection((host, int(port)), timeout=5)
+        self.file = self.sock.makefile('rb')
+
+    def _reply(self):
+        line = self.file.readline()[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return RuntimeError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            return None if rest == b'-1' else self.file.read(int(rest) + 2)[:-2]
+        return [self._reply() for _ in range(int(rest))]
+
+    def call(self, *args):
+        self.sock.sendall(encode(*args))
+        return self._reply()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+@pytest.fixture
+def conn():
+    server, url = start_stub_server()
+    connection = Connection(url)
+    yield connection
+    connection.close()
+    server.shutdown()
+
+
+def test_lists_and_hashes(conn):
+    assert conn.call('PING') == 'PONG'
+    assert conn.call('RPUSH', 'log', 'a', 'b', 'c') == 3
+    assert conn.call('LRANGE', 'log', 1, -1) == [b'b', b'c']
+    assert conn.call('LLEN', 'log') == 3
+    assert conn.call('HSET', 'live', 's1', '1.5', 's2', '2') == 2
+    assert conn.call('HGET', 'live', 's1') == b'1.5'
+    assert conn.call('HGETALL', 'live') == [b's1', b'1.5', b's2', b'2']
+    assert conn.call('HDEL', 'live', 's1', 's1') == 1
+    assert conn.call('HEXISTS', 'live', 's2') == 1
+    assert conn.call('DEL', 'log', 'missing') == 1
+    assert conn.call('EXISTS', 'log', 'live') == 1
+    assert isinstance(conn.call('LLEN', 'live'), RuntimeError)
+    assert isinstance(conn.call('FLUSHALL'), RuntimeError)
+
+
+def test_multi_exec_runs_queued_commands_together(conn):
+    assert conn.call('MULTI') == 'OK'
+    assert conn.call('RPUSH', 'log', 'x') == 'QUEUED'
+    assert conn.call('HSET', 'live', 'odd') == 'QUEUED'
+    assert conn.call('HSET', 'live', 's1', '1') == 'QUEUED'
+    replies = conn.call('EXEC')
+    assert replies[0] == 1 and isinstance(replies[1], RuntimeError) and replies[2] == 1
+    assert isinstance(conn.call('EXEC'), RuntimeError)
+    assert conn.call('MULTI') == 'OK'
+    conn.call('DEL', 'log')
+    assert conn.call('DISCARD') == 'OK'
+    assert conn.call('LLEN', 'log') == 1
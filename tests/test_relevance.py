@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from relevance import EmbeddingCache, HashedTfidfEmbedder, OllamaEmbedder, RelevanceScorer, create_embedder
+
+QUESTION = "How did you scale the Postgres database behind the payments API?"
+ON_TOPIC = "We added read replicas to Postgres and partitioned the payments tables to scale the database."
+OFF_TOPIC = "My favourite hobby is hiking in the mountains with my dog on weekends."
+
+
+class CountingEmbedder(HashedTfidfEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = []
+
+    def embed_batch(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_batch(texts)
+
+
+def test_on_topic_answers_score_higher():
+    scorer = RelevanceScorer(HashedTfidfEmbedder())
+    on_topic, off_topic = scorer.score(QUESTION, ON_TOPIC), scorer.score(QUESTION, OFF_TOPIC)
+    assert on_topic > scorer.low_relevance > off_topic
+    # IDF is taken over the batch, so batch scores differ from single ones but keep their order
+    batch = scorer.score_batch([QUESTION, QUESTION], [ON_TOPIC, OFF_TOPIC])
+    assert batch[0] > scorer.low_relevance > batch[1]
+    assert len(scorer.score_batch([], [])) == 0
+
+
+def test_resume_expansion_credits_answers_in_the_resume_words():
+    question = "Tell me about the project on your resume you are proudest of."
+    answer = "The Kafka ingestion pipeline: I cut end-to-end lag from minutes to seconds."
+    chunks = ["Built a Kafka ingestion pipeline for clickstream data, proudest project", "BSc Mathematics"]
+    scorer = RelevanceScorer(HashedTfidfEmbedder())
+    assert scorer.score(question, answer, chunks) > scorer.score(question, answer)
+
+
+def test_vectors_are_cached_across_scorers(tmp_path):
+    first = CountingEmbedder()
+    RelevanceScorer(first, cache_dir=str(tmp_path)).score(QUESTION, ON_TOPIC)
+    assert len(first.embedded) == 2
+
+    second = CountingEmbedder()
+    scorer = RelevanceScorer(second, cache_dir=str(tmp_path))
+    scorer.score(QUESTION, OFF_TOPIC)
+    assert second.embedded == [OFF_TOPIC]
+    # Answers are not stored, so the cache only grows with questions and resume chunks
+    scorer.score_batch([QUESTION], [OFF_TOPIC])
+    assert second.embedded == [OFF_TOPIC, OFF_TOPIC]
+    assert np.array_equal(scorer.embed([QUESTION])[0], first.embed_batch([QUESTION])[0])
+
+
+def test_embedding_cache_grows_its_file(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=4, initial_rows=2)
+    keys = [f"k{i}" for i in range(5)]
+    vectors = np.arange(20, dtype=np.float32).reshape(5, 4)
+    cache.put_many(keys, vectors)
+    cache.put_many(keys[:1], np.zeros((1, 4), dtype=np.float32))
+    found = EmbeddingCache(str(tmp_path), dim=4).get_many(keys + ["missing"])
+    assert sorted(found) == keys
+    assert np.array_equal(found["k0"], vectors[0]) and np.array_equal(found["k4"], vectors[4])
+
+
+def test_create_embedder(fake_ollama):
+    assert create_embedder('hashed:128').dim == 128
+    embedder = create_embedder('ollama:nomic-embed-text', fake_ollama())
+    assert isinstance(embedder, OllamaEmbedder) and embedder.name == "ollama-nomic-embed-text"
+    assert embedder.embed_batch(["ab"]).shape == (1, 2) and embedder.dim == 2
+    for spec in ('ollama', 'word2vec'):
+        with pytest.raises(ValueError):
+            create_embedder(spec)
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pandas as pd
+
+import rescore
+
+
+def _write_legacy(recordings_dir, session_id, interactions):
+    with open(os.path.join(recordings_dir, f"{session_id}.json"), 'w') as f:
+        json.dump({'session_id': session_id, 'username': 'alice', 'model_used': 'mistral',
+                   'start_time': '2024-01-01T10:00:00', 'interactions': interactions}, f)
+
+
+def _turns(answer):
+    return [
+        {'role': 'assistant', 'content': "How would you design a REST API with Python?",
+         'timestamp': '2024-01-01T10:00:00'},
+        {'role': 'user', 'content': answer, 'timestamp': '2024-01-01T10:00:12'},
+    ]
+
+
+def _read_parts(output_dir):
+    frames = []
+    for name in sorted(os.listdir(output_dir)):
+        path = os.path.join(output_dir, name)
+        if name.endswith('.parquet'):
+            frames.append(pd.read_parquet(path))
+        elif name.endswith('.csv.gz'):
+            frames.append(pd.read_csv(path))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_fast_mode_matches_live_analytics_and_skips_bad_sessions(tmp_path):
+    recordings_dir = tmp_path / "recordings"
+    recordings_dir.mkdir()
+    _write_legacy(recordings_dir, "alice_1", _turns("I built a REST API in Python with Flask and Docker."))
+    _write_legacy(recordings_dir, "alice_2", _turns("Not sure."))
+    # Interactions without a role fail past the loader, inside the scoring
+    _write_legacy(recordings_dir, "broken", [{'content': "hi"}])
+
+    fast_dir, full_dir = tmp_path / "fast", tmp_path / "full"
+    assert rescore.run(str(recordings_dir), str(fast_dir), workers=1, fast=True) == 2
+    assert rescore.run(str(recordings_dir), str(full_dir), workers=1, sentiment='lexicon') == 2
+
+    fast = _read_parts(fast_dir).sort_values('session_id').reset_index(drop=True)
+    full = _read_parts(full_dir).sort_values('session_id').reset_index(drop=True)
+    assert list(fast['session_id']) == ['alice_1', 'alice_2']
+    for column in ('response_times', 'answer_lengths', 'sentiment_scores', 'keyword_matches', 'technical_accuracy'):
+        assert fast[column].tolist() == full[column].tolist()
+
+    # Completed sessions are not scored again; the broken one is retried
+    assert rescore.run(str(recordings_dir), str(fast_dir), workers=1, fast=True) == 0
+    with open(os.path.join(fast_dir, rescore.MANIFEST_FILE)) as f:
+        assert sorted(f.read().split()) == ['alice_1', 'alice_2']
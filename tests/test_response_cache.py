@@ -0,0 +1,105 @@
+import sqlite3
+import time
+
+import pytest
+
+from response_cache import ResponseCache, normalize_input
+
+CONFIG = {'system_prompt': "You are an interviewer", 'temperature': 0.6}
+ANSWER = "I would use a queue and retry with exponential backoff to handle the failures gracefully"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "responses.db"))
+
+
+def test_exact_hit_ignores_case_whitespace_and_punctuation(cache):
+    cache.put('mistral:7b', CONFIG, "How do you handle failures?", ANSWER, "Why backoff?")
+    assert cache.get('mistral:7b', CONFIG, "How do you handle failures?", "  " + ANSWER.upper() + "!") \
+        == ("Why backoff?", 'exact')
+    assert cache.get('mistral:7b', CONFIG, "A different question?", ANSWER) == (None, None)
+    assert cache.get('llama2', CONFIG, "How do you handle failures?", ANSWER) == (None, None)
+    assert normalize_input("  Hello,   World! ") == "hello, world"
+
+
+def test_disk_tier_is_shared_between_instances(cache):
+    cache.put('mistral:7b', CONFIG, "Q?", ANSWER, "R")
+    other = ResponseCache(cache.db_path)
+    assert other.get('mistral:7b', CONFIG, "Q?", ANSWER) == ("R", 'exact')
+
+
+def test_replies_stay_within_their_scope(cache):
+    alice = cache.scope_key("alice_1", "Python engineer")
+    bob = cache.scope_key("bob_1", "Python engineer")
+    assert alice != bob
+    cache.put('mistral:7b', CONFIG, "Q?", ANSWER, "R", alice)
+    assert cache.get('mistral:7b', CONFIG, "Q?", ANSWER, alice) == ("R", 'exact')
+    assert cache.get('mistral:7b', CONFIG, "Q?", ANSWER, bob) == (None, None)
+
+    cache.configure({'scope': 'resume'})
+    assert cache.scope_key("alice_1", "Python engineer") == cache.scope_key("bob_1", "Python engineer")
+    assert cache.scope_key("alice_1", "Python engineer") != cache.scope_key("alice_1", "Java engineer")
+    cache.configure({'scope': 'global'})
+    assert cache.scope_key("alice_1", "Python engineer") == cache.scope_key("bob_1", "Java engineer")
+    cache.configure({'scope': 'team'})
+    with pytest.raises(ValueError):
+        cache.scope_key("alice_1", "")
+
+
+def test_near_duplicates_are_opt_in(cache):
+    cache.put('mistral:7b', CONFIG, "Q?", ANSWER, "R")
+    reworded = "um " + ANSWER
+    assert cache.get('mistral:7b', CONFIG, "Q?", reworded) == (None, None)
+    cache.configure({'near_duplicates': True})
+    assert cache.get('mistral:7b', CONFIG, "Q?", reworded) == ("R", 'near')
+    assert cache.get('mistral:7b', CONFIG, "Q?", "Something entirely different about databases and indexes") \
+        == (None, None)
+
+
+def test_varied_models_bypass_the_cache(cache):
+    hot = dict(CONFIG, temperature=0.9)
+    cache.put('mistral:7b', hot, "Q?", ANSWER, "R")
+    assert cache.get('mistral:7b', hot, "Q?", ANSWER) == (None, None)
+    assert cache.get('mistral:7b', dict(CONFIG, response_cache=False), "Q?", ANSWER) == (None, None)
+    assert cache.stats()['bypass'] == 2
+    cache.configure({'enabled': False})
+    assert cache.get('mistral:7b', CONFIG, "Q?", ANSWER) == (None, None)
+
+
+def test_eviction_drops_expired_and_least_recently_used(cache):
+    cache.put('mistral:7b', CONFIG, "Q1?", ANSWER, "R1")
+    cache.put('mistral:7b', CONFIG, "Q2?", ANSWER, "R2")
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute("UPDATE responses SET last_used = last_used - 60")
+    # Fresh instances stand in for other workers, which only share the disk tier
+    assert ResponseCache(cache.db_path).get('mistral:7b', CONFIG, "Q1?", ANSWER) == ("R1", 'exact')
+
+    cache.configure({'disk_entries': 1})
+    cache.evict()
+    other = ResponseCache(cache.db_path)
+    assert other.get('mistral:7b', CONFIG, "Q1?", ANSWER) == ("R1", 'exact')
+    assert other.get('mistral:7b', CONFIG, "Q2?", ANSWER) == (None, None)
+
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute("UPDATE responses SET created_at = ?", (time.time() - 2 * 3600,))
+    other = ResponseCache(cache.db_path, policy={'ttl_hours': 1})
+    assert other.get('mistral:7b', CONFIG, "Q1?", ANSWER) == (None, None)
+    other.evict()
+    with sqlite3.connect(cache.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+
+def test_memory_tier_follows_the_policy(cache):
+    cache.put('mistral:7b', CONFIG, "Q1?", ANSWER, "R1")
+    cache.put('mistral:7b', CONFIG, "Q2?", ANSWER, "R2")
+    cache.configure({'memory_entries': 1})
+    assert cache.stats()['memory_entries'] == 1
+
+    time.sleep(0.01)
+    cache.configure({'ttl_hours': 0})
+    assert cache.stats()['memory_entries'] == 0
+    cache.put('mistral:7b', CONFIG, "Q3?", ANSWER, "R3")
+    time.sleep(0.01)
+    assert cache.get('mistral:7b', CONFIG, "Q3?", ANSWER) == (None, None)
+    assert cache.stats()['memory_entries'] == 0
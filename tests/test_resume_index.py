@@ -0,0 +1,46 @@
+from resume_index import ResumeIndex, estimate_tokens, split_sections
+
+RESUME = """Jane Doe
+Backend engineer
+
+EXPERIENCE
+Built payment services in Python and Django on AWS, with Celery queues and Postgres.
+
+Projects:
+Wrote a Kubernetes operator in Go for rolling database upgrades.
+
+Education
+BSc Computer Science, 2015
+"""
+
+
+def test_sections_follow_headings():
+    assert [heading for heading, _ in split_sections(RESUME)] == ['Header', 'Experience', 'Projects', 'Education']
+
+
+def test_query_ranks_matching_section_first():
+    index = ResumeIndex(RESUME)
+    scores = index.score("kubernetes operator in go")
+    assert index.chunks[int(scores.argmax())]['section'] == 'Projects'
+    assert [chunk['section'] for chunk in index.top_chunks("django payments", k=1)] == ['Experience']
+    # Unmatched queries fall back to the opening of the resume
+    assert index.top_chunks("haskell", k=1)[0]['section'] == 'Header'
+
+
+def test_selection_stays_within_token_budget():
+    index = ResumeIndex(RESUME, chunk_words=5)
+    for budget in (5, 10, 20):
+        chunks = index.top_chunks("python django aws kubernetes go postgres", k=10, token_budget=budget)
+        assert chunks
+        assert sum(estimate_tokens(chunk['text']) for chunk in chunks) <= budget
+    # Selected chunks keep resume order
+    chunks = index.top_chunks("education kubernetes django", k=3)
+    positions = [index.chunks.index(chunk) for chunk in chunks]
+    assert positions == sorted(positions)
+    assert index.top_chunks("django", token_budget=0) == []
+
+
+def test_empty_resume():
+    index = ResumeIndex("")
+    assert index.top_chunks("python") == []
+    assert index.overview() == ""
@@ -0,0 +1,44 @@
+import random
+
+import numpy as np
+import pytest
+
+from running_stats import P2Quantile, RunningStats
+
+
+@pytest.mark.parametrize('p', [0.5, 0.9, 0.99])
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal'])
+def test_p2_tracks_the_exact_quantile(p, distribution):
+    rng = random.Random(42)
+    draw = {'uniform': lambda: rng.random(), 'lognormal': lambda: rng.lognormvariate(0, 1)}[distribution]
+    values = [draw() for _ in range(20000)]
+    quantile = P2Quantile(p)
+    for value in values:
+        quantile.add(value)
+    exact = np.quantile(values, p)
+    assert quantile.value() == pytest.approx(exact, rel=0.05)
+
+
+def test_few_samples_are_interpolated_exactly():
+    quantile = P2Quantile(0.5)
+    assert quantile.value() == 0.0
+    for value in (4.0, 1.0, 3.0):
+        quantile.add(value)
+    assert quantile.value() == 3.0
+    quantile.add(2.0)
+    assert quantile.value() == 2.5
+
+
+def test_running_mean_and_variance():
+    rng = random.Random(7)
+    values = [rng.gauss(100, 15) for _ in range(5000)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    summary = stats.to_dict()
+    assert summary['count'] == len(values)
+    assert summary['mean'] == pytest.approx(np.mean(values))
+    assert summary['std'] == pytest.approx(np.std(values))
+    assert (summary['min'], summary['max']) == (min(values), max(values))
+    assert set(summary) >= {'p50', 'p90'}
+    assert RunningStats().to_dict()['std'] == 0.0
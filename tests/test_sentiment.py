@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip('textblob')
+
+from sentiment import SAMPLE_ANSWERS, LexiconBackend, SentimentScorer, TextBlobBackend, parity_report, tokenize
+
+CORPUS = SAMPLE_ANSWERS + [
+    "It wasn't good at all.",
+    "I didn't enjoy it",
+    "It isn't terrible, just okay.",
+    "It was really, really good.",
+    "The design was not very good, but the tests were extremely thorough!",
+    "I'm not a big fan of microservices; they're hard to debug.",
+    "Really not good. We never shipped it.",
+    "Our U.S. team, e.g. the backend group, was great!!",
+    "That was a bad, bad decision... but we learned a lot.",
+    "I can't say it was easy, it was quite difficult and a little stressful.",
+    "Honestly? Best project I've worked on.",
+    "",
+    "Kubernetes, Docker, Terraform.",
+]
+
+
+@pytest.fixture(scope='module')
+def lexicon():
+    return LexiconBackend()
+
+
+def test_tokenize_splits_contractions_like_textblob():
+    assert tokenize("It wasn't good.") == ['it', 'was', 'n', "'", 't', 'good', '.']
+    assert tokenize("Mr. Smith, e.g. (great)!") == ['mr.', 'smith', ',', 'e.g.', '(', 'great', ')', '!']
+
+
+def test_lexicon_matches_textblob(lexicon):
+    report = parity_report(CORPUS, candidate=lexicon)
+    assert report['max_abs_error'] < 1e-6, report['worst']
+    assert report['sign_agreement'] == 1.0
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("It wasn't good at all.", 0.7),
+    ("I didn't enjoy it", 0.4),
+    ("It isn't terrible, just okay.", -0.25),
+    ("really, really good", 0.7),
+    ("not good", -0.35),
+    ("really not good", -0.35),
+])
+def test_negation_and_modifiers(lexicon, text, expected):
+    assert lexicon.score(text) == pytest.approx(expected)
+    assert TextBlobBackend().score(text) == pytest.approx(expected)
+
+
+def test_batch_keeps_texts_apart(lexicon):
+    # A pending negation or modifier must not carry over into the next answer
+    batch = ["not", "good", "very", "good", "", "great!"]
+    assert list(lexicon.score_batch(batch)) == pytest.approx([lexicon.score(text) for text in batch])
+
+
+def test_scorer_caches_and_scores_in_background(lexicon):
+    scorer = SentimentScorer(lexicon, cache_size=2)
+    assert scorer.score("good") == pytest.approx(0.7)
+    assert scorer.submit("bad").result(timeout=5) == pytest.approx(-0.7)
+    scorer.score("great")
+    assert len(scorer.cache) == 2
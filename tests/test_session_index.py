@@ -0,0 +1,83 @@
+import os
+import sqlite3
+
+from session_index import SessionIndex
+from session_recorder import InterviewRecorder
+
+
+def record(recorder, username, answers):
+    recorder.start_session(username)
+    recorder.set_model_used("mistral:7b")
+    for answer in answers:
+        recorder.record_interaction('assistant', "Next question?")
+        recorder.record_interaction('user', answer)
+    recorder.end_session()
+
+
+def test_sessions_are_listed_and_counted_from_the_catalog(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    record(recorder, "alice", ["one"])
+    record(recorder, "alice", ["one", "two"])
+    record(recorder, "bob", [])
+
+    assert recorder.count_sessions("alice") == 2
+    assert recorder.count_sessions() == 3
+    sessions = recorder.list_sessions("alice")
+    assert [session['interaction_count'] for session in sessions] == [4, 2]
+    assert sessions[0]['start_time'] >= sessions[1]['start_time']
+    assert len(recorder.list_sessions(limit=1, offset=2)) == 1
+
+
+def test_count_rebuilds_a_missing_catalog(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    record(recorder, "alice", ["one"])
+    os.remove(os.path.join(str(tmp_path), "sessions.db"))
+    SessionIndex.initialized_paths.clear()
+
+    # Counting comes first on the history page, so it must not see an empty catalog
+    recorder = InterviewRecorder(str(tmp_path))
+    assert recorder.count_sessions("alice") == 1
+    assert recorder.list_sessions("alice")[0]['interaction_count'] == 2
+
+
+def test_catalog_without_interaction_counts_is_migrated(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    record(recorder, "alice", ["one"])
+    db_path = os.path.join(str(tmp_path), "sessions.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("ALTER TABLE sessions RENAME TO new_sessions")
+        conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, username TEXT NOT NULL, "
+                     "start_time TEXT NOT NULL, end_time TEXT, model_used TEXT)")
+        conn.execute("INSERT INTO sessions SELECT session_id, username, start_time, end_time, model_used "
+                     "FROM new_sessions")
+        conn.execute("DROP TABLE new_sessions")
+    SessionIndex.initialized_paths.clear()
+
+    recorder = InterviewRecorder(str(tmp_path))
+    assert recorder.list_sessions("alice")[0]['interaction_count'] == 2
+    assert not recorder.index.needs_rebuild()
+
+
+def test_sync_state_is_read_from_meta_not_the_rows(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    record(recorder, "alice", ["one"])
+    assert recorder.count_sessions() == 1
+    with sqlite3.connect(recorder.index.db_path) as conn:
+        conn.execute("UPDATE sessions SET interaction_count = NULL")
+    SessionIndex.initialized_paths.clear()
+
+    # A row without an interaction count no longer forces a scan once the catalog is synced
+    assert not SessionIndex(recorder.index.db_path).needs_rebuild()
+
+
+def test_rebuild_keeps_live_rows_and_drops_deleted_recordings(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    record(recorder, "alice", ["one"])
+    record(recorder, "bob", [])
+    bob = recorder.list_sessions("bob")[0]['session_id']
+    os.remove(recorder.store.path(bob))
+    recorder.index.add_session("orphan_1", {'username': "carol", 'start_time': "2026-01-05T10:00:00",
+                                            'end_time': None, 'model_used': None})
+
+    assert recorder.rebuild_index() == 1
+    assert [session['username'] for session in recorder.list_sessions()] == ["alice"]
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from session_recorder import InterviewRecorder
+from session_state import FileStateBackend, create_state_backend
+
+
+def test_file_backend_appends_reads_and_counts(tmp_path):
+    backend = FileStateBackend(str(tmp_path))
+    for i in range(3):
+        backend.append("alice_1", {'event': 'x', 'i': i})
+    assert backend.length("alice_1") == 3
+    assert [event['i'] for event in backend.read("alice_1", start=1)] == [1, 2]
+
+    # Another worker appends; a torn final line is not counted until it is complete
+    other = FileStateBackend(str(tmp_path))
+    other.append("alice_1", {'event': 'x', 'i': 3})
+    with open(backend.path("alice_1"), 'a') as f:
+        f.write('{"event": "x", "i"')
+    assert backend.length("alice_1") == 4
+    assert len(backend.read("alice_1")) == 4
+    with open(backend.path("alice_1"), 'a') as f:
+        f.write(': 4}\n')
+    assert backend.length("alice_1") == 5
+
+    assert [session_id for session_id, _ in backend.sessions()] == ["alice_1"]
+    backend.remove("alice_1")
+    assert backend.length("alice_1") == 0
+    with pytest.raises(FileNotFoundError):
+        backend.read("alice_1")
+    with pytest.raises(FileNotFoundError):
+        other.remove("alice_1")
+
+    # A log started again under the same id is counted from scratch
+    backend.append("alice_1", {'event': 'x'})
+    assert backend.length("alice_1") == 1
+
+
+@pytest.mark.parametrize('session_id', ["", "../escape", ".hidden", "a/b"])
+def test_file_backend_rejects_unsafe_ids(tmp_path, session_id):
+    with pytest.raises(ValueError):
+        FileStateBackend(str(tmp_path)).path(session_id)
+
+
+def test_unknown_backend_spec(tmp_path):
+    with pytest.raises(ValueError):
+        create_state_backend("memcached://localhost", str(tmp_path))
+
+
+def test_journal_resume_in_another_recorder(tmp_path):
+    base_dir = str(tmp_path)
+    first = InterviewRecorder(base_dir)
+    first.start_session("alice")
+    first.set_model_used("mistral")
+    first.record_interaction('assistant', "Tell me about yourself.")
+    first.record_interaction('user', "I build data pipelines.")
+    first.record_turn(1, {'answer_lengths': 4})
+    session_id = first.current_session
+
+    # Another worker picks the interview up from the log
+    second = InterviewRecorder(base_dir)
+    session_data = second.resume_session(session_id, username="alice")
+    assert [interaction['content'] for interaction in second.interactions] == [
+        "Tell me about yourself.", "I build data pipelines."]
+    assert session_data['model_used'] == "mistral"
+    assert session_data['turns'][0]['metrics'] == {'answer_lengths': 4}
+    assert not first.is_stale() and not second.is_stale()
+
+    second.record_interaction('assistant', "What went wrong last time?")
+    assert first.is_stale() and not second.is_stale()
+
+    with pytest.raises(ValueError):
+        InterviewRecorder(base_dir).resume_session(session_id, username="mallory")
+
+    assert second.end_session() == session_id
+    with pytest.raises(ValueError):
+        InterviewRecorder(base_dir).resume_session(session_id)
+    assert len(second.load_session(session_id)['interactions']) == 3
+
+
+def test_sessions_started_in_the_same_second_get_separate_logs(tmp_path):
+    recorders = [InterviewRecorder(str(tmp_path)) for _ in range(2)]
+    for recorder in recorders:
+        recorder.start_session("alice")
+    assert recorders[0].current_session != recorders[1].current_session
+    assert all(recorder.state.length(recorder.current_session) == 1 for recorder in recorders)
+
+
+def test_orphaned_logs_are_recovered(tmp_path):
+    recorder = InterviewRecorder(str(tmp_path))
+    recorder.start_session("alice")
+    recorder.record_interaction('assistant', "Hello")
+    orphan = recorder.current_session
+    recorder.state.close(orphan)
+    os.utime(recorder.state.path(orphan), (0, 0))
+
+    assert InterviewRecorder(str(tmp_path)).recover_orphaned_sessions(stale_after=60) == [orphan]
+    session_data = recorder.load_session(orphan)
+    assert session_data['recovered'] and session_data['end_time'] is not None
+
+
+def test_redis_backend_through_the_stub(tmp_path):
+    pytest.importorskip('redis')
+    from redis_stub import start_stub_server
+
+    server, url = start_stub_server()
+    try:
+        backend = create_state_backend(url)
+        backend.append("alice_1", {'event': 'start'})
+        backend.append("alice_1", {'event': 'end'})
+        assert backend.length("alice_1") == 2
+        assert [event['event'] for event in backend.read("alice_1", start=1)] == ['end']
+        assert [session_id for session_id, _ in backend.sessions()] == ["alice_1"]
+        backend.remove("alice_1")
+        with pytest.raises(FileNotFoundError):
+            backend.read("alice_1")
+    finally:
+        server.shutdown()
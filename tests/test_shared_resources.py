@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+
+import shared_resources
+from shared_resources import get_model_manager, get_response_cache, get_user_store
+
+
+def test_resources_are_created_once_across_threads():
+    created = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    def get():
+        barrier.wait()
+        return shared_resources._get_or_create('test:once', factory)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(result is created[0] for result in results)
+    assert 'test:once' in shared_resources.STARTUP_PROFILE
+
+
+def test_model_manager_picks_up_changes_from_other_processes(tmp_path):
+    config_file = str(tmp_path / "model_config.json")
+    manager = get_model_manager(config_file)
+    assert get_model_manager(config_file) is manager
+
+    with open(config_file) as f:
+        config = json.load(f)
+    config['models']['mistral:7b']['temperature'] = 0.1
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
+    # Another process's write; make sure the mtime differs on coarse filesystems
+    os.utime(config_file, (manager.config_mtime + 1, manager.config_mtime + 1))
+    assert get_model_manager(config_file).get_model_config('mistral:7b')['temperature'] == 0.1
+
+
+def test_per_path_resources_and_switches(tmp_path, monkeypatch):
+    first = get_user_store(str(tmp_path / "a.db"), legacy_json=None)
+    assert get_user_store(str(tmp_path / "a.db"), legacy_json=None) is first
+    assert get_user_store(str(tmp_path / "b.db"), legacy_json=None) is not first
+
+    monkeypatch.setenv('INTERVIEW_RESPONSE_CACHE', 'off')
+    assert get_response_cache() is None
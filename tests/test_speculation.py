@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from conversation_context import ConversationContext
+from inference_scheduler import InferenceScheduler
+from resume_index import ResumeIndex
+from speculation import PRIORITY_SPECULATIVE, TurnSpeculator, parse_numbered_questions
+
+PLANNED = ["Tell me about Django.", "How do you test?", "Why Kafka?"]
+
+
+@pytest.fixture
+def busy_scheduler(fake_ollama):
+    """One worker, busy with a held request, so speculative work stays queued"""
+    client = fake_ollama()
+    client.hold.clear()
+    scheduler = InferenceScheduler(client, max_concurrency=1)
+    blocker = scheduler.submit('mistral:7b', [{'role': 'user', 'content': 'running'}])
+    assert blocker.started.wait(5)
+    yield scheduler, client
+    client.hold.set()
+    scheduler.shutdown()
+
+
+def start(speculator):
+    conversation = ConversationContext("You are an interviewer.")
+    conversation.add_turn('assistant', "Tell me about Django.")
+    index = ResumeIndex("Experience\nDjango and Postgres at Acme.\nProjects\nKafka pipelines.")
+    return speculator.start('mistral:7b', conversation, index, "Tell me about Django.", PLANNED,
+                            "Interviewer: Tell me about Django.")
+
+
+def test_prefetch_scores_resume_picks_follow_ups_and_warms_the_prefix(busy_scheduler):
+    scheduler, _ = busy_scheduler
+    speculator = TurnSpeculator(scheduler)
+    prefetch = start(speculator)
+    assert prefetch.ready.wait(5)
+    assert prefetch.follow_up_candidates == ["How do you test?", "Why Kafka?"]
+    assert int(np.argmax(prefetch.question_scores)) == 0
+    assert prefetch.warm_request.priority == PRIORITY_SPECULATIVE
+    assert prefetch.warm_request.options == {'num_predict': 1}
+
+    assert speculator.take() is prefetch
+    # The real request covers the prefix, so a warmup that has not started is dropped
+    assert prefetch.warm_request.cancelled
+    assert speculator.take() is None
+
+
+def test_new_speculation_supersedes_the_pending_one(busy_scheduler):
+    scheduler, _ = busy_scheduler
+    speculator = TurnSpeculator(scheduler)
+    first = start(speculator)
+    second = start(speculator)
+    assert first.cancelled and not second.cancelled
+    assert second.turn_id == first.turn_id + 1
+    speculator.cancel()
+    assert second.cancelled and speculator.take() is None
+
+
+def test_parse_numbered_questions():
+    text = "Here are your questions:\n1. Tell me about Django.\n2) How do you test?\n  3.   Why Kafka?  \nGood luck"
+    assert parse_numbered_questions(text) == PLANNED
@@ -0,0 +1,42 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from user_store import UserStore
+
+
+def test_register_and_authenticate(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"), legacy_json=None)
+    assert store.register("alice", "secret")
+    assert not store.register("alice", "other")
+    assert store.authenticate("alice", "secret")
+    assert not store.authenticate("alice", "other")
+    assert not store.authenticate("bob", "secret")
+    assert store.exists("alice") and not store.exists("bob")
+
+
+def test_concurrent_sign_ups_keep_one_account_each(tmp_path):
+    db_path = str(tmp_path / "users.db")
+    UserStore(db_path, legacy_json=None)
+
+    def sign_up(i):
+        # Separate stores, like separate worker processes
+        return UserStore(db_path, legacy_json=None).register(f"user{i % 10}", f"pw{i}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(sign_up, range(40)))
+    assert sum(results) == 10
+    assert UserStore(db_path, legacy_json=None).count() == 10
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "users.json"
+    legacy.write_text(json.dumps({'alice': {'password': "secret", 'created_at': "2024-01-01"}}))
+    db_path = str(tmp_path / "users.db")
+    store = UserStore(db_path, legacy_json=str(legacy))
+    assert store.authenticate("alice", "secret")
+
+    # Accounts changed after the import are not reset by later starts
+    legacy.write_text(json.dumps({'alice': {'password': "old"}, 'bob': {'password': "pw"}}))
+    store = UserStore(db_path, legacy_json=str(legacy))
+    assert store.authenticate("alice", "secret")
+    assert not store.exists("bob")
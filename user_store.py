@@ -0,0 +1,96 @@
+import hmac
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+
+class UserStore:
+    """SQLite-backed user accounts, safe to share across Streamlit worker processes.
+
+    Lookups go through the primary-key index and registration is a single
+    atomic INSERT, so concurrent sign-ups can never overwrite each other.
+    Accounts from a legacy users.json file are imported once.
+    """
+
+    def __init__(self, db_path="users.db", legacy_json="users.json"):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+        if legacy_json and os.path.exists(legacy_json):
+            self.migrate_json(legacy_json)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def migrate_json(self, json_path):
+        """Import users from a users.json file once; existing accounts are kept"""
+        with open(json_path, 'r') as f:
+            users = json.load(f)
+
+        with closing(self._connect()) as conn:
+            # Take the write lock first so only one worker performs the import
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migrated = conn.execute(
+                    "SELECT value FROM store_meta WHERE key = 'migrated_json'"
+                ).fetchone()
+                if migrated is None:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO users VALUES (?, ?, ?)",
+                        [(username, data['password'], data.get('created_at', ''))
+                         for username, data in users.items()]
+                    )
+                    conn.execute(
+                        "INSERT INTO store_meta VALUES ('migrated_json', ?)", (os.path.abspath(json_path),)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(users)
+
+    def register(self, username, password):
+        """Create an account; returns False if the username is taken"""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO users VALUES (?, ?, ?)",
+                    (username, password, str(datetime.now()))
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def authenticate(self, username, password):
+        """Check credentials"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT password FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return row is not None and hmac.compare_digest(row[0].encode('utf-8'), password.encode('utf-8'))
+
+    def exists(self, username):
+        """Whether an account exists for the username"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone()
+        return row is not None
+
+    def count(self):
+        """Number of registered accounts"""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
\ No newline at end of file